@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022, Hatchbed
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import asyncapi_gencpp  # noqa: E402
+
+RESULTS_VERSION = 1
+
+# Phases shorter than this are too noisy to estimate how they scale.
+MIN_SCALING_SECONDS = 0.05
+
+INCLUDE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "include")
+
+
+def ref(name):
+    return {"$ref": "#/components/schemas/" + name}
+
+
+# An inline object nested `depth` levels deep.  The child of each level has a
+# name of its own, as a nested struct can't have the name of the struct it is
+# declared in.
+def nested_object(depth, level=1):
+    properties = {
+        "level": {"type": "integer", "minimum": 0},
+        "label": {"type": "string", "maxLength": 16},
+    }
+    if depth > 1:
+        properties["child{}".format(level)] = nested_object(depth - 1, level + 1)
+    return {"type": "object", "properties": properties, "required": ["level"]}
+
+
+# The name of the schema that refers to a record through `ref_chain` aliases.
+def record_alias(index, ref_chain):
+    if ref_chain == 0:
+        return "record{}".format(index)
+    return "record{}Alias0".format(index)
+
+
+# A synthetic spec with `schemas` record objects.  Each record has `arrays`
+# array properties, `enums` properties referring to enum schemas, an inline
+# object nested `depth` levels deep and a reference to the previous record
+# through a chain of `ref_chain` type aliases.  Each record is the message of
+# a channel of its own.
+def synthesize_spec(schemas, depth=2, ref_chain=1, arrays=2, enums=1):
+    components = {}
+    channels = {}
+    for index in range(enums):
+        components["state{}".format(index)] = {
+            "type": "string",
+            "enum": ["idle", "active", "error", "state-{}".format(index)],
+        }
+
+    for index in range(schemas):
+        properties = {
+            "id": {"type": "integer", "format": "uint32"},
+            "name": {"type": "string", "minLength": 1, "maxLength": 32},
+            "value": {"type": "number", "minimum": -1000, "maximum": 1000},
+            "flag": {"type": "boolean"},
+        }
+        for array in range(arrays):
+            if array % 3 == 0:
+                items = {"type": "number"}
+            elif array % 3 == 1:
+                items = {"type": "object", "properties": {"x": {"type": "number"}, "y": {"type": "number"}}}
+            else:
+                items = ref("state{}".format(array % enums)) if enums > 0 else {"type": "string"}
+            properties["list{}".format(array)] = {"type": "array", "items": items, "maxItems": 64}
+        for enum in range(enums):
+            properties["state{}".format(enum)] = ref("state{}".format(enum))
+        if depth > 0:
+            properties["nested"] = nested_object(depth)
+        if index > 0:
+            properties["previous"] = ref(record_alias(index - 1, ref_chain))
+
+        name = "record{}".format(index)
+        components[name] = {
+            "type": "object",
+            "description": "Synthetic record {}".format(index),
+            "properties": properties,
+            "required": ["id", "name"],
+        }
+        for alias in range(ref_chain):
+            target = "record{}Alias{}".format(index, alias + 1) if alias + 1 < ref_chain else name
+            components["record{}Alias{}".format(index, alias)] = {"schema": ref(target)}
+
+        channels["bench/record{}".format(index)] = {
+            "subscribe": {"message": {"payload": ref(name)}},
+        }
+
+    return {
+        "asyncapi": "2.0.0",
+        "info": {"title": "Synthetic benchmark spec", "version": "1.0.0"},
+        "channels": channels,
+        "components": {"schemas": components},
+    }
+
+
+# Run `function` `repeat` times and return the shortest time along with the
+# result of the last run.
+def best_time(function, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def peak_memory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def build_headers(schemas, prefix, symbols, options):
+    lines = 0
+    for name, definition in schemas.items():
+        source = [] if options.out_of_line else None
+        lines = lines + len(asyncapi_gencpp.build_header(name, definition, prefix, symbols, options, source))
+        if source is not None:
+            lines = lines + len(asyncapi_gencpp.build_source(name, prefix, source))
+    return lines
+
+
+# Check that the code generated in outdir compiles: the headers, included
+# together, and the sources of the options that write any.  The nlohmann json
+# headers are looked up on the default include path of the compiler and in
+# NLOHMANN_JSON_INCLUDE_DIR.
+def compile_output(outdir, prefix, compiler):
+    prefix_dir = os.path.join(outdir, prefix)
+    file_names = sorted(os.listdir(prefix_dir))
+    source = os.path.join(outdir, "all_headers.cpp")
+    with open(source, "w") as f:
+        for file_name in file_names:
+            if file_name.endswith(".h"):
+                f.write("#include <{}/{}>\n".format(prefix, file_name))
+    sources = [source] + [os.path.join(prefix_dir, file_name) for file_name in file_names
+                          if file_name.endswith(".cpp")]
+    command = [compiler, "-std=c++17", "-fsyntax-only", "-I", INCLUDE_DIR, "-I", outdir]
+    if os.environ.get("NLOHMANN_JSON_INCLUDE_DIR"):
+        command = command + ["-isystem", os.environ["NLOHMANN_JSON_INCLUDE_DIR"]]
+    for path in sources:
+        result = subprocess.run(command + [path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                universal_newlines=True)
+        if result.returncode != 0:
+            sys.exit("Generated code of {} doesn't compile:\n{}".format(os.path.basename(path), result.stdout))
+
+
+# Time and measure the peak memory of each phase of generating the headers of
+# a synthetic spec: loading the spec file, building the symbol table, building
+# the header text and writing the headers, from scratch and incrementally when
+# none of the schemas changed.  With a compiler, the generated code is
+# compiled afterwards.
+def run_benchmark(size, args, options, workdir, compiler=None):
+    spec = synthesize_spec(size, depth=args.depth, ref_chain=args.ref_chain, arrays=args.arrays,
+                           enums=args.enums)
+    spec_path = os.path.join(workdir, "spec-{}.yaml".format(size))
+    with open(spec_path, "w") as f:
+        yaml.safe_dump(spec, f, sort_keys=False)
+    outdir = os.path.join(workdir, "out-{}".format(size))
+
+    schemas = asyncapi_gencpp.spec_schemas(spec)
+    channels = spec.get("channels")
+    prefix = "bench"
+    symbols = asyncapi_gencpp.SymbolTable(schemas, options)
+    all_schemas = dict(schemas, **symbols.shared)
+
+    def write():
+        shutil.rmtree(outdir, ignore_errors=True)
+        os.makedirs(outdir)
+        return asyncapi_gencpp.generate(schemas, prefix, outdir, options=options, jobs=args.jobs,
+                                        channels=channels)
+
+    def write_incremental():
+        return asyncapi_gencpp.generate(schemas, prefix, outdir, options=options, incremental=True,
+                                        jobs=args.jobs, channels=channels)
+
+    phases = [
+        ("load", lambda: asyncapi_gencpp.load_spec(spec_path)),
+        ("symbols", lambda: asyncapi_gencpp.SymbolTable(schemas, options)),
+        ("build", lambda: build_headers(all_schemas, prefix, symbols, options)),
+        ("write", write),
+        ("incremental", write_incremental),
+    ]
+
+    result = {
+        "schemas": size,
+        "components": len(all_schemas),
+        "spec_bytes": os.path.getsize(spec_path),
+        "phases": {},
+    }
+    for phase, function in phases:
+        if phase == "incremental":
+            # start from the output of a full run with a manifest
+            shutil.rmtree(outdir, ignore_errors=True)
+            os.makedirs(outdir)
+            write_incremental()
+        seconds, value = best_time(function, args.repeat)
+        entry = {"seconds": seconds}
+        if args.memory:
+            entry["peak_bytes"] = peak_memory(function)
+        result["phases"][phase] = entry
+        if phase == "build":
+            result["lines"] = value
+        elif phase == "write":
+            result["written"] = value["written"]
+
+    if compiler is not None:
+        compile_output(outdir, prefix, compiler)
+    shutil.rmtree(outdir, ignore_errors=True)
+    return result
+
+
+# The exponent k of time ~ components^k of each phase between the two largest
+# specs, e.g. about 1 for linear and 2 for quadratic phases.
+def scaling_exponents(results):
+    if len(results) < 2:
+        return {}
+    small, large = results[-2], results[-1]
+    exponents = {}
+    for phase, entry in large["phases"].items():
+        small_seconds = small["phases"][phase]["seconds"]
+        if (entry["seconds"] < MIN_SCALING_SECONDS or small_seconds <= 0 or
+                large["components"] <= small["components"]):
+            continue
+        exponents[phase] = (math.log(entry["seconds"] / small_seconds) /
+                            math.log(large["components"] / small["components"]))
+    return exponents
+
+
+def print_results(results, exponents):
+    phases = list(results[0]["phases"].keys())
+    print("{:>8} {:>10} {:>10}".format("schemas", "components", "lines") +
+          "".join(" {:>11}".format(phase) for phase in phases) + " {:>10}".format("peak MiB"))
+    for result in results:
+        peak = max(entry.get("peak_bytes", 0) for entry in result["phases"].values())
+        print("{:>8} {:>10} {:>10}".format(result["schemas"], result["components"], result["lines"]) +
+              "".join(" {:>10.4f}s".format(result["phases"][phase]["seconds"]) for phase in phases) +
+              " {:>10}".format("{:.1f}".format(peak / (1 << 20)) if peak > 0 else "-"))
+    if len(exponents) > 0:
+        print("\nScaling exponents between the two largest specs:")
+        for phase, exponent in exponents.items():
+            print("  {:<11} {:.2f}".format(phase, exponent))
+
+
+if __name__ == "__main__":
+    option_names = sorted(vars(asyncapi_gencpp.GeneratorOptions()).keys())
+
+    parser = argparse.ArgumentParser(description="Benchmark the generator on synthetic specs")
+    parser.add_argument("--schemas", type=int, nargs="+", default=[10, 100, 1000], metavar="N",
+                        help="Numbers of record schemas of the synthetic specs")
+    parser.add_argument("--depth", type=int, default=2,
+                        help="Nesting depth of the inline object of each record")
+    parser.add_argument("--ref-chain", type=int, default=1,
+                        help="Number of type aliases between a record and the records referring to it")
+    parser.add_argument("--arrays", type=int, default=2, help="Number of array properties of each record")
+    parser.add_argument("--enums", type=int, default=1, help="Number of enum properties of each record")
+    parser.add_argument("--option", action="append", default=[], choices=option_names, dest="options",
+                        help="Enable a generator option, e.g. --option streaming")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="Number of processes used to generate headers")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs of each phase")
+    parser.add_argument("--no-memory", action="store_false", dest="memory",
+                        help="Skip measuring the peak memory of each phase")
+    parser.add_argument("--no-compile", action="store_false", dest="compile",
+                        help="Skip compiling the code generated for the smallest spec")
+    parser.add_argument("--output", metavar="FILE", help="Write the results as JSON to FILE")
+    parser.add_argument("--max-exponent", type=float, metavar="K",
+                        help="Exit with an error if a phase scales worse than components^K")
+
+    args = parser.parse_args()
+    if args.repeat < 1 or args.jobs < 1:
+        sys.exit("Number of runs and jobs must be at least 1")
+    if min(args.schemas) < 1 or min(args.depth, args.ref_chain, args.arrays, args.enums) < 0:
+        sys.exit("Spec parameters must not be negative")
+
+    compiler = None
+    if args.compile:
+        compiler = os.environ.get("CXX") or shutil.which("c++") or shutil.which("g++") or shutil.which("clang++")
+        if compiler is None:
+            sys.exit("No C++ compiler found, set CXX or pass --no-compile")
+
+    options = asyncapi_gencpp.GeneratorOptions(**{name: True for name in args.options})
+    sizes = sorted(set(args.schemas))
+    workdir = tempfile.mkdtemp(prefix="asyncapi_gencpp_benchmark-")
+    try:
+        results = [run_benchmark(size, args, options, workdir, compiler if size == sizes[0] else None)
+                   for size in sizes]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    exponents = scaling_exponents(results)
+    print_results(results, exponents)
+
+    if args.output:
+        report = {
+            "version": RESULTS_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "generator_hash": asyncapi_gencpp.generator_hash(),
+            "parameters": {
+                "depth": args.depth,
+                "ref_chain": args.ref_chain,
+                "arrays": args.arrays,
+                "enums": args.enums,
+                "options": sorted(args.options),
+                "jobs": args.jobs,
+                "repeat": args.repeat,
+            },
+            "results": results,
+            "scaling": exponents,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.max_exponent is not None:
+        slow = {phase: exponent for phase, exponent in exponents.items() if exponent > args.max_exponent}
+        if len(slow) > 0:
+            sys.exit("Phases scaling worse than components^{}: {}".format(
+                args.max_exponent, ", ".join("{} ({:.2f})".format(phase, exponent)
+                                             for phase, exponent in slow.items())))
@@ -1,16 +1,126 @@
-cmake_minimum_required(VERSION 3.1)
+cmake_minimum_required(VERSION 3.2)
+include(CMakeParseArguments)
 
+# Usage: asyncapi_gencpp(<spec> <prefix> <outdir> [LIBRARY <target>] [BENCHMARK <target>]
+#                        [COMMON_PREFIX <prefix>] [SPECS <spec> <prefix>...]
+#                        [OPTIONS <generator options>...])
+#   LIBRARY generates the member function definitions out-of-line and compiles
+#     them once into a static library <target>, which consumers link against
+#   BENCHMARK builds the generated benchmark of the messages of <spec> into the
+#     executable <target>
+#   SPECS are generated in the same run, each with its own prefix
+#   COMMON_PREFIX generates the schemas the specs reference in other files once,
+#     with the given prefix
+#   OPTIONS are passed on to the generator, e.g. OPTIONS --streaming
 macro(asyncapi_gencpp SPEC_FILE PREFIX OUTDIR)
+    cmake_parse_arguments(_asyncapi_gencpp "" "LIBRARY;BENCHMARK;COMMON_PREFIX" "OPTIONS;SPECS" ${ARGN})
+    if (_asyncapi_gencpp_LIBRARY)
+        list(APPEND _asyncapi_gencpp_OPTIONS --out-of-line)
+    endif()
+    if (_asyncapi_gencpp_BENCHMARK)
+        list(APPEND _asyncapi_gencpp_OPTIONS --benchmark)
+    endif()
+    if (_asyncapi_gencpp_COMMON_PREFIX)
+        list(APPEND _asyncapi_gencpp_OPTIONS --common-prefix ${_asyncapi_gencpp_COMMON_PREFIX})
+    endif()
+
+    set(_asyncapi_gencpp_spec_files ${SPEC_FILE})
+    set(_asyncapi_gencpp_spec)
+    foreach(_asyncapi_gencpp_arg ${_asyncapi_gencpp_SPECS})
+        if (_asyncapi_gencpp_spec)
+            list(APPEND _asyncapi_gencpp_OPTIONS --spec ${_asyncapi_gencpp_spec} ${_asyncapi_gencpp_arg})
+            set(_asyncapi_gencpp_spec)
+        else()
+            set(_asyncapi_gencpp_spec ${_asyncapi_gencpp_arg})
+            list(APPEND _asyncapi_gencpp_spec_files ${_asyncapi_gencpp_arg})
+        endif()
+    endforeach()
+    if (_asyncapi_gencpp_spec)
+        message(FATAL_ERROR "SPECS must be pairs of <spec> <prefix>")
+    endif()
+
+    # Both the configure and the build step read the spec, so let the second
+    # one reuse the parsed spec of the first.
+    list(APPEND _asyncapi_gencpp_OPTIONS --cache-dir ${CMAKE_CURRENT_BINARY_DIR}/${PROJECT_NAME}_gencpp_cache)
 
     file(MAKE_DIRECTORY ${OUTDIR})
+
+    # The set of generated headers depends on the schemas in the spec, so
+    # re-run the configure step whenever the spec changes.
+    set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS ${_asyncapi_gencpp_spec_files})
+    execute_process(
+        COMMAND ${CMAKE_COMMAND} -E env ${asyncapi_gencpp_TOOL} ${SPEC_FILE} ${PREFIX} ${OUTDIR} --list-outputs
+            ${_asyncapi_gencpp_OPTIONS}
+        OUTPUT_VARIABLE _asyncapi_gencpp_outputs
+        RESULT_VARIABLE _asyncapi_gencpp_result
+        OUTPUT_STRIP_TRAILING_WHITESPACE
+    )
+    if (NOT _asyncapi_gencpp_result EQUAL 0)
+        message(FATAL_ERROR "Failed to list the outputs of ${SPEC_FILE}")
+    endif()
+
+    # The manifest is rewritten on every run, while the headers are only
+    # touched when their contents change.
+    set(_asyncapi_gencpp_stamp ${OUTDIR}/${PREFIX}/.asyncapi_gencpp.json)
+    set(_asyncapi_gencpp_depfile ${CMAKE_CURRENT_BINARY_DIR}/${PROJECT_NAME}_gencpp.d)
+    set(_asyncapi_gencpp_depfile_args)
+    # DEPFILE is supported by Ninja since 3.7, Makefiles since 3.20 and the
+    # other generators since 3.21.  Otherwise only the specs are dependencies.
+    if (CMAKE_GENERATOR MATCHES "Ninja")
+        set(_asyncapi_gencpp_depfile_version 3.7)
+    elseif (CMAKE_GENERATOR MATCHES "Makefiles")
+        set(_asyncapi_gencpp_depfile_version 3.20)
+    else()
+        set(_asyncapi_gencpp_depfile_version 3.21)
+    endif()
+    if (NOT CMAKE_VERSION VERSION_LESS ${_asyncapi_gencpp_depfile_version})
+        set(_asyncapi_gencpp_depfile_args DEPFILE ${_asyncapi_gencpp_depfile})
+    endif()
+
     add_custom_command(
-        OUTPUT ${OUTDIR}/${PROJECT_NAME}/msg/messages.h
+        OUTPUT ${_asyncapi_gencpp_stamp}
+        BYPRODUCTS ${_asyncapi_gencpp_outputs}
         COMMAND ${CMAKE_COMMAND} -E env ${asyncapi_gencpp_TOOL} ${SPEC_FILE} ${PREFIX} ${OUTDIR}
-        DEPENDS ${SPEC_FILE}
+            --incremental --depfile ${_asyncapi_gencpp_depfile} ${_asyncapi_gencpp_OPTIONS}
+        DEPENDS ${_asyncapi_gencpp_spec_files} ${asyncapi_gencpp_TOOL}
+        ${_asyncapi_gencpp_depfile_args}
     )
 
     add_custom_target(${PROJECT_NAME}_gencpp ALL
-       DEPENDS ${OUTDIR}/${PROJECT_NAME}/msg/messages.h
+       DEPENDS ${_asyncapi_gencpp_stamp}
     )
 
-endmacro()
\ No newline at end of file
+    if (_asyncapi_gencpp_LIBRARY)
+        set(_asyncapi_gencpp_sources)
+        foreach(_asyncapi_gencpp_output ${_asyncapi_gencpp_outputs})
+            if (_asyncapi_gencpp_output MATCHES "\\.cpp$" AND NOT _asyncapi_gencpp_output MATCHES "/benchmark\\.cpp$")
+                list(APPEND _asyncapi_gencpp_sources ${_asyncapi_gencpp_output})
+            endif()
+        endforeach()
+        set_source_files_properties(${_asyncapi_gencpp_sources} PROPERTIES GENERATED TRUE)
+
+        add_library(${_asyncapi_gencpp_LIBRARY} STATIC ${_asyncapi_gencpp_sources})
+        add_dependencies(${_asyncapi_gencpp_LIBRARY} ${PROJECT_NAME}_gencpp)
+        set_target_properties(${_asyncapi_gencpp_LIBRARY} PROPERTIES CXX_STANDARD 17 CXX_STANDARD_REQUIRED ON)
+        target_include_directories(${_asyncapi_gencpp_LIBRARY} PUBLIC ${OUTDIR} ${asyncapi_gencpp_INCLUDE_DIRS})
+        if (TARGET nlohmann_json::nlohmann_json)
+            target_link_libraries(${_asyncapi_gencpp_LIBRARY} PUBLIC nlohmann_json::nlohmann_json)
+        endif()
+    endif()
+
+    if (_asyncapi_gencpp_BENCHMARK)
+        set(_asyncapi_gencpp_benchmark_source ${OUTDIR}/${PREFIX}/benchmark.cpp)
+        set_source_files_properties(${_asyncapi_gencpp_benchmark_source} PROPERTIES GENERATED TRUE)
+
+        add_executable(${_asyncapi_gencpp_BENCHMARK} ${_asyncapi_gencpp_benchmark_source})
+        add_dependencies(${_asyncapi_gencpp_BENCHMARK} ${PROJECT_NAME}_gencpp)
+        set_target_properties(${_asyncapi_gencpp_BENCHMARK} PROPERTIES CXX_STANDARD 17 CXX_STANDARD_REQUIRED ON)
+        target_include_directories(${_asyncapi_gencpp_BENCHMARK} PRIVATE ${OUTDIR} ${asyncapi_gencpp_INCLUDE_DIRS})
+        if (_asyncapi_gencpp_LIBRARY)
+            target_link_libraries(${_asyncapi_gencpp_BENCHMARK} PRIVATE ${_asyncapi_gencpp_LIBRARY})
+        elseif (TARGET nlohmann_json::nlohmann_json)
+            target_link_libraries(${_asyncapi_gencpp_BENCHMARK} PRIVATE nlohmann_json::nlohmann_json)
+        endif()
+    endif()
+
+endmacro()
@@ -0,0 +1,219 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+#pragma once
+
+#include <algorithm>
+#include <chrono>
+#include <cstdint>
+#include <cstdlib>
+#include <fstream>
+#include <iostream>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <utility>
+
+#include <nlohmann/json.hpp>
+
+namespace asyncapi_gencpp {
+
+namespace detail {
+
+template <typename T, typename = void>
+struct HasSerialize : std::false_type {};
+
+template <typename T>
+struct HasSerialize<T, std::void_t<decltype(std::declval<const T&>().serialize(std::declval<std::string&>()))>>
+    : std::true_type {};
+
+// Keep the compiler from optimizing away a result that is only computed to
+// time the operation computing it.
+template <typename T>
+inline void doNotOptimize(const T& value) {
+#if defined(__GNUC__) || defined(__clang__)
+  asm volatile("" : : "r,m"(value) : "memory");
+#else
+  static const void* volatile sink;
+  sink = &value;
+#endif
+}
+
+}  // namespace detail
+
+/**
+ * Time the decoding, encoding and validation of generated structs on sample
+ * JSON text, and check that the samples round-trip without loss.
+ *
+ * Each operation is repeated until a run of it takes at least the minimum time
+ * of --min-time SECONDS, 0.5 by default.  --filter NAME only runs the types
+ * whose name contains NAME, and --output FILE writes the JSON report to FILE
+ * instead of stdout.
+ */
+class BenchmarkRunner {
+ public:
+  using json = nlohmann::json;
+  using clock = std::chrono::steady_clock;
+
+  BenchmarkRunner(int argc, char** argv) {
+    for (int i = 1; i < argc; i++) {
+      std::string_view arg = argv[i];
+      if (arg == "--min-time" && i + 1 < argc) {
+        min_time_ = std::atof(argv[++i]);
+      }
+      else if (arg == "--filter" && i + 1 < argc) {
+        filter_ = argv[++i];
+      }
+      else if (arg == "--output" && i + 1 < argc) {
+        output_ = argv[++i];
+      }
+      else {
+        std::cerr << "usage: " << argv[0] << " [--min-time SECONDS] [--filter NAME] [--output FILE]\n";
+        usage_error_ = true;
+      }
+    }
+  }
+
+  /**
+   * Benchmark the struct T, named type in the report, on the sample text.
+   *
+   * A sample round-trips without loss if decoding it and encoding the result
+   * gives back the same JSON document, and decoding that again encodes to the
+   * same text.
+   */
+  template <typename T>
+  void run(const std::string& type, const std::string& text) {
+    if (usage_error_ || type.find(filter_) == std::string::npos) {
+      return;
+    }
+
+    json result;
+    result["type"] = type;
+    result["bytes"] = text.size();
+
+    T value;
+    bool decoded = T::fromJson(text, value);
+    json document = json::parse(text);
+    std::string encoded = value.dump();
+    T again;
+    bool lossless = decoded && value.toJson() == document && T::fromJson(encoded, again) &&
+                    again.dump() == encoded;
+    if constexpr (detail::HasSerialize<T>::value) {
+      std::string serialized;
+      value.serialize(serialized);
+      lossless = lossless && json::parse(serialized, nullptr, false) == document;
+    }
+    bool valid = decoded && value.isValid();
+    result["decoded"] = decoded;
+    result["valid"] = valid;
+    result["lossless"] = lossless;
+    if (!decoded || !valid || !lossless) {
+      passed_ = false;
+    }
+
+    if (decoded) {
+      T out;
+      result["decode"] = measure(text.size(), [&]() { return T::fromJson(text, out); });
+      result["decode_document"] = measure(0, [&]() { return T::fromJson(document, out); });
+      result["encode"] = measure(encoded.size(), [&]() { return value.dump(); });
+      if constexpr (detail::HasSerialize<T>::value) {
+        std::string buffer;
+        result["serialize"] = measure(encoded.size(), [&]() {
+          buffer.clear();
+          value.serialize(buffer);
+          return buffer.size();
+        });
+      }
+      result["validate"] = measure(0, [&]() { return value.isValid(); });
+    }
+    results_.push_back(result);
+  }
+
+  /**
+   * Write the report, returning the exit code of the benchmark, which is
+   * non-zero if a sample didn't decode, validate or round-trip.
+   */
+  int finish() {
+    if (usage_error_) {
+      return 2;
+    }
+    json report;
+    report["min_time"] = min_time_;
+    report["passed"] = passed_;
+    report["results"] = results_;
+    if (output_.empty()) {
+      std::cout << report.dump(2) << "\n";
+    }
+    else {
+      std::ofstream file(output_);
+      file << report.dump(2) << "\n";
+      if (!file) {
+        std::cerr << "Failed to write " << output_ << "\n";
+        return 2;
+      }
+    }
+    return passed_ ? 0 : 1;
+  }
+
+ private:
+  // Repeat the operation, growing the number of iterations until they take at
+  // least the minimum time.
+  template <typename Operation>
+  json measure(size_t bytes, Operation&& operation) {
+    uint64_t iterations = 1;
+    while (true) {
+      auto start = clock::now();
+      for (uint64_t i = 0; i < iterations; i++) {
+        detail::doNotOptimize(operation());
+      }
+      double seconds = std::chrono::duration<double>(clock::now() - start).count();
+      if (seconds >= min_time_ || iterations >= (uint64_t(1) << 40)) {
+        json measurement;
+        measurement["iterations"] = iterations;
+        measurement["ns_per_op"] = seconds * 1e9 / iterations;
+        if (bytes > 0) {
+          measurement["mb_per_s"] = bytes * iterations / seconds / 1e6;
+        }
+        return measurement;
+      }
+      double estimate = iterations * 1.2 * min_time_ / std::max(seconds, 1e-9);
+      iterations = std::max(iterations * 2, static_cast<uint64_t>(std::min(estimate, iterations * 100.0)));
+    }
+  }
+
+  double min_time_ = 0.5;
+  std::string filter_;
+  std::string output_;
+  bool usage_error_ = false;
+  bool passed_ = true;
+  json results_ = json::array();
+};
+
+}  // namespace asyncapi_gencpp
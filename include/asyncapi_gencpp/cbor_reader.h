@@ -0,0 +1,398 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <string>
+#include <string_view>
+#include <vector>
+
+#include <asyncapi_gencpp/number.h>
+
+namespace asyncapi_gencpp {
+
+/**
+ * Single pass pull parser over CBOR (RFC 8949) data.
+ *
+ * Provides the same interface as JsonReader, so the generated read() methods
+ * decode CBOR straight into the struct members.  Strings are returned as views
+ * into the input.  Both definite and indefinite length arrays and maps are
+ * accepted, while text strings need a definite length.  Tags are only
+ * accepted on skipped values.
+ */
+class CborReader {
+ public:
+  CborReader(const uint8_t* data, size_t size) : data_(data), size_(size) {}
+
+  bool failed() const {
+    return failed_;
+  }
+
+  /**
+   * Byte offset of the reader in the input.
+   */
+  size_t position() const {
+    return pos_;
+  }
+
+  bool beginObject() {
+    return beginContainer(5);
+  }
+
+  /**
+   * Read the next key of the current map.
+   *
+   * Returns false once the map is exhausted or on error.
+   */
+  bool nextKey(std::string_view& key) {
+    return nextEntry() && readStringView(key);
+  }
+
+  bool beginArray() {
+    return beginContainer(4);
+  }
+
+  /**
+   * Advance to the next item of the current array.
+   *
+   * Returns false once the array is exhausted or on error.
+   */
+  bool nextItem() {
+    return nextEntry();
+  }
+
+  /**
+   * Check whether the next value is null without consuming it.
+   */
+  bool isNull() {
+    return !failed_ && pos_ < size_ && data_[pos_] == 0xF6;
+  }
+
+  bool readNull() {
+    if (!isNull()) {
+      return fail();
+    }
+    pos_++;
+    return true;
+  }
+
+  bool readBool(bool& value) {
+    if (failed_ || pos_ >= size_ || (data_[pos_] != 0xF4 && data_[pos_] != 0xF5)) {
+      return fail();
+    }
+    value = data_[pos_++] == 0xF5;
+    return true;
+  }
+
+  /**
+   * Read a text string, reusing the capacity of the output string.
+   *
+   * Any std::basic_string of char can be used, e.g. a std::pmr::string, whose
+   * memory resource is kept.
+   */
+  template <typename String>
+  bool readString(String& value) {
+    std::string_view view;
+    if (!readStringView(view)) {
+      return false;
+    }
+    value.assign(view.data(), view.size());
+    return true;
+  }
+
+  /**
+   * Read a text string without copying it.  The view points into the input.
+   */
+  bool readStringView(std::string_view& value) {
+    uint8_t major;
+    uint64_t length;
+    bool indefinite;
+    if (!readHead(major, length, indefinite)) {
+      return false;
+    }
+    if (major != 3 || indefinite || length > size_ - pos_) {
+      return fail();
+    }
+    value = std::string_view(reinterpret_cast<const char*>(data_ + pos_), length);
+    pos_ += length;
+    return true;
+  }
+
+  /**
+   * Read an integer or floating point value into an arithmetic value.
+   */
+  template <typename T>
+  bool readNumber(T& value) {
+    if (failed_ || pos_ >= size_) {
+      return fail();
+    }
+    uint8_t initial = data_[pos_];
+    if (initial == 0xF9 || initial == 0xFA || initial == 0xFB) {
+      size_t bytes = initial == 0xF9 ? 2 : initial == 0xFA ? 4 : 8;
+      if (bytes > size_ - pos_ - 1) {
+        return fail();
+      }
+      uint64_t bits = detail::loadBigEndian(data_ + pos_ + 1, bytes);
+      pos_ += 1 + bytes;
+      double number;
+      if (bytes == 2) {
+        number = halfToDouble(static_cast<uint16_t>(bits));
+      }
+      else if (bytes == 4) {
+        float single;
+        uint32_t bits32 = static_cast<uint32_t>(bits);
+        std::memcpy(&single, &bits32, sizeof(single));
+        number = single;
+      }
+      else {
+        std::memcpy(&number, &bits, sizeof(number));
+      }
+      return detail::storeFloat(number, value) || fail();
+    }
+    uint8_t major;
+    uint64_t argument;
+    bool indefinite;
+    if (!readHead(major, argument, indefinite)) {
+      return false;
+    }
+    if (major == 0) {
+      return detail::storeUnsigned(argument, value) || fail();
+    }
+    if (major == 1 && argument <= static_cast<uint64_t>(std::numeric_limits<int64_t>::max())) {
+      return detail::storeSigned(-1 - static_cast<int64_t>(argument), value) || fail();
+    }
+    return fail();
+  }
+
+  /**
+   * Read an array of exactly size numbers.
+   *
+   * A fast path for fixed size numeric arrays, which are decoded straight into
+   * the destination without the per item bookkeeping of nextItem().
+   */
+  template <typename T>
+  bool readNumberArray(T* values, size_t size) {
+    uint8_t major;
+    uint64_t argument;
+    bool indefinite;
+    if (!readHead(major, argument, indefinite)) {
+      return false;
+    }
+    if (major != 4 || (!indefinite && argument != size)) {
+      return fail();
+    }
+    for (size_t i = 0; i < size; i++) {
+      if (!readNumber(values[i])) {
+        return false;
+      }
+    }
+    if (indefinite) {
+      if (pos_ >= size_ || data_[pos_] != 0xFF) {
+        return fail();
+      }
+      pos_++;
+    }
+    return true;
+  }
+
+  /**
+   * Skip over the next value, including any nested arrays and maps.
+   */
+  bool skipValue() {
+    uint8_t major;
+    uint64_t argument;
+    bool indefinite;
+    if (!readHead(major, argument, indefinite)) {
+      return false;
+    }
+    switch (major) {
+      case 2:
+      case 3:
+        if (indefinite) {
+          return skipUntilBreak(1);
+        }
+        if (argument > size_ - pos_) {
+          return fail();
+        }
+        pos_ += argument;
+        return true;
+      case 4:
+      case 5: {
+        size_t values = major == 5 ? 2 : 1;
+        if (indefinite) {
+          return skipUntilBreak(values);
+        }
+        for (uint64_t i = 0; i < argument; i++) {
+          for (size_t j = 0; j < values; j++) {
+            if (!skipValue()) {
+              return false;
+            }
+          }
+        }
+        return true;
+      }
+      case 6:
+        return skipValue();
+      case 7:
+        return !indefinite || fail();
+      default:
+        return true;
+    }
+  }
+
+  /**
+   * Check that the whole input has been consumed.
+   */
+  bool finish() {
+    if (failed_ || pos_ != size_) {
+      return fail();
+    }
+    return true;
+  }
+
+ private:
+  bool fail() {
+    failed_ = true;
+    return false;
+  }
+
+  // Read the initial byte and argument of a data item.
+  bool readHead(uint8_t& major, uint64_t& argument, bool& indefinite) {
+    if (failed_ || pos_ >= size_) {
+      return fail();
+    }
+    uint8_t initial = data_[pos_++];
+    major = initial >> 5;
+    uint8_t additional = initial & 0x1F;
+    indefinite = false;
+    if (additional < 24) {
+      argument = additional;
+      return true;
+    }
+    if (additional == 31 && major >= 2 && major != 6) {
+      indefinite = true;
+      argument = 0;
+      return true;
+    }
+    if (additional > 27) {
+      return fail();
+    }
+    size_t bytes = size_t(1) << (additional - 24);
+    if (bytes > size_ - pos_) {
+      return fail();
+    }
+    argument = detail::loadBigEndian(data_ + pos_, bytes);
+    pos_ += bytes;
+    return true;
+  }
+
+  bool beginContainer(uint8_t expected) {
+    uint8_t major;
+    uint64_t argument;
+    bool indefinite;
+    if (!readHead(major, argument, indefinite)) {
+      return false;
+    }
+    if (major != expected || (!indefinite && argument == kIndefinite)) {
+      return fail();
+    }
+    remaining_.push_back(indefinite ? kIndefinite : argument);
+    return true;
+  }
+
+  bool nextEntry() {
+    if (failed_ || remaining_.empty()) {
+      return fail();
+    }
+    uint64_t& remaining = remaining_.back();
+    if (remaining == kIndefinite) {
+      if (pos_ >= size_) {
+        return fail();
+      }
+      if (data_[pos_] == 0xFF) {
+        pos_++;
+        remaining_.pop_back();
+        return false;
+      }
+      return true;
+    }
+    if (remaining == 0) {
+      remaining_.pop_back();
+      return false;
+    }
+    remaining--;
+    return true;
+  }
+
+  bool skipUntilBreak(size_t values) {
+    while (pos_ < size_) {
+      if (data_[pos_] == 0xFF) {
+        pos_++;
+        return true;
+      }
+      for (size_t i = 0; i < values; i++) {
+        if (!skipValue()) {
+          return false;
+        }
+      }
+    }
+    return fail();
+  }
+
+  static double halfToDouble(uint16_t half) {
+    int exponent = (half >> 10) & 0x1F;
+    int mantissa = half & 0x3FF;
+    double value;
+    if (exponent == 0) {
+      value = std::ldexp(mantissa, -24);
+    }
+    else if (exponent != 31) {
+      value = std::ldexp(mantissa + 1024, exponent - 25);
+    }
+    else {
+      value = mantissa == 0 ? std::numeric_limits<double>::infinity() : std::numeric_limits<double>::quiet_NaN();
+    }
+    return (half & 0x8000) ? -value : value;
+  }
+
+  static constexpr uint64_t kIndefinite = std::numeric_limits<uint64_t>::max();
+
+  const uint8_t* data_;
+  size_t size_;
+  size_t pos_ = 0;
+  bool failed_ = false;
+  std::vector<uint64_t> remaining_;
+};
+
+}  // namespace asyncapi_gencpp
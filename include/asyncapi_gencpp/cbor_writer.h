@@ -0,0 +1,154 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <vector>
+
+namespace asyncapi_gencpp {
+
+/**
+ * Appends CBOR (RFC 8949) directly to a caller owned buffer.
+ *
+ * The output matches nlohmann::json::to_cbor() for the same values: integers
+ * and lengths use the shortest encoding, floating point values are written as
+ * single precision when that is lossless, and an object without members is
+ * written as an empty map, as json::to_cbor() does for the toJson() of a struct
+ * without members present.
+ */
+class CborWriter {
+ public:
+  explicit CborWriter(std::vector<uint8_t>& out) : out_(out) {}
+
+  void beginObject(size_t size) {
+    writeHead(5, size);
+  }
+
+  void endObject() {}
+
+  void key(std::string_view name) {
+    value(name);
+  }
+
+  void beginArray(size_t size) {
+    writeHead(4, size);
+  }
+
+  void endArray() {}
+
+  void value(std::string_view value) {
+    writeHead(3, value.size());
+    out_.insert(out_.end(), value.begin(), value.end());
+  }
+
+  void value(const std::string& value) {
+    this->value(std::string_view(value));
+  }
+
+  void value(bool value) {
+    out_.push_back(value ? 0xF5 : 0xF4);
+  }
+
+  template <typename T>
+  std::enable_if_t<std::is_integral<T>::value && !std::is_same<T, bool>::value> value(T value) {
+    if (value >= 0) {
+      writeHead(0, static_cast<uint64_t>(value));
+    }
+    else {
+      writeHead(1, static_cast<uint64_t>(-1 - static_cast<int64_t>(value)));
+    }
+  }
+
+  template <typename T>
+  std::enable_if_t<std::is_floating_point<T>::value> value(T value) {
+    double number = static_cast<double>(value);
+    if (std::isnan(number)) {
+      out_.insert(out_.end(), {0xF9, 0x7E, 0x00});
+    }
+    else if (std::isinf(number)) {
+      out_.insert(out_.end(), {0xF9, static_cast<uint8_t>(number > 0 ? 0x7C : 0xFC), 0x00});
+    }
+    else if (number >= std::numeric_limits<float>::lowest() && number <= std::numeric_limits<float>::max() &&
+             static_cast<double>(static_cast<float>(number)) == number) {
+      float single = static_cast<float>(number);
+      uint32_t bits;
+      std::memcpy(&bits, &single, sizeof(bits));
+      out_.push_back(0xFA);
+      writeBigEndian(bits, 4);
+    }
+    else {
+      uint64_t bits;
+      std::memcpy(&bits, &number, sizeof(bits));
+      out_.push_back(0xFB);
+      writeBigEndian(bits, 8);
+    }
+  }
+
+ private:
+  void writeHead(uint8_t major, uint64_t argument) {
+    major = static_cast<uint8_t>(major << 5);
+    if (argument <= 0x17) {
+      out_.push_back(static_cast<uint8_t>(major | argument));
+    }
+    else if (argument <= 0xFF) {
+      out_.push_back(major | 0x18);
+      writeBigEndian(argument, 1);
+    }
+    else if (argument <= 0xFFFF) {
+      out_.push_back(major | 0x19);
+      writeBigEndian(argument, 2);
+    }
+    else if (argument <= 0xFFFFFFFF) {
+      out_.push_back(major | 0x1A);
+      writeBigEndian(argument, 4);
+    }
+    else {
+      out_.push_back(major | 0x1B);
+      writeBigEndian(argument, 8);
+    }
+  }
+
+  void writeBigEndian(uint64_t value, size_t bytes) {
+    for (size_t i = bytes; i > 0; i--) {
+      out_.push_back(static_cast<uint8_t>(value >> (8 * (i - 1))));
+    }
+  }
+
+  std::vector<uint8_t>& out_;
+};
+
+}  // namespace asyncapi_gencpp
@@ -0,0 +1,98 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <cstddef>
+#include <string>
+#include <string_view>
+
+namespace asyncapi_gencpp {
+
+/**
+ * Location and reason of the first failure of a validating decode.
+ *
+ * The path is a JSON pointer to the offending value.  It is only built while
+ * unwinding from a failure, so successful decodes never touch it.
+ */
+struct DecodeError {
+  std::string path;
+  std::string message;
+  size_t offset = 0;
+
+  /**
+   * Record the reason of a failure.  Like at(), always returns false so
+   * generated code can `return error.fail("reason", "key");`.
+   */
+  bool fail(std::string_view reason) {
+    message.assign(reason.data(), reason.size());
+    path.clear();
+    return false;
+  }
+
+  bool fail(std::string_view reason, std::string_view key) {
+    fail(reason);
+    return at(key);
+  }
+
+  bool fail(std::string_view reason, std::string_view key, size_t index) {
+    fail(reason);
+    return at(key, index);
+  }
+
+  /**
+   * Prepend an object key to the path.
+   */
+  bool at(std::string_view key) {
+    std::string segment = "/";
+    for (char c : key) {
+      if (c == '~') {
+        segment += "~0";
+      }
+      else if (c == '/') {
+        segment += "~1";
+      }
+      else {
+        segment += c;
+      }
+    }
+    path.insert(0, segment);
+    return false;
+  }
+
+  /**
+   * Prepend an object key and array index to the path.
+   */
+  bool at(std::string_view key, size_t index) {
+    path.insert(0, "/" + std::to_string(index));
+    return at(key);
+  }
+};
+
+}  // namespace asyncapi_gencpp
@@ -0,0 +1,114 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+
+#pragma once
+
+#include <array>
+#include <cstddef>
+#include <functional>
+#include <optional>
+#include <type_traits>
+#include <utility>
+#include <vector>
+
+namespace asyncapi_gencpp {
+
+namespace detail {
+
+template <typename T, typename = void>
+struct HasHashMember : std::false_type {};
+
+template <typename T>
+struct HasHashMember<T, std::void_t<decltype(std::declval<const T&>().hash())>> : std::true_type {};
+
+}  // namespace detail
+
+template <typename T>
+size_t hashValue(const T& value);
+
+template <typename T>
+size_t hashValue(const std::optional<T>& value);
+
+template <typename T, typename Allocator>
+size_t hashValue(const std::vector<T, Allocator>& values);
+
+template <typename T, size_t N>
+size_t hashValue(const std::array<T, N>& values);
+
+/**
+ * Mix the hash of a member of a struct into the hash of the struct.
+ *
+ * Generated structs hash their members with their own hash() function, other
+ * values with std::hash.  Optionals hash whether they hold a value and arrays
+ * their size, so that moving a value between members changes the hash.
+ */
+template <typename T>
+void hashCombine(size_t& seed, const T& value) {
+  seed ^= hashValue(value) + static_cast<size_t>(0x9e3779b97f4a7c15ULL) + (seed << 6) + (seed >> 2);
+}
+
+template <typename T>
+size_t hashValue(const T& value) {
+  if constexpr (detail::HasHashMember<T>::value) {
+    return value.hash();
+  }
+  else {
+    return std::hash<T>()(value);
+  }
+}
+
+template <typename T>
+size_t hashValue(const std::optional<T>& value) {
+  size_t seed = value.has_value();
+  if (value) {
+    hashCombine(seed, *value);
+  }
+  return seed;
+}
+
+template <typename T, typename Allocator>
+size_t hashValue(const std::vector<T, Allocator>& values) {
+  size_t seed = values.size();
+  for (const auto& value: values) {
+    hashCombine(seed, value);
+  }
+  return seed;
+}
+
+template <typename T, size_t N>
+size_t hashValue(const std::array<T, N>& values) {
+  size_t seed = N;
+  for (const auto& value: values) {
+    hashCombine(seed, value);
+  }
+  return seed;
+}
+
+}  // namespace asyncapi_gencpp
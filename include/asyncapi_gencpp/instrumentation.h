@@ -0,0 +1,254 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <atomic>
+#include <chrono>
+#include <cstddef>
+#include <cstdint>
+#include <string_view>
+#include <type_traits>
+
+// The bodies of the instrumented functions are lambdas, which are inlined into
+// them so that with NoHooks they compile to the same code as uninstrumented
+// functions.
+#if defined(__GNUC__) || defined(__clang__)
+#define ASYNCAPI_GENCPP_INLINE __attribute__((always_inline))
+#else
+#define ASYNCAPI_GENCPP_INLINE
+#endif
+
+namespace asyncapi_gencpp {
+
+/**
+ * Encode, decode and validation functions of the generated structs that report
+ * to the instrumentation hooks.
+ */
+enum class Operation : uint8_t {
+  FromJson,
+  ToJson,
+  Dump,
+  IsValid,
+};
+
+constexpr size_t OPERATION_COUNT = 4;
+
+inline std::string_view toString(Operation operation) {
+  switch (operation) {
+    case Operation::FromJson:
+      return "fromJson";
+    case Operation::ToJson:
+      return "toJson";
+    case Operation::Dump:
+      return "dump";
+    case Operation::IsValid:
+      return "isValid";
+  }
+  return "";
+}
+
+/**
+ * Hooks that record nothing, which instrumented code compiles down to the same
+ * code as uninstrumented code with.
+ *
+ * Other hooks provide a static member function template
+ *
+ *   template <typename T>
+ *   static void record(std::string_view type, Operation operation, size_t bytes,
+ *                      std::chrono::nanoseconds elapsed, bool success);
+ *
+ * that is called with the struct and its name, the number of bytes of JSON
+ * text decoded or encoded, or 0 for the operations on json documents, the time
+ * the operation took and whether it succeeded.
+ */
+struct NoHooks {};
+
+namespace detail {
+
+// Depth of the instrumented calls on this thread, so that only the outermost
+// call of an operation on a struct is recorded, rather than also the calls on
+// each of its members.
+inline int& probeDepth() {
+  static thread_local int depth = 0;
+  return depth;
+}
+
+}  // namespace detail
+
+/**
+ * Measure an operation on a struct of type T and report it to the hooks.
+ *
+ * An operation that returns without calling finish(), e.g. by throwing, is
+ * reported as a failure.
+ */
+template <typename Hooks, typename T>
+class Probe {
+ public:
+  using clock = std::chrono::steady_clock;
+
+  Probe(std::string_view type, Operation operation)
+      : type_(type), operation_(operation), outermost_(detail::probeDepth()++ == 0) {
+    if (outermost_) {
+      start_ = clock::now();
+    }
+  }
+
+  Probe(const Probe&) = delete;
+  Probe& operator=(const Probe&) = delete;
+
+  ~Probe() {
+    detail::probeDepth()--;
+    if (outermost_ && !finished_) {
+      report(0, false);
+    }
+  }
+
+  void finish(size_t bytes, bool success) {
+    finished_ = true;
+    if (outermost_) {
+      report(bytes, success);
+    }
+  }
+
+ private:
+  void report(size_t bytes, bool success) {
+    auto elapsed = std::chrono::duration_cast<std::chrono::nanoseconds>(clock::now() - start_);
+    Hooks::template record<T>(type_, operation_, bytes, elapsed, success);
+  }
+
+  std::string_view type_;
+  Operation operation_;
+  bool outermost_;
+  bool finished_ = false;
+  clock::time_point start_;
+};
+
+template <typename T>
+class Probe<NoHooks, T> {
+ public:
+  Probe(std::string_view, Operation) {}
+  void finish(size_t, bool) {}
+};
+
+/**
+ * Counters of the calls of an operation on a type.
+ */
+struct OperationCounters {
+  std::atomic<uint64_t> calls{0};
+  std::atomic<uint64_t> failures{0};
+  std::atomic<uint64_t> bytes{0};
+  std::atomic<uint64_t> nanoseconds{0};
+};
+
+/**
+ * Counters of the operations on a type.
+ *
+ * The counters of every type that was recorded are kept in a list that can be
+ * walked from first() at any time, e.g. to export them periodically.  Types are
+ * added to the front of the list with a compare and swap, and never removed.
+ */
+class TypeCounters {
+ public:
+  explicit TypeCounters(std::string_view type) : type_(type), next_(head().load(std::memory_order_relaxed)) {
+    while (!head().compare_exchange_weak(next_, this, std::memory_order_release, std::memory_order_relaxed)) {
+    }
+  }
+
+  TypeCounters(const TypeCounters&) = delete;
+  TypeCounters& operator=(const TypeCounters&) = delete;
+
+  std::string_view type() const {
+    return type_;
+  }
+
+  OperationCounters& operation(Operation operation) {
+    return operations_[static_cast<size_t>(operation)];
+  }
+
+  const OperationCounters& operation(Operation operation) const {
+    return operations_[static_cast<size_t>(operation)];
+  }
+
+  const TypeCounters* next() const {
+    return next_;
+  }
+
+  static const TypeCounters* first() {
+    return head().load(std::memory_order_acquire);
+  }
+
+ private:
+  static std::atomic<TypeCounters*>& head() {
+    static std::atomic<TypeCounters*> head{nullptr};
+    return head;
+  }
+
+  std::string_view type_;
+  TypeCounters* next_;
+  OperationCounters operations_[OPERATION_COUNT];
+};
+
+/**
+ * Hooks counting the calls, failures, bytes and nanoseconds of every operation
+ * on every type with relaxed atomic increments.
+ */
+struct CounterHooks {
+  template <typename T>
+  static TypeCounters& counters(std::string_view type) {
+    static TypeCounters counters(type);
+    return counters;
+  }
+
+  template <typename T>
+  static void record(std::string_view type, Operation operation, size_t bytes, std::chrono::nanoseconds elapsed,
+                     bool success) {
+    OperationCounters& counters = CounterHooks::counters<T>(type).operation(operation);
+    counters.calls.fetch_add(1, std::memory_order_relaxed);
+    if (!success) {
+      counters.failures.fetch_add(1, std::memory_order_relaxed);
+    }
+    counters.bytes.fetch_add(bytes, std::memory_order_relaxed);
+    counters.nanoseconds.fetch_add(static_cast<uint64_t>(elapsed.count()), std::memory_order_relaxed);
+  }
+};
+
+}  // namespace asyncapi_gencpp
+
+// The hooks of the instrumented structs, which can be set to other hooks along
+// with a header declaring them, e.g.
+//   -DASYNCAPI_GENCPP_HOOKS_HEADER="<my_hooks.h>" -DASYNCAPI_GENCPP_HOOKS=my::Hooks
+// The hooks must be the same in every translation unit of a program.
+#ifdef ASYNCAPI_GENCPP_HOOKS_HEADER
+#include ASYNCAPI_GENCPP_HOOKS_HEADER
+#endif
+
+#ifndef ASYNCAPI_GENCPP_HOOKS
+#define ASYNCAPI_GENCPP_HOOKS ::asyncapi_gencpp::NoHooks
+#endif
@@ -0,0 +1,61 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <cstdint>
+
+#include <nlohmann/json.hpp>
+
+#include <asyncapi_gencpp/number.h>
+
+namespace asyncapi_gencpp {
+
+/**
+ * Range checked conversion of a json number into an arithmetic value.
+ *
+ * Unlike json::get_to(), values that don't fit the type are rejected instead
+ * of silently wrapping or truncating, so it is used to decode members with a
+ * `format` such as int32 or uint8.
+ */
+template <typename T>
+bool getNumber(const nlohmann::json& j, T& value) {
+  if (j.is_number_unsigned()) {
+    return detail::storeUnsigned(j.get<uint64_t>(), value);
+  }
+  if (j.is_number_integer()) {
+    return detail::storeSigned(j.get<int64_t>(), value);
+  }
+  if (j.is_number_float()) {
+    return detail::storeFloat(j.get<double>(), value);
+  }
+  return false;
+}
+
+}  // namespace asyncapi_gencpp
@@ -0,0 +1,468 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#pragma once
+
+#include <charconv>
+#include <cstdint>
+#include <string>
+#include <string_view>
+#include <system_error>
+#include <type_traits>
+
+#include <asyncapi_gencpp/number.h>
+
+namespace asyncapi_gencpp {
+
+/**
+ * Single pass pull parser over a JSON text.
+ *
+ * The reader walks the input once and hands values straight to the caller, so
+ * generated code can decode into its members without building an intermediate
+ * document.  Once a call fails the reader stays in the failed state and every
+ * following call returns false.
+ */
+class JsonReader {
+ public:
+  explicit JsonReader(std::string_view input) : input_(input) {}
+
+  bool failed() const {
+    return failed_;
+  }
+
+  /**
+   * Byte offset of the reader in the input.
+   */
+  size_t position() const {
+    return pos_;
+  }
+
+  /**
+   * Consume the opening brace of an object.
+   */
+  bool beginObject() {
+    if (!consume('{')) {
+      return false;
+    }
+    first_ = true;
+    return true;
+  }
+
+  /**
+   * Read the next key of the current object.
+   *
+   * Returns false once the closing brace has been consumed or on error.  The
+   * key is only valid until the next call on the reader.
+   */
+  bool nextKey(std::string_view& key) {
+    if (failed_) {
+      return false;
+    }
+    skipWhitespace();
+    if (pos_ < input_.size() && input_[pos_] == '}') {
+      pos_++;
+      first_ = false;
+      return false;
+    }
+    if (!first_ && !consume(',')) {
+      return false;
+    }
+    first_ = false;
+    return readStringView(key) && consume(':');
+  }
+
+  /**
+   * Consume the opening bracket of an array.
+   */
+  bool beginArray() {
+    if (!consume('[')) {
+      return false;
+    }
+    first_ = true;
+    return true;
+  }
+
+  /**
+   * Advance to the next item of the current array.
+   *
+   * Returns false once the closing bracket has been consumed or on error.
+   */
+  bool nextItem() {
+    if (failed_) {
+      return false;
+    }
+    skipWhitespace();
+    if (pos_ < input_.size() && input_[pos_] == ']') {
+      pos_++;
+      first_ = false;
+      return false;
+    }
+    if (!first_ && !consume(',')) {
+      return false;
+    }
+    first_ = false;
+    return true;
+  }
+
+  /**
+   * Check whether the next value is null without consuming it.
+   */
+  bool isNull() {
+    skipWhitespace();
+    return !failed_ && input_.compare(pos_, 4, "null") == 0;
+  }
+
+  bool readNull() {
+    return consumeLiteral("null");
+  }
+
+  bool readBool(bool& value) {
+    skipWhitespace();
+    if (input_.compare(pos_, 4, "true") == 0) {
+      value = true;
+      return consumeLiteral("true");
+    }
+    value = false;
+    return consumeLiteral("false");
+  }
+
+  /**
+   * Read a string value, reusing the capacity of the output string.
+   *
+   * Any std::basic_string of char can be used, e.g. a std::pmr::string, whose
+   * memory resource is kept.
+   */
+  template <typename String>
+  bool readString(String& value) {
+    std::string_view view;
+    if (!readStringView(view)) {
+      return false;
+    }
+    value.assign(view.data(), view.size());
+    return true;
+  }
+
+  /**
+   * Read a string value without copying it.
+   *
+   * The view points into the input, or into a scratch buffer if the string
+   * contains escape sequences, and is only valid until the next call on the
+   * reader.
+   */
+  bool readStringView(std::string_view& value) {
+    if (!consume('"')) {
+      return false;
+    }
+    size_t start = pos_;
+    while (pos_ < input_.size()) {
+      char c = input_[pos_];
+      if (c == '"') {
+        value = input_.substr(start, pos_ - start);
+        pos_++;
+        return true;
+      }
+      if (c == '\\') {
+        return readEscapedString(start, value);
+      }
+      if (static_cast<unsigned char>(c) < 0x20) {
+        return fail();
+      }
+      pos_++;
+    }
+    return fail();
+  }
+
+  /**
+   * Read a number into an arithmetic value.
+   *
+   * Values that don't fit the type are rejected.  As with nlohmann::json,
+   * floating point values read into integral types are truncated.
+   */
+  template <typename T>
+  bool readNumber(T& value) {
+    static_assert(std::is_arithmetic<T>::value, "readNumber requires an arithmetic type");
+    skipWhitespace();
+    if (failed_) {
+      return false;
+    }
+    size_t end = pos_;
+    bool is_float = false;
+    while (end < input_.size()) {
+      char c = input_[end];
+      if (c == '.' || c == 'e' || c == 'E') {
+        is_float = true;
+      }
+      else if (!((c >= '0' && c <= '9') || c == '-' || c == '+')) {
+        break;
+      }
+      end++;
+    }
+    if (end == pos_) {
+      return fail();
+    }
+    const char* first = input_.data() + pos_;
+    const char* last = input_.data() + end;
+    std::from_chars_result result;
+    if (std::is_integral<T>::value && is_float) {
+      double number;
+      result = std::from_chars(first, last, number);
+      if (result.ec == std::errc() && !detail::storeFloat(number, value)) {
+        return fail();
+      }
+    }
+    else {
+      result = std::from_chars(first, last, value);
+    }
+    if (result.ec != std::errc() || result.ptr != last) {
+      return fail();
+    }
+    pos_ = end;
+    return true;
+  }
+
+  /**
+   * Read an array of exactly size numbers.
+   *
+   * A fast path for fixed size numeric arrays, which are decoded straight into
+   * the destination without the per item bookkeeping of nextItem().
+   */
+  template <typename T>
+  bool readNumberArray(T* values, size_t size) {
+    if (!consume('[')) {
+      return false;
+    }
+    for (size_t i = 0; i < size; i++) {
+      if ((i > 0 && !consume(',')) || !readNumber(values[i])) {
+        return fail();
+      }
+    }
+    return consume(']');
+  }
+
+  /**
+   * Skip over the next value, including any nested objects and arrays.
+   */
+  bool skipValue() {
+    skipWhitespace();
+    if (failed_ || pos_ >= input_.size()) {
+      return fail();
+    }
+    char c = input_[pos_];
+    if (c == '{') {
+      beginObject();
+      std::string_view key;
+      while (nextKey(key)) {
+        if (!skipValue()) {
+          return false;
+        }
+      }
+      return !failed_;
+    }
+    if (c == '[') {
+      beginArray();
+      while (nextItem()) {
+        if (!skipValue()) {
+          return false;
+        }
+      }
+      return !failed_;
+    }
+    if (c == '"') {
+      std::string_view value;
+      return readStringView(value);
+    }
+    if (c == 't' || c == 'f') {
+      bool value;
+      return readBool(value);
+    }
+    if (c == 'n') {
+      return readNull();
+    }
+    double value;
+    return readNumber(value);
+  }
+
+  /**
+   * Skip over the next value and return its JSON text without decoding it.
+   *
+   * The view points into the input.
+   */
+  bool readRaw(std::string_view& value) {
+    skipWhitespace();
+    size_t start = pos_;
+    if (!skipValue()) {
+      return false;
+    }
+    value = input_.substr(start, pos_ - start);
+    return true;
+  }
+
+  /**
+   * Check that nothing but whitespace follows the parsed value.
+   */
+  bool finish() {
+    skipWhitespace();
+    if (failed_ || pos_ != input_.size()) {
+      return fail();
+    }
+    return true;
+  }
+
+ private:
+  bool fail() {
+    failed_ = true;
+    return false;
+  }
+
+  void skipWhitespace() {
+    while (pos_ < input_.size()) {
+      char c = input_[pos_];
+      if (c != ' ' && c != '\t' && c != '\n' && c != '\r') {
+        break;
+      }
+      pos_++;
+    }
+  }
+
+  bool consume(char expected) {
+    skipWhitespace();
+    if (failed_ || pos_ >= input_.size() || input_[pos_] != expected) {
+      return fail();
+    }
+    pos_++;
+    return true;
+  }
+
+  bool consumeLiteral(std::string_view literal) {
+    skipWhitespace();
+    if (failed_ || input_.compare(pos_, literal.size(), literal) != 0) {
+      return fail();
+    }
+    pos_ += literal.size();
+    return true;
+  }
+
+  // Unescape the rest of a string that started at start into the scratch buffer.
+  bool readEscapedString(size_t start, std::string_view& value) {
+    scratch_.assign(input_.data() + start, pos_ - start);
+    while (pos_ < input_.size()) {
+      char c = input_[pos_++];
+      if (c == '"') {
+        value = scratch_;
+        return true;
+      }
+      if (static_cast<unsigned char>(c) < 0x20) {
+        return fail();
+      }
+      if (c != '\\') {
+        scratch_.push_back(c);
+        continue;
+      }
+      if (pos_ >= input_.size()) {
+        break;
+      }
+      c = input_[pos_++];
+      switch (c) {
+        case '"': scratch_.push_back('"'); break;
+        case '\\': scratch_.push_back('\\'); break;
+        case '/': scratch_.push_back('/'); break;
+        case 'b': scratch_.push_back('\b'); break;
+        case 'f': scratch_.push_back('\f'); break;
+        case 'n': scratch_.push_back('\n'); break;
+        case 'r': scratch_.push_back('\r'); break;
+        case 't': scratch_.push_back('\t'); break;
+        case 'u': {
+          uint32_t code_point;
+          if (!readHex(code_point)) {
+            return false;
+          }
+          if (code_point >= 0xD800 && code_point <= 0xDBFF) {
+            uint32_t low;
+            if (input_.compare(pos_, 2, "\\u") != 0) {
+              return fail();
+            }
+            pos_ += 2;
+            if (!readHex(low) || low < 0xDC00 || low > 0xDFFF) {
+              return fail();
+            }
+            code_point = 0x10000 + ((code_point - 0xD800) << 10) + (low - 0xDC00);
+          }
+          else if (code_point >= 0xDC00 && code_point <= 0xDFFF) {
+            return fail();
+          }
+          appendUtf8(code_point);
+          break;
+        }
+        default:
+          return fail();
+      }
+    }
+    return fail();
+  }
+
+  bool readHex(uint32_t& value) {
+    if (pos_ + 4 > input_.size()) {
+      return fail();
+    }
+    auto result = std::from_chars(input_.data() + pos_, input_.data() + pos_ + 4, value, 16);
+    if (result.ec != std::errc() || result.ptr != input_.data() + pos_ + 4) {
+      return fail();
+    }
+    pos_ += 4;
+    return true;
+  }
+
+  void appendUtf8(uint32_t code_point) {
+    if (code_point < 0x80) {
+      scratch_.push_back(static_cast<char>(code_point));
+    }
+    else if (code_point < 0x800) {
+      scratch_.push_back(static_cast<char>(0xC0 | (code_point >> 6)));
+      scratch_.push_back(static_cast<char>(0x80 | (code_point & 0x3F)));
+    }
+    else if (code_point < 0x10000) {
+      scratch_.push_back(static_cast<char>(0xE0 | (code_point >> 12)));
+      scratch_.push_back(static_cast<char>(0x80 | ((code_point >> 6) & 0x3F)));
+      scratch_.push_back(static_cast<char>(0x80 | (code_point & 0x3F)));
+    }
+    else {
+      scratch_.push_back(static_cast<char>(0xF0 | (code_point >> 18)));
+      scratch_.push_back(static_cast<char>(0x80 | ((code_point >> 12) & 0x3F)));
+      scratch_.push_back(static_cast<char>(0x80 | ((code_point >> 6) & 0x3F)));
+      scratch_.push_back(static_cast<char>(0x80 | (code_point & 0x3F)));
+    }
+  }
+
+  std::string_view input_;
+  size_t pos_ = 0;
+  bool first_ = true;
+  bool failed_ = false;
+  std::string scratch_;
+};
+
+}  // namespace asyncapi_gencpp
@@ -0,0 +1,213 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <cstddef>
+#include <iterator>
+#include <string>
+#include <string_view>
+#include <type_traits>
+
+#include <asyncapi_gencpp/json_reader.h>
+
+namespace asyncapi_gencpp {
+
+namespace detail {
+
+// Decode the next value of a reader into a member or item of a view.  Strings
+// are views that are only valid until the next call on the reader, and nested
+// views are constructed from the JSON text of their value.
+template <typename T>
+bool readViewValue(JsonReader& reader, T& value) {
+  if constexpr (std::is_same<T, bool>::value) {
+    return reader.readBool(value);
+  }
+  else if constexpr (std::is_arithmetic<T>::value) {
+    return reader.readNumber(value);
+  }
+  else if constexpr (std::is_same<T, std::string_view>::value) {
+    return reader.readStringView(value);
+  }
+  else if constexpr (std::is_enum<T>::value) {
+    std::string_view name;
+    return reader.readStringView(name) && fromString(name, value);
+  }
+  else {
+    std::string_view json;
+    if (!reader.readRaw(json)) {
+      return false;
+    }
+    value = T(json);
+    return value.valid();
+  }
+}
+
+}  // namespace detail
+
+/**
+ * Decode the JSON text of a number, boolean or enum value.
+ */
+template <typename T>
+bool viewValue(std::string_view json, T& value) {
+  JsonReader reader(json);
+  return detail::readViewValue(reader, value) && reader.finish();
+}
+
+/**
+ * Decode the JSON text of a string value.
+ *
+ * The view points into the JSON text unless the string contains escape
+ * sequences, in which case it is unescaped into the buffer.
+ */
+inline bool viewString(std::string_view json, std::string_view& value, std::string& buffer) {
+  if (json.size() >= 2 && json.front() == '"' && json.back() == '"' &&
+      json.find('\\') == std::string_view::npos) {
+    value = json.substr(1, json.size() - 2);
+    return true;
+  }
+  JsonReader reader(json);
+  if (!reader.readString(buffer) || !reader.finish()) {
+    return false;
+  }
+  value = buffer;
+  return true;
+}
+
+/**
+ * Lazily decoded items of a JSON array.
+ *
+ * Items are decoded one at a time as the array is iterated, and iteration
+ * stops at the first item that fails to decode.  String items are only valid
+ * until the iterator is advanced.
+ */
+template <typename T>
+class ArrayView {
+ public:
+  class iterator {
+   public:
+    using iterator_category = std::input_iterator_tag;
+    using value_type = T;
+    using difference_type = std::ptrdiff_t;
+    using pointer = const T*;
+    using reference = const T&;
+
+    iterator() = default;
+
+    explicit iterator(std::string_view json) : reader_(json), done_(false) {
+      if (!reader_.beginArray()) {
+        done_ = true;
+      }
+      next();
+    }
+
+    const T& operator*() const {
+      return value_;
+    }
+
+    const T* operator->() const {
+      return &value_;
+    }
+
+    iterator& operator++() {
+      next();
+      return *this;
+    }
+
+    bool operator==(const iterator& other) const {
+      return done_ && other.done_;
+    }
+
+    bool operator!=(const iterator& other) const {
+      return !(*this == other);
+    }
+
+   private:
+    void next() {
+      if (!done_ && (!reader_.nextItem() || !detail::readViewValue(reader_, value_))) {
+        done_ = true;
+      }
+    }
+
+    JsonReader reader_{std::string_view()};
+    T value_{};
+    bool done_ = true;
+  };
+
+  ArrayView() = default;
+
+  explicit ArrayView(std::string_view json) : json_(json) {}
+
+  /**
+   * Check that the JSON text is an array, without decoding its items.
+   */
+  bool valid() const {
+    size_t start = json_.find_first_not_of(" \t\n\r");
+    return start != std::string_view::npos && json_[start] == '[';
+  }
+
+  /**
+   * The JSON text of the array.
+   */
+  std::string_view raw() const {
+    return json_;
+  }
+
+  iterator begin() const {
+    return iterator(json_);
+  }
+
+  iterator end() const {
+    return iterator();
+  }
+
+  /**
+   * Count the items of the array, skipping over them without decoding them.
+   */
+  size_t size() const {
+    JsonReader reader(json_);
+    size_t count = 0;
+    if (!reader.beginArray()) {
+      return 0;
+    }
+    while (reader.nextItem() && reader.skipValue()) {
+      count++;
+    }
+    return count;
+  }
+
+  bool empty() const {
+    return begin() == end();
+  }
+
+ private:
+  std::string_view json_;
+};
+
+}  // namespace asyncapi_gencpp
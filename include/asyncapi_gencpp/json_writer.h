@@ -0,0 +1,174 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#pragma once
+
+#include <charconv>
+#include <cmath>
+#include <cstddef>
+#include <string>
+#include <string_view>
+#include <type_traits>
+
+#include <nlohmann/json.hpp>
+
+namespace asyncapi_gencpp {
+
+/**
+ * Appends JSON text directly to a caller owned string.
+ *
+ * The output matches nlohmann::json::dump() for the same values: numbers are
+ * formatted the same way, non-finite floating point values are written as null
+ * and strings are escaped the same way.  Strings are copied as is, without
+ * validating that they are UTF-8.
+ *
+ * Objects are written with the number of members that will follow.  An object
+ * without members is written as {}, as dump() does for the toJson() of a
+ * struct without members present.
+ */
+class JsonWriter {
+ public:
+  explicit JsonWriter(std::string& out) : out_(out) {}
+
+  void beginObject(size_t /* size */) {
+    separate();
+    out_.push_back('{');
+    need_comma_ = false;
+  }
+
+  void endObject() {
+    out_.push_back('}');
+    need_comma_ = true;
+  }
+
+  void key(std::string_view name) {
+    separate();
+    writeString(name);
+    out_.push_back(':');
+    need_comma_ = false;
+  }
+
+  void beginArray(size_t /* size */) {
+    separate();
+    out_.push_back('[');
+    need_comma_ = false;
+  }
+
+  void endArray() {
+    out_.push_back(']');
+    need_comma_ = true;
+  }
+
+  void value(std::string_view value) {
+    separate();
+    writeString(value);
+    need_comma_ = true;
+  }
+
+  void value(const std::string& value) {
+    this->value(std::string_view(value));
+  }
+
+  void value(bool value) {
+    separate();
+    if (value) {
+      out_.append("true", 4);
+    }
+    else {
+      out_.append("false", 5);
+    }
+    need_comma_ = true;
+  }
+
+  template <typename T>
+  std::enable_if_t<std::is_integral<T>::value && !std::is_same<T, bool>::value> value(T value) {
+    separate();
+    char buffer[24];
+    auto result = std::to_chars(buffer, buffer + sizeof(buffer), value);
+    out_.append(buffer, result.ptr - buffer);
+    need_comma_ = true;
+  }
+
+  template <typename T>
+  std::enable_if_t<std::is_floating_point<T>::value> value(T value) {
+    separate();
+    double number = static_cast<double>(value);
+    if (!std::isfinite(number)) {
+      out_.append("null", 4);
+    }
+    else {
+      char buffer[64];
+      char* end = nlohmann::detail::to_chars(buffer, buffer + sizeof(buffer), number);
+      out_.append(buffer, end - buffer);
+    }
+    need_comma_ = true;
+  }
+
+ private:
+  void separate() {
+    if (need_comma_) {
+      out_.push_back(',');
+    }
+  }
+
+  void writeString(std::string_view value) {
+    static const char* hex = "0123456789abcdef";
+    out_.push_back('"');
+    size_t start = 0;
+    for (size_t i = 0; i < value.size(); i++) {
+      unsigned char c = static_cast<unsigned char>(value[i]);
+      if (c >= 0x20 && c != '"' && c != '\\') {
+        continue;
+      }
+      out_.append(value.data() + start, i - start);
+      start = i + 1;
+      out_.push_back('\\');
+      switch (c) {
+        case '"': out_.push_back('"'); break;
+        case '\\': out_.push_back('\\'); break;
+        case '\b': out_.push_back('b'); break;
+        case '\f': out_.push_back('f'); break;
+        case '\n': out_.push_back('n'); break;
+        case '\r': out_.push_back('r'); break;
+        case '\t': out_.push_back('t'); break;
+        default:
+          out_.append("u00", 3);
+          out_.push_back(hex[c >> 4]);
+          out_.push_back(hex[c & 0xF]);
+          break;
+      }
+    }
+    out_.append(value.data() + start, value.size() - start);
+    out_.push_back('"');
+  }
+
+  std::string& out_;
+  bool need_comma_ = false;
+};
+
+}  // namespace asyncapi_gencpp
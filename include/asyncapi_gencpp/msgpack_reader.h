@@ -0,0 +1,384 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <string>
+#include <string_view>
+#include <vector>
+
+#include <asyncapi_gencpp/number.h>
+
+namespace asyncapi_gencpp {
+
+/**
+ * Single pass pull parser over MessagePack data.
+ *
+ * Provides the same interface as JsonReader, so the generated read() methods
+ * decode MessagePack straight into the struct members.  Strings are returned
+ * as views into the input.  Binary and extension values are only accepted
+ * where they are skipped.
+ */
+class MsgPackReader {
+ public:
+  MsgPackReader(const uint8_t* data, size_t size) : data_(data), size_(size) {}
+
+  bool failed() const {
+    return failed_;
+  }
+
+  /**
+   * Byte offset of the reader in the input.
+   */
+  size_t position() const {
+    return pos_;
+  }
+
+  bool beginObject() {
+    if (failed_ || pos_ >= size_) {
+      return fail();
+    }
+    uint8_t initial = data_[pos_++];
+    if ((initial & 0xF0) == 0x80) {
+      remaining_.push_back(initial & 0x0F);
+      return true;
+    }
+    if (initial == 0xDE || initial == 0xDF) {
+      return beginContainer(initial == 0xDE ? 2 : 4);
+    }
+    return fail();
+  }
+
+  /**
+   * Read the next key of the current map.
+   *
+   * Returns false once the map is exhausted or on error.
+   */
+  bool nextKey(std::string_view& key) {
+    return nextEntry() && readStringView(key);
+  }
+
+  bool beginArray() {
+    if (failed_ || pos_ >= size_) {
+      return fail();
+    }
+    uint8_t initial = data_[pos_++];
+    if ((initial & 0xF0) == 0x90) {
+      remaining_.push_back(initial & 0x0F);
+      return true;
+    }
+    if (initial == 0xDC || initial == 0xDD) {
+      return beginContainer(initial == 0xDC ? 2 : 4);
+    }
+    return fail();
+  }
+
+  /**
+   * Advance to the next item of the current array.
+   *
+   * Returns false once the array is exhausted or on error.
+   */
+  bool nextItem() {
+    return nextEntry();
+  }
+
+  /**
+   * Check whether the next value is nil without consuming it.
+   */
+  bool isNull() {
+    return !failed_ && pos_ < size_ && data_[pos_] == 0xC0;
+  }
+
+  bool readNull() {
+    if (!isNull()) {
+      return fail();
+    }
+    pos_++;
+    return true;
+  }
+
+  bool readBool(bool& value) {
+    if (failed_ || pos_ >= size_ || (data_[pos_] != 0xC2 && data_[pos_] != 0xC3)) {
+      return fail();
+    }
+    value = data_[pos_++] == 0xC3;
+    return true;
+  }
+
+  /**
+   * Read a string, reusing the capacity of the output string.
+   *
+   * Any std::basic_string of char can be used, e.g. a std::pmr::string, whose
+   * memory resource is kept.
+   */
+  template <typename String>
+  bool readString(String& value) {
+    std::string_view view;
+    if (!readStringView(view)) {
+      return false;
+    }
+    value.assign(view.data(), view.size());
+    return true;
+  }
+
+  /**
+   * Read a string without copying it.  The view points into the input.
+   */
+  bool readStringView(std::string_view& value) {
+    if (failed_ || pos_ >= size_) {
+      return fail();
+    }
+    uint8_t initial = data_[pos_++];
+    uint64_t length;
+    if ((initial & 0xE0) == 0xA0) {
+      length = initial & 0x1F;
+    }
+    else if (initial >= 0xD9 && initial <= 0xDB) {
+      if (!readLength(size_t(1) << (initial - 0xD9), length)) {
+        return false;
+      }
+    }
+    else {
+      return fail();
+    }
+    if (length > size_ - pos_) {
+      return fail();
+    }
+    value = std::string_view(reinterpret_cast<const char*>(data_ + pos_), length);
+    pos_ += length;
+    return true;
+  }
+
+  /**
+   * Read an integer or floating point value into an arithmetic value.
+   */
+  template <typename T>
+  bool readNumber(T& value) {
+    if (failed_ || pos_ >= size_) {
+      return fail();
+    }
+    uint8_t initial = data_[pos_++];
+    if (initial <= 0x7F) {
+      return detail::storeUnsigned(initial, value) || fail();
+    }
+    if (initial >= 0xE0) {
+      return detail::storeSigned(static_cast<int8_t>(initial), value) || fail();
+    }
+    uint64_t bits;
+    if (initial == 0xCA) {
+      if (!readLength(4, bits)) {
+        return false;
+      }
+      float single;
+      uint32_t bits32 = static_cast<uint32_t>(bits);
+      std::memcpy(&single, &bits32, sizeof(single));
+      return detail::storeFloat(single, value) || fail();
+    }
+    if (initial == 0xCB) {
+      if (!readLength(8, bits)) {
+        return false;
+      }
+      double number;
+      std::memcpy(&number, &bits, sizeof(number));
+      return detail::storeFloat(number, value) || fail();
+    }
+    if (initial >= 0xCC && initial <= 0xCF) {
+      return readLength(size_t(1) << (initial - 0xCC), bits) && (detail::storeUnsigned(bits, value) || fail());
+    }
+    if (initial >= 0xD0 && initial <= 0xD3) {
+      size_t bytes = size_t(1) << (initial - 0xD0);
+      if (!readLength(bytes, bits)) {
+        return false;
+      }
+      // Sign extend the big endian two's complement value.
+      if (bytes < 8 && (bits >> (8 * bytes - 1)) != 0) {
+        bits |= ~uint64_t(0) << (8 * bytes);
+      }
+      return detail::storeSigned(static_cast<int64_t>(bits), value) || fail();
+    }
+    return fail();
+  }
+
+  /**
+   * Read an array of exactly size numbers.
+   *
+   * A fast path for fixed size numeric arrays, which are decoded straight into
+   * the destination without the per item bookkeeping of nextItem().
+   */
+  template <typename T>
+  bool readNumberArray(T* values, size_t size) {
+    if (!beginArray()) {
+      return false;
+    }
+    uint64_t count = remaining_.back();
+    remaining_.pop_back();
+    if (count != size) {
+      return fail();
+    }
+    for (size_t i = 0; i < size; i++) {
+      if (!readNumber(values[i])) {
+        return false;
+      }
+    }
+    return true;
+  }
+
+  /**
+   * Skip over the next value, including any nested arrays and maps.
+   */
+  bool skipValue() {
+    if (failed_ || pos_ >= size_) {
+      return fail();
+    }
+    uint8_t initial = data_[pos_++];
+    uint64_t length = 0;
+    uint64_t values = 0;
+    if (initial <= 0x7F || initial >= 0xE0 || initial == 0xC0 || initial == 0xC2 || initial == 0xC3) {
+      return true;
+    }
+    if ((initial & 0xF0) == 0x80) {
+      values = 2 * static_cast<uint64_t>(initial & 0x0F);
+    }
+    else if ((initial & 0xF0) == 0x90) {
+      values = initial & 0x0F;
+    }
+    else if ((initial & 0xE0) == 0xA0) {
+      length = initial & 0x1F;
+    }
+    else if (initial >= 0xC4 && initial <= 0xC6) {
+      // bin 8, 16 and 32
+      if (!readLength(size_t(1) << (initial - 0xC4), length)) {
+        return false;
+      }
+    }
+    else if (initial >= 0xC7 && initial <= 0xC9) {
+      // ext 8, 16 and 32 followed by the type byte
+      if (!readLength(size_t(1) << (initial - 0xC7), length)) {
+        return false;
+      }
+      length++;
+    }
+    else if (initial == 0xCA || initial == 0xCB) {
+      length = initial == 0xCA ? 4 : 8;
+    }
+    else if (initial >= 0xCC && initial <= 0xD3) {
+      length = uint64_t(1) << ((initial - 0xCC) & 0x03);
+    }
+    else if (initial >= 0xD4 && initial <= 0xD8) {
+      // fixext 1, 2, 4, 8 and 16 followed by the type byte
+      length = (uint64_t(1) << (initial - 0xD4)) + 1;
+    }
+    else if (initial >= 0xD9 && initial <= 0xDB) {
+      if (!readLength(size_t(1) << (initial - 0xD9), length)) {
+        return false;
+      }
+    }
+    else if (initial == 0xDC || initial == 0xDD) {
+      if (!readLength(initial == 0xDC ? 2 : 4, values)) {
+        return false;
+      }
+    }
+    else if (initial == 0xDE || initial == 0xDF) {
+      if (!readLength(initial == 0xDE ? 2 : 4, values)) {
+        return false;
+      }
+      values *= 2;
+    }
+    else {
+      return fail();
+    }
+    if (length > size_ - pos_) {
+      return fail();
+    }
+    pos_ += length;
+    for (uint64_t i = 0; i < values; i++) {
+      if (!skipValue()) {
+        return false;
+      }
+    }
+    return true;
+  }
+
+  /**
+   * Check that the whole input has been consumed.
+   */
+  bool finish() {
+    if (failed_ || pos_ != size_) {
+      return fail();
+    }
+    return true;
+  }
+
+ private:
+  bool fail() {
+    failed_ = true;
+    return false;
+  }
+
+  bool readLength(size_t bytes, uint64_t& value) {
+    if (bytes > size_ - pos_) {
+      return fail();
+    }
+    value = detail::loadBigEndian(data_ + pos_, bytes);
+    pos_ += bytes;
+    return true;
+  }
+
+  bool beginContainer(size_t bytes) {
+    uint64_t size;
+    if (!readLength(bytes, size)) {
+      return false;
+    }
+    remaining_.push_back(size);
+    return true;
+  }
+
+  bool nextEntry() {
+    if (failed_ || remaining_.empty()) {
+      return fail();
+    }
+    if (remaining_.back() == 0) {
+      remaining_.pop_back();
+      return false;
+    }
+    remaining_.back()--;
+    return true;
+  }
+
+  const uint8_t* data_;
+  size_t size_;
+  size_t pos_ = 0;
+  bool failed_ = false;
+  std::vector<uint64_t> remaining_;
+};
+
+}  // namespace asyncapi_gencpp
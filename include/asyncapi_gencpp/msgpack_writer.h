@@ -0,0 +1,196 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <string>
+#include <string_view>
+#include <type_traits>
+#include <vector>
+
+namespace asyncapi_gencpp {
+
+/**
+ * Appends MessagePack directly to a caller owned buffer.
+ *
+ * The output matches nlohmann::json::to_msgpack() for the same values:
+ * integers and lengths use the shortest encoding, floating point values are
+ * written as float 32 when that is lossless, and an object without members is
+ * written as an empty map, as json::to_msgpack() does for the toJson() of a
+ * struct without members present.
+ */
+class MsgPackWriter {
+ public:
+  explicit MsgPackWriter(std::vector<uint8_t>& out) : out_(out) {}
+
+  void beginObject(size_t size) {
+    if (size <= 15) {
+      out_.push_back(static_cast<uint8_t>(0x80 | size));
+    }
+    else if (size <= 0xFFFF) {
+      out_.push_back(0xDE);
+      writeBigEndian(size, 2);
+    }
+    else {
+      out_.push_back(0xDF);
+      writeBigEndian(size, 4);
+    }
+  }
+
+  void endObject() {}
+
+  void key(std::string_view name) {
+    value(name);
+  }
+
+  void beginArray(size_t size) {
+    if (size <= 15) {
+      out_.push_back(static_cast<uint8_t>(0x90 | size));
+    }
+    else if (size <= 0xFFFF) {
+      out_.push_back(0xDC);
+      writeBigEndian(size, 2);
+    }
+    else {
+      out_.push_back(0xDD);
+      writeBigEndian(size, 4);
+    }
+  }
+
+  void endArray() {}
+
+  void value(std::string_view value) {
+    size_t size = value.size();
+    if (size <= 31) {
+      out_.push_back(static_cast<uint8_t>(0xA0 | size));
+    }
+    else if (size <= 0xFF) {
+      out_.push_back(0xD9);
+      writeBigEndian(size, 1);
+    }
+    else if (size <= 0xFFFF) {
+      out_.push_back(0xDA);
+      writeBigEndian(size, 2);
+    }
+    else {
+      out_.push_back(0xDB);
+      writeBigEndian(size, 4);
+    }
+    out_.insert(out_.end(), value.begin(), value.end());
+  }
+
+  void value(const std::string& value) {
+    this->value(std::string_view(value));
+  }
+
+  void value(bool value) {
+    out_.push_back(value ? 0xC3 : 0xC2);
+  }
+
+  template <typename T>
+  std::enable_if_t<std::is_integral<T>::value && !std::is_same<T, bool>::value> value(T value) {
+    if (value >= 0) {
+      uint64_t number = static_cast<uint64_t>(value);
+      if (number < 128) {
+        out_.push_back(static_cast<uint8_t>(number));
+      }
+      else if (number <= 0xFF) {
+        out_.push_back(0xCC);
+        writeBigEndian(number, 1);
+      }
+      else if (number <= 0xFFFF) {
+        out_.push_back(0xCD);
+        writeBigEndian(number, 2);
+      }
+      else if (number <= 0xFFFFFFFF) {
+        out_.push_back(0xCE);
+        writeBigEndian(number, 4);
+      }
+      else {
+        out_.push_back(0xCF);
+        writeBigEndian(number, 8);
+      }
+      return;
+    }
+    int64_t number = static_cast<int64_t>(value);
+    if (number >= -32) {
+      out_.push_back(static_cast<uint8_t>(number));
+    }
+    else if (number >= std::numeric_limits<int8_t>::min()) {
+      out_.push_back(0xD0);
+      writeBigEndian(static_cast<uint64_t>(number), 1);
+    }
+    else if (number >= std::numeric_limits<int16_t>::min()) {
+      out_.push_back(0xD1);
+      writeBigEndian(static_cast<uint64_t>(number), 2);
+    }
+    else if (number >= std::numeric_limits<int32_t>::min()) {
+      out_.push_back(0xD2);
+      writeBigEndian(static_cast<uint64_t>(number), 4);
+    }
+    else {
+      out_.push_back(0xD3);
+      writeBigEndian(static_cast<uint64_t>(number), 8);
+    }
+  }
+
+  template <typename T>
+  std::enable_if_t<std::is_floating_point<T>::value> value(T value) {
+    double number = static_cast<double>(value);
+    if (number >= std::numeric_limits<float>::lowest() && number <= std::numeric_limits<float>::max() &&
+        static_cast<double>(static_cast<float>(number)) == number) {
+      float single = static_cast<float>(number);
+      uint32_t bits;
+      std::memcpy(&bits, &single, sizeof(bits));
+      out_.push_back(0xCA);
+      writeBigEndian(bits, 4);
+    }
+    else {
+      uint64_t bits;
+      std::memcpy(&bits, &number, sizeof(bits));
+      out_.push_back(0xCB);
+      writeBigEndian(bits, 8);
+    }
+  }
+
+ private:
+  void writeBigEndian(uint64_t value, size_t bytes) {
+    for (size_t i = bytes; i > 0; i--) {
+      out_.push_back(static_cast<uint8_t>(value >> (8 * (i - 1))));
+    }
+  }
+
+  std::vector<uint8_t>& out_;
+};
+
+}  // namespace asyncapi_gencpp
@@ -0,0 +1,105 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#pragma once
+
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <limits>
+#include <type_traits>
+
+namespace asyncapi_gencpp {
+namespace detail {
+
+// Range checked conversions from decoded integer and floating point values
+// into the arithmetic member types of the generated structs.  Values that
+// don't fit the member type are rejected, and as with nlohmann::json floating
+// point values read into integral types are truncated.
+
+template <typename T>
+bool storeUnsigned(uint64_t number, T& value) {
+  static_assert(std::is_arithmetic<T>::value, "readNumber requires an arithmetic type");
+  if constexpr (std::is_integral<T>::value) {
+    if (number > static_cast<uint64_t>(std::numeric_limits<T>::max())) {
+      return false;
+    }
+  }
+  value = static_cast<T>(number);
+  return true;
+}
+
+template <typename T>
+bool storeSigned(int64_t number, T& value) {
+  if (number >= 0) {
+    return storeUnsigned(static_cast<uint64_t>(number), value);
+  }
+  static_assert(std::is_arithmetic<T>::value, "readNumber requires an arithmetic type");
+  if constexpr (std::is_unsigned<T>::value) {
+    return false;
+  }
+  else if constexpr (std::is_integral<T>::value) {
+    if (number < static_cast<int64_t>(std::numeric_limits<T>::min())) {
+      return false;
+    }
+  }
+  value = static_cast<T>(number);
+  return true;
+}
+
+template <typename T>
+bool storeFloat(double number, T& value) {
+  static_assert(std::is_arithmetic<T>::value, "readNumber requires an arithmetic type");
+  if constexpr (std::is_integral<T>::value) {
+    // max() + 1 is a power of two, so it is exact as a double
+    double upper = static_cast<double>(std::numeric_limits<T>::max()) + 1.0;
+    double lower = static_cast<double>(std::numeric_limits<T>::min());
+    if (std::isnan(number) || number >= upper || std::trunc(number) < lower) {
+      return false;
+    }
+  }
+  else if constexpr (sizeof(T) < sizeof(double)) {
+    if (std::isfinite(number) && std::fabs(number) > static_cast<double>(std::numeric_limits<T>::max())) {
+      return false;
+    }
+  }
+  value = static_cast<T>(number);
+  return true;
+}
+
+inline uint64_t loadBigEndian(const uint8_t* data, size_t bytes) {
+  uint64_t value = 0;
+  for (size_t i = 0; i < bytes; i++) {
+    value = (value << 8) | data[i];
+  }
+  return value;
+}
+
+}  // namespace detail
+}  // namespace asyncapi_gencpp
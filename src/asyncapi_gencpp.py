@@ -29,16 +29,57 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import hashlib
+import json
+import math
 import os
-from re import sub
+from re import match, sub
 import sys
 import textwrap
+import time
 import yaml
 
-typedefs = {}
-components = {}
-
-
+# C++ types of the integer and number formats, e.g. `format: int64`.
+INTEGER_FORMATS = {
+    "int8": "int8_t",
+    "int16": "int16_t",
+    "int32": "int32_t",
+    "int64": "int64_t",
+    "uint8": "uint8_t",
+    "uint16": "uint16_t",
+    "uint32": "uint32_t",
+    "uint64": "uint64_t",
+}
+NUMBER_FORMATS = {
+    "float": "float",
+    "double": "double",
+}
+FORMAT_TYPES = tuple(INTEGER_FORMATS.values()) + ("float",)
+INTEGER_RANGES = {
+    "int": (-2 ** 31, 2 ** 31 - 1),
+    "int8_t": (-2 ** 7, 2 ** 7 - 1),
+    "int16_t": (-2 ** 15, 2 ** 15 - 1),
+    "int32_t": (-2 ** 31, 2 ** 31 - 1),
+    "int64_t": (-2 ** 63, 2 ** 63 - 1),
+    "uint8_t": (0, 2 ** 8 - 1),
+    "uint16_t": (0, 2 ** 16 - 1),
+    "uint32_t": (0, 2 ** 32 - 1),
+    "uint64_t": (0, 2 ** 64 - 1),
+}
+
+NUMERIC_TYPES = ("int", "double") + FORMAT_TYPES
+PRIMITIVE_TYPES = ("std::string", "int", "double", "bool") + FORMAT_TYPES
+
+SAMPLE_DEPTH = 4
+
+MANIFEST_NAME = ".asyncapi_gencpp.json"
+MANIFEST_VERSION = 1
+SPEC_CACHE_VERSION = 1
+
+
+@lru_cache(maxsize=None)
 def upper_camel(name):
     name = sub(r"(_|-)+", " ", name)
     words = name.split(" ")
@@ -53,73 +94,56 @@ def snake_case(name):
     return name.lower()
 
 
-def resolve_type(name):
-    resolved = name
-    while resolved in typedefs.keys():
-        resolved = typedefs[resolved]
-    return resolved
-
-
-def resolve_definition(name, definition):
-    resolved = name
-    resolved_definition = definition
-
-    if resolved in components.keys():
-        resolved_definition = components[resolved]
-
-    while resolved in typedefs.keys():
-        resolved = typedefs[resolved]
-        if resolved in components.keys():
-            resolved_definition = components[resolved]
-
-    return resolved_definition
-
-
-def get_property_type(name, definition):
-    cpp_type = None
-    item_type = None
-
-    if "type" not in definition:
-        if "$ref" not in definition:
-            return None, None
-        cpp_type = upper_camel(definition["$ref"].split("/")[-1])
-    if cpp_type is None:
-        prop_type = definition["type"]
-        if prop_type == "string":
-            cpp_type = "std::string"
-        elif prop_type == "integer":
-            cpp_type = "int"
-        elif prop_type == "number":
-            cpp_type = "double"
-        elif prop_type == "boolean":
-            cpp_type = "bool"
-        elif prop_type == "array":
-            if "items" not in definition:
-                return None, None
-            if "$ref" in definition["items"]:
-                item_type = upper_camel(definition["items"]["$ref"].split("/")[-1])
-            elif "type" in definition["items"]:
-                if definition["items"]["type"] == "string":
-                    item_type = "std::string"
-                elif definition["items"]["type"] == "integer":
-                    item_type = "int"
-                elif definition["items"]["type"] == "integer":
-                    item_type = "int"
-                elif definition["items"]["type"] == "boolean":
-                    item_type = "bool"
-                elif definition["items"]["type"] == "object":
-                    item_type = upper_camel(name) + "Item"
-            if item_type is None:
-                return None, None
-            cpp_type = "std::vector<{}>".format(item_type)
-        elif prop_type == "object":
-            cpp_type = upper_camel(name)
-
-    return cpp_type, item_type
-
-
-def init_typedefs(name, definition):
-    class_name = upper_camel(name)
+# Optional features of the generated code.
+class GeneratorOptions:
+    def __init__(self, streaming=False, serializer=False, enum_classes=False, validate=False, binary=False,
+                 out_of_line=False, views=False, pmr=False, dedupe=False, instrument=False, delta=False,
+                 benchmark=False):
+        self.streaming = streaming
+        self.serializer = serializer
+        self.enum_classes = enum_classes
+        self.validate = validate
+        self.binary = binary
+        self.out_of_line = out_of_line
+        self.views = views
+        self.pmr = pmr
+        self.dedupe = dedupe
+        self.instrument = instrument
+        self.delta = delta
+        self.benchmark = benchmark
+
+
+def enum_values(definition):
+    if definition is None or definition.get("type") != "string" or "enum" not in definition:
+        return None
+    values = definition["enum"]
+    if len(values) == 0 or not all(isinstance(value, str) for value in values):
+        return None
+    return values
+
+
+def schema_enum(definition):
+    if "schema" in definition:
+        return enum_values(definition["schema"])
+    return enum_values(definition)
+
+
+# The C++ type of a string, integer, number or boolean schema.  Integers and
+# numbers use the narrowest type for their format, if they have one.
+def primitive_type(definition):
+    schema_type = definition.get("type")
+    if schema_type == "string":
+        return "std::string"
+    if schema_type == "integer":
+        return INTEGER_FORMATS.get(definition.get("format"), "int")
+    if schema_type == "number":
+        return NUMBER_FORMATS.get(definition.get("format"), "double")
+    if schema_type == "boolean":
+        return "bool"
+    return None
+
+
+def schema_typedef(definition):
     base_type = None
     typedef = None
     if "schema" in definition:
@@ -130,28 +154,315 @@ def init_typedefs(name, definition):
     if typedef is None and base_type is None and "type" in definition:
         base_type = definition
     if base_type is not None:
-        if base_type["type"] == "string":
-            typedef = "std::string"
-        elif base_type["type"] == "integer":
-            typedef = "int"
-        elif base_type["type"] == "number":
-            typedef = "double"
-        elif base_type["type"] == "boolean":
-            typedef = "bool"
-        elif base_type["type"] == "array":
-            # TODO
-            pass
-    if typedef is not None:
-        typedefs[class_name] = typedef
+        typedef = primitive_type(base_type)
+    return typedef
+
 
+class TypeCycleError(ValueError):
+    pass
 
-def build_object(name, definition, prefix, all_required=False):
+
+class RefError(ValueError):
+    pass
+
+
+# Keys that document a schema without changing the generated code.
+DOC_KEYS = ("description", "title", "summary", "example", "examples", "$comment")
+
+
+# The definition of an object with the keys that don't change the generated
+# code left out, recursing into its properties and items.
+def canonical_shape(definition):
+    if not isinstance(definition, dict):
+        return definition
+    shape = {}
+    for key, value in definition.items():
+        if key in DOC_KEYS:
+            continue
+        if key == "properties" and isinstance(value, dict):
+            value = {name: canonical_shape(prop_def) for name, prop_def in value.items()}
+        elif key == "items":
+            value = canonical_shape(value)
+        elif key == "required" and isinstance(value, list):
+            value = sorted(value, key=str)
+        shape[key] = value
+    return shape
+
+
+def shape_hash(definition):
+    content = json.dumps(canonical_shape(definition), sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+# The object definition a struct is generated from for a schema, along with
+# whether all of its properties are required, or None for typedefs and enums.
+def schema_object(definition, symbols, class_name):
+    if class_name in symbols.typedefs or symbols.is_enum(class_name):
+        return None, False
+    base_type = None
+    if "schema" in definition and "type" in definition["schema"]:
+        base_type = definition["schema"]
+    elif "type" in definition:
+        base_type = definition
+    if base_type is not None and base_type["type"] == "object":
+        return base_type, False
+    return {"properties": definition}, True
+
+
+# The inline object properties and object array items of an object definition,
+# along with the name of the nested struct generated for them.
+def inline_objects(definition):
+    properties = definition.get("properties")
+    if not isinstance(properties, dict):
+        return
+    for prop_name, prop_def in properties.items():
+        if not isinstance(prop_def, dict):
+            continue
+        if prop_def.get("type") == "object":
+            yield prop_def, upper_camel(prop_name)
+        elif prop_def.get("type") == "array" and isinstance(prop_def.get("items"), dict):
+            items = prop_def["items"]
+            if "$ref" not in items and items.get("type") == "object":
+                yield items, upper_camel(prop_name) + "Item"
+
+
+# Type aliases and schema definitions of a single specification.  All alias
+# chains are resolved once when the table is built, and the table is not
+# modified afterwards, so it can be shared between generator processes.
+class SymbolTable:
+    def __init__(self, schemas, options=None):
+        if options is None:
+            options = GeneratorOptions()
+        self.typedefs = {}
+        self.components = {}
+        self.enums = {}
+        for name, definition in schemas.items():
+            class_name = upper_camel(name)
+            self.components[class_name] = definition
+            values = None
+            if options.enum_classes:
+                values = schema_enum(definition)
+            if values is not None:
+                self.enums[class_name] = values
+                continue
+            typedef = schema_typedef(definition)
+            if typedef is not None:
+                self.typedefs[class_name] = typedef
+
+        self.types = {}
+        self.definitions = {}
+        for name in list(self.components.keys()) + list(self.typedefs.keys()):
+            self._resolve(name)
+
+        self.shapes = {}
+        self.shared = {}
+        if options.dedupe:
+            self._share_shapes(schemas)
+
+    def _resolve(self, name):
+        chain = []
+        resolved = name
+        while resolved not in self.types and resolved in self.typedefs:
+            if resolved in chain:
+                cycle = chain[chain.index(resolved):] + [resolved]
+                raise TypeCycleError("Type alias cycle detected: {}".format(" -> ".join(cycle)))
+            chain.append(resolved)
+            resolved = self.typedefs[resolved]
+
+        if resolved in self.types:
+            resolved_type = self.types[resolved]
+            resolved_definition = self.definitions[resolved]
+        else:
+            resolved_type = resolved
+            resolved_definition = self.components.get(resolved)
+            self.types[resolved] = resolved_type
+            self.definitions[resolved] = resolved_definition
+
+        # the definition of the last schema in the chain wins
+        for alias in reversed(chain):
+            if resolved_definition is None:
+                resolved_definition = self.components.get(alias)
+            self.types[alias] = resolved_type
+            self.definitions[alias] = resolved_definition
+
+    def resolve_type(self, name):
+        return self.types.get(name, name)
+
+    def resolve_definition(self, name, definition):
+        resolved_definition = self.definitions.get(name)
+        if resolved_definition is None:
+            return definition
+        return resolved_definition
+
+    def is_enum(self, name):
+        return name in self.enums
+
+    # Find the inline objects that have the same shape as a component schema,
+    # or as another inline object, so that a single struct is generated for
+    # each shape.  Repeated inline shapes get a generated schema named after
+    # their first occurrence, e.g. PoseOrientation.  Only the first occurrence
+    # of a shape is searched for further inline objects, since the others
+    # aren't generated.
+    def _share_shapes(self, schemas):
+        objects = []
+        first = {}
+        counts = {}
+        for name, definition in schemas.items():
+            class_name = upper_camel(name)
+            base_type, all_required = schema_object(definition, self, class_name)
+            if base_type is not None:
+                objects.append((class_name, base_type))
+                if not all_required:
+                    first.setdefault(shape_hash(base_type), (class_name, None))
+
+        def visit(definition, scope):
+            for inline, struct_name in inline_objects(definition):
+                key = shape_hash(inline)
+                counts[key] = counts.get(key, 0) + 1
+                if key not in first:
+                    first[key] = (scope + struct_name, inline)
+                    visit(inline, scope + struct_name)
+
+        for class_name, base_type in objects:
+            visit(base_type, class_name)
+
+        taken = set(self.components.keys())
+        for key, (shared_name, definition) in first.items():
+            if definition is None:
+                self.shapes[key] = shared_name
+            elif counts[key] > 1:
+                name = shared_name
+                suffix = 2
+                while name in taken:
+                    name = "{}{}".format(shared_name, suffix)
+                    suffix = suffix + 1
+                taken.add(name)
+                self.shapes[key] = name
+                self.shared[name] = definition
+
+    # The struct generated for an inline object definition, if it is shared.
+    def shared_type(self, definition):
+        if len(self.shapes) == 0:
+            return None
+        return self.shapes.get(shape_hash(definition))
+
+
+# A member of a generated struct along with its resolved type and the schema
+# definitions holding its constraints.
+class Property:
+    def __init__(self, name, definition, cpp_type, item_type, required, symbols):
+        self.name = name
+        self.member = snake_case(name)
+        self.required = required
+        self.definition = symbols.resolve_definition(cpp_type, definition)
+        self.type = symbols.resolve_type(cpp_type)
+        self.enum = symbols.is_enum(self.type)
+        self.item_type = None
+        self.item_definition = None
+        self.item_enum = False
+        self.fixed_size = None
+        self.std_array = False
+        self.uses_allocator = False
+        if item_type is not None:
+            self.item_definition = symbols.resolve_definition(item_type, self.definition["items"])
+            self.item_type = symbols.resolve_type(item_type)
+            self.item_enum = symbols.is_enum(self.item_type)
+            if required:
+                self.fixed_size = fixed_size(self.definition)
+
+
+# The length of an array whose minItems and maxItems are equal.  Only required
+# arrays are generated as std::array, optional ones need to be able to be empty.
+def fixed_size(definition):
+    size = definition.get("minItems")
+    if isinstance(size, int) and size > 0 and definition.get("maxItems") == size:
+        return size
+    return None
+
+
+# Whether a member of a type takes the allocator of its struct in --pmr mode,
+# which strings, vectors and the generated structs do.
+def uses_allocator(cpp_type, enum):
+    if enum or cpp_type.startswith("std::array<"):
+        return False
+    return cpp_type == "std::string" or cpp_type not in PRIMITIVE_TYPES
+
+
+# The declared type of a member or typedef, with the std::pmr strings and
+# vectors in --pmr mode.
+def declared_type(cpp_type, options):
+    if not options.pmr:
+        return cpp_type
+    cpp_type = sub(r"\bstd::string\b", "std::pmr::string", cpp_type)
+    return cpp_type.replace("std::vector<", "std::pmr::vector<")
+
+
+def cpp_string(value):
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+# Enumerators named after the values in UpperCamelCase.  Names starting with a
+# digit, and the names of values in all caps, which could collide with macros
+# such as NULL or EOF, get a V prefix.
+def enumerator_names(values):
+    names = []
+    taken = set()
+    for i, value in enumerate(values):
+        words = sub(r"[^0-9a-zA-Z]+", " ", value).strip()
+        name = upper_camel(words) if len(words) > 0 else "Value{}".format(i)
+        if name[0].isdigit() or (len(name) > 1 and words.isupper()):
+            name = "V" + name
+        if name in taken:
+            name = "{}{}".format(name, i)
+        names.append(name)
+        taken.add(name)
+    return names
+
+
+def enum_underlying_type(values):
+    return "uint8_t" if len(values) <= 256 else "uint16_t"
+
+
+# An enum class for a string enum, with a static string table for encoding and
+# a decoder that looks the string up with a string switch.  Nested enums use
+# hidden friend functions so they are found through ADL.
+def build_enum(name, values, nested=False):
+    qualifier = "friend" if nested else "inline"
+    names = enumerator_names(values)
+    underlying = enum_underlying_type(values)
+    lines = []
+    lines.append("enum class {} : {} {{".format(name, underlying))
+    for enumerator in names:
+        lines.append("  {},".format(enumerator))
+    lines.append("};")
+    lines.append("")
+    lines.append("{} std::string_view toString({} value) {{".format(qualifier, name))
+    lines.append("  static constexpr std::string_view names[] = {")
+    for value in values:
+        lines.append("    {},".format(cpp_string(value)))
+    lines.append("  };")
+    lines.append("  return names[static_cast<size_t>(value)];")
+    lines.append("}")
+    lines.append("")
+    lines.append("{} bool fromString(std::string_view name, {}& value) {{".format(qualifier, name))
+    cases = [(value, ["value = {}::{};".format(name, enumerator), "return true;"])
+             for value, enumerator in zip(values, names)]
+    lines.extend(build_string_switch("name", cases, "  "))
+    lines.append("  return false;")
+    lines.append("}")
+    return lines
+
+
+def build_object(name, definition, prefix, symbols, options, all_required=False, source=None, scope=None):
+    if scope is None:
+        scope = name
     headers = ["#include <memory>", "#include <optional>", "#include <string>"]
     lines = []
     required = []
     inner = []
     members = []
     properties = {}
+    resolved = []
 
     if "required" in definition:
         required = definition["required"]
@@ -164,6 +475,7 @@ def build_object(name, definition, prefix, all_required=False):
         prop_required = prop_name in required or all_required
         cpp_type = None
         item_type = None
+        inline_enum = False
         if "type" not in prop_def:
             if "$ref" not in prop_def:
                 continue
@@ -171,15 +483,17 @@ def build_object(name, definition, prefix, all_required=False):
             headers.append("#include <{}/{}.h>".format(prefix, cpp_type))
         if cpp_type is None:
             prop_type = prop_def["type"]
-            if prop_type == "string":
+            if prop_type == "string" and options.enum_classes and enum_values(prop_def) is not None:
+                cpp_type = upper_camel(prop_name)
+                inline_enum = True
+                inner = inner + build_enum(cpp_type, enum_values(prop_def), nested=True) + [""]
+                headers.append("#include <cstdint>")
+                headers.append("#include <string_view>")
+            elif prop_type == "string":
                 cpp_type = "std::string"
                 headers.append("#include <string>")
-            elif prop_type == "integer":
-                cpp_type = "int"
-            elif prop_type == "number":
-                cpp_type = "double"
-            elif prop_type == "boolean":
-                cpp_type = "bool"
+            elif prop_type == "integer" or prop_type == "number" or prop_type == "boolean":
+                cpp_type = primitive_type(prop_def)
             elif prop_type == "array":
                 if "items" not in prop_def:
                     continue
@@ -187,58 +501,100 @@ def build_object(name, definition, prefix, all_required=False):
                     item_type = upper_camel(prop_def["items"]["$ref"].split("/")[-1])
                     headers.append("#include <{}/{}.h>".format(prefix, item_type))
                 elif "type" in prop_def["items"]:
-                    if prop_def["items"]["type"] == "string":
+                    if options.enum_classes and enum_values(prop_def["items"]) is not None:
+                        item_type = upper_camel(prop_name) + "Item"
+                        inline_enum = True
+                        inner = inner + build_enum(item_type, enum_values(prop_def["items"]), nested=True) + [""]
+                        headers.append("#include <cstdint>")
+                        headers.append("#include <string_view>")
+                    elif prop_def["items"]["type"] == "string":
                         item_type = "std::string"
                         headers.append("#include <string>")
-                    elif prop_def["items"]["type"] == "integer":
-                        item_type = "int"
-                    elif prop_def["items"]["type"] == "number":
-                        item_type = "double"
-                    elif prop_def["items"]["type"] == "boolean":
-                        item_type = "bool"
+                    elif prop_def["items"]["type"] in ("integer", "number", "boolean"):
+                        item_type = primitive_type(prop_def["items"])
                     elif prop_def["items"]["type"] == "object":
                         item_type = upper_camel(prop_name) + "Item"
-                        sub_lines, sub_headers = build_object(item_type, prop_def["items"], prefix)
-                        inner = inner + sub_lines
-                        headers = headers + sub_headers
+                        shared = symbols.shared_type(prop_def["items"])
+                        if shared is not None:
+                            inner = inner + build_shared_alias(item_type, shared, prefix)
+                            headers.append("#include <{}/{}.h>".format(prefix, shared))
+                        else:
+                            sub_lines, sub_headers = build_object(item_type, prop_def["items"], prefix, symbols,
+                                                                  options, source=source,
+                                                                  scope=scope + "::" + item_type)
+                            inner = inner + sub_lines
+                            headers = headers + sub_headers
                 if item_type is None:
                     continue
-                headers.append("#include <vector>")
-                cpp_type = "std::vector<{}>".format(item_type)
+                fixed = fixed_size(prop_def) if prop_required else None
+                if fixed is not None and options.pmr and uses_allocator(
+                        symbols.resolve_type(item_type), inline_enum or symbols.is_enum(symbols.resolve_type(item_type))):
+                    # std::array can't pass the allocator on to its items
+                    fixed = None
+                if fixed is not None:
+                    headers.append("#include <array>")
+                    cpp_type = "std::array<{}, {}>".format(item_type, fixed_size(prop_def))
+                else:
+                    headers.append("#include <vector>")
+                    cpp_type = "std::vector<{}>".format(item_type)
             elif prop_type == "object":
                 cpp_type = upper_camel(prop_name)
-                sub_lines, sub_headers = build_object(cpp_type, prop_def, prefix)
-                sub_lines = list(map(lambda x: "  {}".format(x), sub_lines))
-                inner = inner + sub_lines
-                headers = headers + sub_headers
+                shared = symbols.shared_type(prop_def)
+                if shared is not None:
+                    inner = inner + build_shared_alias(cpp_type, shared, prefix)
+                    headers.append("#include <{}/{}.h>".format(prefix, shared))
+                else:
+                    sub_lines, sub_headers = build_object(cpp_type, prop_def, prefix, symbols, options,
+                                                          source=source, scope=scope + "::" + cpp_type)
+                    sub_lines = list(map(lambda x: "  {}".format(x), sub_lines))
+                    inner = inner + sub_lines
+                    headers = headers + sub_headers
 
         if cpp_type is not None:
+            prop = Property(prop_name, prop_def, cpp_type, item_type, prop_required, symbols)
+            if inline_enum and item_type is not None:
+                prop.item_enum = True
+            elif inline_enum:
+                prop.enum = True
+            # fixed size arrays of --pmr structs and strings keep their size
+            # check, but are stored in a vector
+            prop.std_array = cpp_type.startswith("std::array<")
+            prop.uses_allocator = options.pmr and uses_allocator(prop.type, prop.enum)
+            if prop.type in FORMAT_TYPES or prop.item_type in FORMAT_TYPES:
+                headers.append("#include <asyncapi_gencpp/json_number.h>")
+                headers.append("#include <cstdint>")
+            resolved.append(prop)
             if not prop_required and item_type is None:
                 cpp_type = "std::optional<{}>".format(cpp_type)
-            members.append("  {} {};".format(cpp_type, prop_name_snake))
+            members.append("  {} {};".format(declared_type(cpp_type, options), prop_name_snake))
 
     inner = list(map(lambda x: "  {}".format(x), inner))
 
     lines.append("struct {} {{".format(name))
     lines.append("    using Ptr = std::shared_ptr<{}>;".format(name))
     lines.append("    using ConstPtr = std::shared_ptr<const {}>;".format(name))
+    if options.pmr:
+        lines.append("    using allocator_type = std::pmr::polymorphic_allocator<char>;")
     lines = lines + inner
     lines = lines + members
+    if options.pmr:
+        headers.append("#include <asyncapi_gencpp/allocator.h>")
+        headers.append("#include <memory_resource>")
+        headers.append("#include <utility>")
+        lines.append("")
+        lines.extend(build_allocator_members(name, resolved))
 
     lines.append("")
+    method_start = len(lines)
     lines.append("  bool isValid() const {")
 
-    for prop_name, prop_def in properties.items():
-        prop_name_snake = snake_case(prop_name)
-        prop_type, item_type = get_property_type(prop_name, prop_def)
-        if prop_type is None:
-            continue
-
-        resolved_def = resolve_definition(prop_type, prop_def)
-        prop_type = resolve_type(prop_type)
+    for prop in resolved:
+        prop_name_snake = prop.member
+        prop_type = prop.type
+        item_type = prop.item_type
+        resolved_def = prop.definition
         if item_type is not None:
-            item_def = resolve_definition(item_type, resolved_def["items"])
-            item_type = resolve_type(item_type)
+            item_def = prop.item_definition
             conditions = []
             if item_type == "std::string":
                 if "maxLength" in item_def:
@@ -263,7 +619,7 @@ def build_object(name, definition, prefix, all_required=False):
                     conditions.append("      if (!in_enum) {")
                     conditions.append("        return false;")
                     conditions.append("      }")
-            elif item_type == "int" or item_type == "double":
+            elif item_type in NUMERIC_TYPES:
                 if "maximum" in item_def:
                     conditions.append("      if (item > {}) {{".format(item_def["maximum"]))
                     conditions.append("        return false;")
@@ -272,7 +628,7 @@ def build_object(name, definition, prefix, all_required=False):
                     conditions.append("      if (item < {}) {{".format(item_def["minimum"]))
                     conditions.append("        return false;")
                     conditions.append("      }")
-            elif item_type == "bool":
+            elif item_type == "bool" or prop.item_enum:
                 pass
             else:
                 conditions.append("      if (!item.isValid()) {")
@@ -282,7 +638,7 @@ def build_object(name, definition, prefix, all_required=False):
                 lines.append("    for (const auto& item: {}) {{".format(prop_name_snake))
                 lines.extend(conditions)
                 lines.append("    }")
-        elif prop_name in required or all_required:
+        elif prop.required:
             if prop_type == "std::string":
                 if "maxLength" in resolved_def:
                     lines.append("    if ({}.length() > {}) {{".format(prop_name_snake, resolved_def["maxLength"]))
@@ -306,7 +662,7 @@ def build_object(name, definition, prefix, all_required=False):
                     lines.append("    if (!_{}_in_enum) {{".format(prop_name_snake))
                     lines.append("      return false;")
                     lines.append("    }")
-            elif prop_type == "int" or prop_type == "double":
+            elif prop_type in NUMERIC_TYPES:
                 if "maximum" in resolved_def:
                     lines.append("    if ({} > {}) {{".format(prop_name_snake, resolved_def["maximum"]))
                     lines.append("      return false;")
@@ -315,7 +671,7 @@ def build_object(name, definition, prefix, all_required=False):
                     lines.append("    if ({} < {}) {{".format(prop_name_snake, resolved_def["minimum"]))
                     lines.append("      return false;")
                     lines.append("    }")
-            elif prop_type == "bool":
+            elif prop_type == "bool" or prop.enum:
                 pass
             else:
                 lines.append("    if (!{}.isValid()) {{".format(prop_name_snake))
@@ -346,7 +702,7 @@ def build_object(name, definition, prefix, all_required=False):
                     lines.append("      if (!in_enum) {")
                     lines.append("        return false;")
                     lines.append("      }")
-            elif prop_type == "int" or prop_type == "double":
+            elif prop_type in NUMERIC_TYPES:
                 if "maximum" in resolved_def:
                     lines.append("      if (*{} > {}) {{".format(prop_name_snake, resolved_def["maximum"]))
                     lines.append("        return false;")
@@ -355,7 +711,7 @@ def build_object(name, definition, prefix, all_required=False):
                     lines.append("      if (*{} < {}) {{".format(prop_name_snake, resolved_def["minimum"]))
                     lines.append("        return false;")
                     lines.append("      }")
-            elif prop_type == "bool":
+            elif prop_type == "bool" or prop.enum:
                 pass
             else:
                 lines.append("      if (!{}->isValid()) {{".format(prop_name_snake))
@@ -365,46 +721,55 @@ def build_object(name, definition, prefix, all_required=False):
 
     lines.append("    return true;")
     lines.append("  }")
+    if options.instrument:
+        instrument_method(lines, method_start, name, scope, "IsValid", "bool", "0", "_result")
 
     lines.append("")
+    method_start = len(lines)
     lines.append("  json toJson() const {")
-    lines.append("    json j;")
-
-    for prop_name, prop_def in properties.items():
-        prop_name_snake = snake_case(prop_name)
-        prop_type, item_type = get_property_type(prop_name, prop_def)
-        if prop_type is None:
-            continue
+    lines.append("    json j = json::object();")
 
-        prop_type = resolve_type(prop_type)
+    for prop in resolved:
+        prop_name = prop.name
+        prop_name_snake = prop.member
+        prop_type = prop.type
+        item_type = prop.item_type
         if item_type is not None:
-            item_type = resolve_type(item_type)
             lines.append("    json _{} = json::array();".format(prop_name_snake))
             lines.append("    for (const auto& item: {}) {{".format(prop_name_snake))
-            if item_type == "std::string" or item_type == "int" or item_type == "double" or item_type == "bool":
+            if item_type in PRIMITIVE_TYPES:
                 lines.append("      json json_item = item;")
+            elif prop.item_enum:
+                lines.append("      json json_item = std::string(toString(item));")
             else:
                 lines.append("      json json_item = item.toJson();")
             lines.append("      _{}.push_back(json_item);".format(prop_name_snake))
             lines.append("    }")
             lines.append('    j["{}"] = _{};'.format(prop_name, prop_name_snake))
-        elif prop_name in required or all_required:
-            if prop_type == "std::string" or prop_type == "int" or prop_type == "double" or prop_type == "bool":
+        elif prop.required:
+            if prop_type in PRIMITIVE_TYPES:
                 lines.append('    j["{}"] = {};'.format(prop_name, prop_name_snake))
+            elif prop.enum:
+                lines.append('    j["{}"] = std::string(toString({}));'.format(prop_name, prop_name_snake))
             else:
                 lines.append('    j["{}"] = {}.toJson();'.format(prop_name, prop_name_snake))
         else:
             lines.append("    if ({}) {{".format(prop_name_snake))
-            if prop_type == "std::string" or prop_type == "int" or prop_type == "double" or prop_type == "bool":
+            if prop_type in PRIMITIVE_TYPES:
                 lines.append('      j["{}"] = *{};'.format(prop_name, prop_name_snake))
+            elif prop.enum:
+                lines.append('      j["{}"] = std::string(toString(*{}));'.format(prop_name, prop_name_snake))
             else:
                 lines.append('    j["{}"] = {}->toJson();'.format(prop_name, prop_name_snake))
             lines.append("    }")
 
     lines.append("    return j;")
     lines.append("  }")
+    if options.instrument:
+        instrument_method(lines, method_start, name, scope, "ToJson", "json", "0", "true")
 
     lines.append("")
+    method_start = len(lines)
     lines.append("  std::string dump(bool formatted=false) const {")
     lines.append("    auto j = toJson();")
     lines.append("    if (formatted) {")
@@ -414,81 +779,902 @@ def build_object(name, definition, prefix, all_required=False):
     lines.append("      return j.dump();")
     lines.append("    }")
     lines.append("  }")
+    if options.instrument:
+        instrument_method(lines, method_start, name, scope, "Dump", "std::string", "_result.size()", "true")
+
+    lines.append("")
+    method_start = len(lines)
+    lines.append("  static bool fromJson(const json& j, {}& out) {{".format(name))
+    lines.append("    try {")
+
+    for prop in resolved:
+        prop_name = prop.name
+        prop_name_snake = prop.member
+        item_type = prop.item_type
+        lines.append('      auto _{} = j.find("{}");'.format(prop_name_snake, prop_name))
+        lines.append("      if (_{} == j.end()) {{".format(prop_name_snake))
+        if prop.required:
+            lines.append("        return false;")
+        elif item_type is None:
+            lines.append("        out.{}.reset();".format(prop_name_snake))
+        else:
+            lines.append("        out.{}.clear();".format(prop_name_snake))
+        lines.append("      }")
+        lines.append("      else {")
+        lines.extend(build_from_json_member(prop, "out."))
+        lines.append("      }")
+
+    lines.append("    }")
+    lines.extend(build_decode_catch())
+    lines.append("    return true;")
+    lines.append("  }")
+    if options.instrument:
+        instrument_method(lines, method_start, name, scope, "FromJson", "bool", "0", "_result")
 
     lines.append("")
     lines.append("  static std::optional<{}> fromJson(const json& j) {{".format(name))
     lines.append("    {} _out;".format(name))
+    lines.append("    if (!fromJson(j, _out)) {")
+    lines.append("      return {};")
+    lines.append("    }")
+    lines.append("    return _out;")
+    lines.append("  }")
 
-    for prop_name, prop_def in properties.items():
-        prop_name_snake = snake_case(prop_name)
-        prop_type, item_type = get_property_type(prop_name, prop_def)
-        if prop_type is None:
-            continue
+    lines.append("")
+    if options.pmr:
+        lines.append("")
+        lines.extend(build_resource_overload(name, "const json& j", "j"))
 
-        if prop_name in required or all_required:
-            lines.append('    if (!j.contains("{}")) {{'.format(prop_name))
-            lines.append("      return {};")
-            lines.append("    }")
-        else:
-            lines.append('    if (!j.contains("{}")) {{'.format(prop_name))
-            lines.append("      _out.{} = {{}};".format(prop_name_snake))
-            lines.append("    }")
-        lines.append("    else {")
-        
-        lines.append("      try {")
-
-        if item_type is None:
-            prop_type = resolve_type(prop_type)
-            if prop_type == "std::string" or prop_type == "int" or prop_type == "double" or prop_type == "bool":
-                lines.append('         _out.{} = j["{}"].get<{}>();'.format(prop_name_snake, prop_name, prop_type))
+    lines.append("")
+    method_start = len(lines)
+    lines.append("  static bool fromJson(const std::string& s, {}& out) {{".format(name))
+    if options.streaming:
+        lines.append("    asyncapi_gencpp::JsonReader reader(s);")
+        lines.append("    return read(reader, out) && reader.finish();")
+    else:
+        lines.append("    json j = json::parse(s, nullptr, false);")
+        lines.append("    if (j.is_discarded()) {")
+        lines.append("      return false;")
+        lines.append("    }")
+        lines.append("    return fromJson(j, out);")
+    lines.append("  }")
+    if options.instrument:
+        instrument_method(lines, method_start, name, scope, "FromJson", "bool", "s.size()", "_result")
+
+    lines.append("")
+    method_start = len(lines)
+    lines.append("  static std::optional<{}> fromJson(const std::string& s) {{".format(name))
+    if options.streaming:
+        lines.append("    {} _out;".format(name))
+        lines.append("    if (!fromJson(s, _out)) {")
+        lines.append("      return {};")
+        lines.append("    }")
+        lines.append("    return _out;")
+    else:
+        lines.append("    return fromJson(json::parse(s));")
+    lines.append("  }")
+    if options.instrument:
+        instrument_method(lines, method_start, name, scope, "FromJson", "std::optional<{}>".format(name),
+                          "s.size()", "_result.has_value()")
+
+    if options.pmr:
+        lines.append("")
+        lines.extend(build_resource_overload(name, "const std::string& s", "s"))
+
+    if options.serializer or options.binary:
+        lines.append("")
+        lines.extend(build_write(resolved))
+    if options.serializer:
+        headers.append("#include <asyncapi_gencpp/json_writer.h>")
+        lines.append("")
+        lines.append("  void serialize(std::string& out) const {")
+        lines.append("    asyncapi_gencpp::JsonWriter writer(out);")
+        lines.append("    write(writer);")
+        lines.append("  }")
+
+    if options.instrument:
+        headers.append("#include <asyncapi_gencpp/instrumentation.h>")
+    if options.streaming or options.validate:
+        headers.append("#include <asyncapi_gencpp/json_reader.h>")
+    if options.streaming or options.validate or options.binary:
+        headers.append("#include <string_view>")
+    if options.streaming or options.binary:
+        lines.append("")
+        lines.extend(build_read(name, resolved))
+
+    if options.validate:
+        headers.append("#include <asyncapi_gencpp/decode_error.h>")
+        lines.append("")
+        lines.extend(build_read(name, resolved, validate=True))
+        lines.append("")
+        lines.append("  static bool fromJsonValidated(const std::string& s, {}& out, "
+                     "asyncapi_gencpp::DecodeError& error) {{".format(name))
+        lines.append("    asyncapi_gencpp::JsonReader reader(s);")
+        lines.append("    if (!readValidated(reader, out, error)) {")
+        lines.append("      error.offset = reader.position();")
+        lines.append("      return false;")
+        lines.append("    }")
+        lines.append("    if (!reader.finish()) {")
+        lines.append('      error.fail("unexpected trailing characters");')
+        lines.append("      error.offset = reader.position();")
+        lines.append("      return false;")
+        lines.append("    }")
+        lines.append("    return true;")
+        lines.append("  }")
+        lines.append("")
+        lines.append("  static std::optional<{}> fromJsonValidated(const std::string& s, "
+                     "asyncapi_gencpp::DecodeError& error) {{".format(name))
+        lines.append("    {} _out;".format(name))
+        lines.append("    if (!fromJsonValidated(s, _out, error)) {")
+        lines.append("      return {};")
+        lines.append("    }")
+        lines.append("    return _out;")
+        lines.append("  }")
+
+    if options.binary:
+        headers.append("#include <asyncapi_gencpp/cbor_reader.h>")
+        headers.append("#include <asyncapi_gencpp/cbor_writer.h>")
+        headers.append("#include <asyncapi_gencpp/msgpack_reader.h>")
+        headers.append("#include <asyncapi_gencpp/msgpack_writer.h>")
+        headers.append("#include <cstdint>")
+        headers.append("#include <vector>")
+        for binary_format in ("Cbor", "MsgPack"):
+            lines.append("")
+            lines.extend(build_binary(name, binary_format))
+
+    if options.delta:
+        headers.append("#include <asyncapi_gencpp/hash.h>")
+        headers.append("#include <cstddef>")
+        lines.append("")
+        lines.extend(build_equality(name, resolved))
+        lines.append("")
+        lines.extend(build_diff(name, resolved))
+        lines.append("")
+        lines.extend(build_apply_patch(name, resolved, options))
+
+    if options.views:
+        headers.append("#include <asyncapi_gencpp/json_view.h>")
+        headers.append("#include <string_view>")
+        lines.append("")
+        lines.extend(build_view(name, resolved, options))
+
+    if options.pmr:
+        lines.append("")
+        lines.append(" private:")
+        lines.append("  allocator_type allocator_;")
+
+    lines.append("};\n")
+    if source is not None:
+        lines = split_definitions(lines, name, scope, source)
+    return lines, list(set(headers))
+
+
+# The constructors of a struct that take an allocator, which are passed on to
+# the members using one.  As with the std::pmr containers, copies use the
+# default memory resource unless given an allocator, and assignment keeps the
+# allocator of the struct.
+def build_allocator_members(name, resolved):
+    lines = []
+    lines.append("  {}() = default;".format(name))
+    lines.append("")
+    initializers = ["{}(allocator)".format(prop.member) for prop in resolved
+                    if prop.uses_allocator and (prop.required or prop.item_type is not None)]
+    lines.append("  explicit {}(const allocator_type& allocator) :".format(name))
+    for initializer in initializers:
+        lines.append("    {},".format(initializer))
+    lines.append("    allocator_(allocator) {}")
+    lines.append("")
+    lines.append("  {}(const {}& other) : {}(other, allocator_type()) {{}}".format(name, name, name))
+    lines.append("")
+    lines.append("  {}(const {}& other, const allocator_type& allocator) : {}(allocator) {{".format(name, name, name))
+    lines.append("    *this = other;")
+    lines.append("  }")
+    lines.append("")
+    lines.append("  {}({}&& other) = default;".format(name, name))
+    lines.append("")
+    lines.append("  {}({}&& other, const allocator_type& allocator) : {}(allocator) {{".format(name, name, name))
+    lines.append("    *this = std::move(other);")
+    lines.append("  }")
+    for reference, value in (("const {}&".format(name), "other.{}"), ("{}&&".format(name), "std::move(other.{})")):
+        lines.append("")
+        lines.append("  {}& operator=({} other) {{".format(name, reference))
+        for prop in resolved:
+            if prop.uses_allocator and not prop.required and prop.item_type is None:
+                lines.append("    asyncapi_gencpp::assignOptional({}, {}, allocator_);".format(
+                    prop.member, value.format(prop.member)))
             else:
-                lines.append('        auto _{} = {}::fromJson(j["{}"]);'.format(prop_name_snake, prop_type, prop_name))
-                lines.append("        if (!_{}) {{".format(prop_name_snake))
-                lines.append("          return {};")
-                lines.append("        }")
-                lines.append("        _out.{} = *_{};".format(prop_name_snake, prop_name_snake))
+                lines.append("    {} = {};".format(prop.member, value.format(prop.member)))
+        lines.append("    return *this;")
+        lines.append("  }")
+    lines.append("")
+    lines.append("  std::pmr::polymorphic_allocator<char> get_allocator() const {")
+    lines.append("    return allocator_;")
+    lines.append("  }")
+    lines.append("")
+    lines.append("  static std::shared_ptr<{}> create(const allocator_type& allocator) {{".format(name))
+    lines.append("    return std::allocate_shared<{}>(allocator);".format(name))
+    lines.append("  }")
+    return lines
+
+
+# A fromJson() overload that decodes into a struct allocating from a memory
+# resource.
+def build_resource_overload(name, parameter, argument):
+    lines = []
+    lines.append("  static std::optional<{}> fromJson({}, std::pmr::memory_resource* resource) {{".format(
+        name, parameter))
+    lines.append("    {} _out(resource);".format(name))
+    lines.append("    if (!fromJson({}, _out)) {{".format(argument))
+    lines.append("      return {};")
+    lines.append("    }")
+    lines.append("    return _out;")
+    lines.append("  }")
+    return lines
+
+
+def emplace_arguments(prop, owner="out."):
+    return "{}get_allocator()".format(owner) if prop.uses_allocator else ""
+
+
+# Values of the wrong type make get_to() and get<>() throw a json::exception,
+# which fails the decode like any other mismatch.
+def build_decode_catch():
+    lines = []
+    lines.append("    catch (const nlohmann::json::exception& error) {")
+    lines.append("      return false;")
+    lines.append("    }")
+    lines.append("    catch (const std::runtime_error& error) {")
+    lines.append("      return false;")
+    lines.append("    }")
+    return lines
+
+
+# Decode the JSON value at the iterator _<member> into the member of owner,
+# e.g. "out." in fromJson().
+def build_from_json_member(prop, owner):
+    lines = []
+    member = owner + prop.member
+    item_type = prop.item_type
+    if item_type is None:
+        target = member
+        if not prop.required:
+            lines.append("        if (!{}) {{".format(member))
+            lines.append("          {}.emplace({});".format(member, emplace_arguments(prop, owner)))
+            lines.append("        }")
+            target = "*" + member
+        if prop.type in FORMAT_TYPES:
+            lines.append("        if (!asyncapi_gencpp::getNumber(*_{}, {})) {{".format(prop.member, target))
+            lines.append("          return false;")
+            lines.append("        }")
+        elif prop.type in PRIMITIVE_TYPES:
+            lines.append("        _{}->get_to({});".format(prop.member, target))
+        elif prop.enum:
+            lines.append("        if (!_{}->is_string() ||".format(prop.member))
+            lines.append("            !fromString(_{}->get_ref<const std::string&>(), {})) {{".format(
+                prop.member, target))
+            lines.append("          return false;")
+            lines.append("        }")
         else:
-            item_type = resolve_type(item_type)
-            lines.append('        if (!j["{}"].is_array()) {{'.format(prop_name))
-            lines.append('          return {};')
-            lines.append('        };')
-            lines.append('        for (const auto& item: j["{}"]) {{'.format(prop_name))
-            if item_type == "std::string":
-                lines.append('          _out.{}.push_back(item.get<std::string>());'.format(prop_name_snake))
-            elif item_type == "int":
-                lines.append('          _out.{}.push_back(item.get<int>());'.format(prop_name_snake))
-            elif item_type == "double":
-                lines.append('          _out.{}.push_back(item.get<double>());'.format(prop_name_snake))
-            elif item_type == "bool":
-                lines.append('          _out.{}.push_back(item.get<bool>());'.format(prop_name_snake))
+            lines.append("        if (!{}::fromJson(*_{}, {})) {{".format(prop.type, prop.member, target))
+            lines.append("          return false;")
+            lines.append("        }")
+        return lines
+
+    # decode into the existing items to reuse their storage
+    if prop.fixed_size is not None:
+        lines.append("        if (!_{}->is_array() || _{}->size() != {}) {{".format(
+            prop.member, prop.member, prop.fixed_size))
+        lines.append("          return false;")
+        lines.append("        }")
+    else:
+        lines.append("        if (!_{}->is_array()) {{".format(prop.member))
+        lines.append("          return false;")
+        lines.append("        }")
+    if not prop.std_array:
+        lines.append("        {}.resize(_{}->size());".format(member, prop.member))
+    lines.append("        size_t _{}_index = 0;".format(prop.member))
+    lines.append("        for (const auto& item: *_{}) {{".format(prop.member))
+    target = "{}[_{}_index]".format(member, prop.member)
+    if item_type in FORMAT_TYPES:
+        lines.append("          if (!asyncapi_gencpp::getNumber(item, {})) {{".format(target))
+        lines.append("            return false;")
+        lines.append("          }")
+    elif item_type == "std::string":
+        lines.append("          item.get_to({});".format(target))
+    elif item_type in PRIMITIVE_TYPES:
+        lines.append("          {} = item.get<{}>();".format(target, item_type))
+    elif prop.item_enum:
+        lines.append("          if (!item.is_string() ||")
+        lines.append("              !fromString(item.get_ref<const std::string&>(), {})) {{".format(target))
+        lines.append("            return false;")
+        lines.append("          }")
+    else:
+        lines.append("          if (!{}::fromJson(item, {})) {{".format(item_type, target))
+        lines.append("            return false;")
+        lines.append("          }")
+    lines.append("          _{}_index++;".format(prop.member))
+    lines.append("        }")
+    return lines
+
+
+# The nested name of an inline object whose struct is shared with other
+# objects of the same shape.
+def build_shared_alias(name, shared, prefix):
+    return ["using {} = ::{}::{};".format(name, prefix.replace('/', '::'), shared), ""]
+
+
+# The header of a schema imported from another document, which is generated in
+# the common prefix and aliased in the prefix of each spec referencing it.
+def build_import_header(name, prefix, common_prefix):
+    class_name = upper_camel(name)
+    namespace = prefix.replace('/', '::')
+    lines = []
+    lines.append("#pragma once")
+    lines.append("\n/* This file was auto-generated. */\n")
+    lines.append("#include <{}/{}.h>\n".format(common_prefix, class_name))
+    lines.append('namespace {} {{\n'.format(namespace))
+    lines.append("using {} = ::{}::{};".format(class_name, common_prefix.replace('/', '::'), class_name))
+    lines.append("")
+    lines.append('}}  // namespace {}'.format(namespace))
+    return lines
+
+
+# Compare and hash structs member by member.  The operators are friends, so
+# they stay in the header with --out-of-line.
+def build_equality(name, resolved):
+    lines = []
+    if len(resolved) == 0:
+        lines.append("  friend bool operator==(const {}&, const {}&) {{".format(name, name))
+        lines.append("    return true;")
+    else:
+        lines.append("  friend bool operator==(const {}& a, const {}& b) {{".format(name, name))
+        comparisons = ["a.{} == b.{}".format(prop.member, prop.member) for prop in resolved]
+        lines.append("    return {}{}".format(comparisons[0], ";" if len(comparisons) == 1 else " &&"))
+        for i, comparison in enumerate(comparisons[1:], 2):
+            lines.append("           {}{}".format(comparison, ";" if i == len(comparisons) else " &&"))
+    lines.append("  }")
+    lines.append("")
+    lines.append("  friend bool operator!=(const {}& a, const {}& b) {{".format(name, name))
+    lines.append("    return !(a == b);")
+    lines.append("  }")
+    lines.append("")
+    lines.append("  size_t hash() const {")
+    lines.append("    size_t seed = 0;")
+    for prop in resolved:
+        lines.append("    asyncapi_gencpp::hashCombine(seed, {});".format(prop.member))
+    lines.append("    return seed;")
+    lines.append("  }")
+    return lines
+
+
+# The JSON of a member or array item that isn't an array, as in toJson().
+def json_value(source, cpp_type, enum):
+    if cpp_type in PRIMITIVE_TYPES:
+        return source
+    if enum:
+        return "std::string(toString({}))".format(source)
+    return "{}.toJson()".format(source)
+
+
+# An RFC 7386 JSON merge patch from prev to this struct.  Only the members that
+# changed are in the patch, nested objects as patches of their own, removed
+# optional members as null, and arrays, which merge patches can't patch, in
+# full.
+def build_diff(name, resolved):
+    lines = []
+    lines.append("  json diff(const {}& prev) const {{".format(name))
+    lines.append("    json j = json::object();")
+    for prop in resolved:
+        nested = prop.type not in PRIMITIVE_TYPES and not prop.enum
+        lines.append("    if ({} != prev.{}) {{".format(prop.member, prop.member))
+        if prop.item_type is not None:
+            lines.append("      json _{} = json::array();".format(prop.member))
+            lines.append("      for (const auto& item: {}) {{".format(prop.member))
+            lines.append("        _{}.push_back({});".format(
+                prop.member, json_value("item", prop.item_type, prop.item_enum)))
+            lines.append("      }")
+            lines.append('      j["{}"] = _{};'.format(prop.name, prop.member))
+        elif prop.required and nested:
+            lines.append('      j["{}"] = {}.diff(prev.{});'.format(prop.name, prop.member, prop.member))
+        elif prop.required:
+            lines.append('      j["{}"] = {};'.format(prop.name, json_value(prop.member, prop.type, prop.enum)))
+        else:
+            lines.append("      if (!{}) {{".format(prop.member))
+            lines.append('        j["{}"] = nullptr;'.format(prop.name))
+            lines.append("      }")
+            if nested:
+                lines.append("      else if (prev.{}) {{".format(prop.member))
+                lines.append('        j["{}"] = {}->diff(*prev.{});'.format(prop.name, prop.member, prop.member))
+                lines.append("      }")
+            lines.append("      else {")
+            if nested:
+                value = "{}->toJson()".format(prop.member)
             else:
-                lines.append('          auto _{}_item = {}::fromJson(item);'.format(prop_name_snake, item_type))
-                lines.append("          if (!_{}_item) {{".format(prop_name_snake))
-                lines.append("            return {};")
-                lines.append("          }")
-                lines.append("          _out.{}.push_back(*_{}_item);".format(prop_name_snake, prop_name_snake))
-            lines.append('        }')
+                value = json_value("*" + prop.member, prop.type, prop.enum)
+            lines.append('        j["{}"] = {};'.format(prop.name, value))
+            lines.append("      }")
+        lines.append("    }")
+    lines.append("    return j;")
+    lines.append("  }")
+    return lines
 
+
+# Apply an RFC 7386 JSON merge patch, e.g. from diff().  Nested objects are
+# patched in place, other members decoded as in fromJson().  Patches that
+# remove a required member or don't decode fail.  applyPatch() patches a copy,
+# so that a failed patch leaves the struct unchanged, while
+# applyPatchInPlace(), which it uses for the nested objects of the copy, leaves
+# the struct partially patched.
+def build_apply_patch(name, resolved, options):
+    lines = []
+    lines.append("  bool applyPatch(const json& patch) {")
+    if options.pmr:
+        lines.append("    {} _patched(*this, get_allocator());".format(name))
+    else:
+        lines.append("    {} _patched = *this;".format(name))
+    lines.append("    if (!_patched.applyPatchInPlace(patch)) {")
+    lines.append("      return false;")
+    lines.append("    }")
+    lines.append("    *this = std::move(_patched);")
+    lines.append("    return true;")
+    lines.append("  }")
+    lines.append("")
+    lines.append("  bool applyPatchInPlace(const json& patch) {")
+    lines.append("    if (!patch.is_object()) {")
+    lines.append("      return false;")
+    lines.append("    }")
+    lines.append("    try {")
+    for prop in resolved:
+        nested = prop.item_type is None and prop.type not in PRIMITIVE_TYPES and not prop.enum
+        lines.append('      auto _{} = patch.find("{}");'.format(prop.member, prop.name))
+        lines.append("      if (_{} != patch.end()) {{".format(prop.member))
+        lines.append("        if (_{}->is_null()) {{".format(prop.member))
+        if prop.required:
+            lines.append("          return false;")
+        elif prop.item_type is None:
+            lines.append("          {}.reset();".format(prop.member))
+        else:
+            lines.append("          {}.clear();".format(prop.member))
+        lines.append("        }")
+        if nested and prop.required:
+            lines.append("        else if (!{}.applyPatchInPlace(*_{})) {{".format(prop.member, prop.member))
+            lines.append("          return false;")
+            lines.append("        }")
+        else:
+            if nested:
+                lines.append("        else if ({}) {{".format(prop.member))
+                lines.append("          if (!{}->applyPatchInPlace(*_{})) {{".format(prop.member, prop.member))
+                lines.append("            return false;")
+                lines.append("          }")
+                lines.append("        }")
+            lines.append("        else {")
+            lines.extend("  " + line for line in build_from_json_member(prop, ""))
+            lines.append("        }")
         lines.append("      }")
-        lines.append("      catch (const std::runtime_error& error) {")
+    lines.append("    }")
+    lines.extend(build_decode_catch())
+    lines.append("    return true;")
+    lines.append("  }")
+    return lines
+
+
+# Report each call of the member function from lines[start] to the end of lines
+# to the instrumentation hooks, along with the size of the JSON text and
+# whether it succeeded, given as expressions of the arguments and the _result
+# of the function.  The body moves into a lambda that is always inlined.
+def instrument_method(lines, start, name, scope, operation, result_type, size, success):
+    body = ["  " + line if len(line) > 0 else line for line in lines[start + 1:-1]]
+    del lines[start + 1:]
+    lines.append('    asyncapi_gencpp::Probe<ASYNCAPI_GENCPP_HOOKS, {}> _probe("{}", asyncapi_gencpp::Operation::{});'.format(
+        name, scope, operation))
+    lines.append("    {} _result = [&]() ASYNCAPI_GENCPP_INLINE -> {} {{".format(result_type, result_type))
+    lines.extend(body)
+    lines.append("    }();")
+    lines.append("    _probe.finish({}, {});".format(size, success))
+    lines.append("    return _result;")
+    lines.append("  }")
+
+
+METHOD_PATTERN = r"^  (static )?([\w:]+(?:<[\w:, ]+>)? )(\w+\(.*\)(?: const)?) \{$"
+
+
+# Move the bodies of the member functions of a struct to out-of-line
+# definitions in source, leaving their declarations.  Template member functions
+# stay in the header.
+def split_definitions(lines, name, scope, source):
+    declarations = []
+    i = 0
+    while i < len(lines):
+        method = match(METHOD_PATTERN, lines[i])
+        if method is None or lines[i - 1].startswith("  template"):
+            declarations.append(lines[i])
+            i = i + 1
+            continue
+        end = lines.index("  }", i)
+        static, return_type, signature = method.groups()
+        declarations.append("  {}{}{};".format(static or "", return_type, signature))
+        return_type = return_type.replace("<{}>".format(name), "<{}>".format(scope))
+        source.append("")
+        source.append("{}{}::{} {{".format(return_type, scope, sub(r"\s*=[^,)]*", "", signature)))
+        source.extend(line[2:] for line in lines[i + 1:end])
+        source.append("}")
+        i = end + 1
+    return declarations
+
+
+# The C++ type a member or array item is accessed as through a view.
+def view_type(cpp_type, enum):
+    if cpp_type == "std::string" and not enum:
+        return "std::string_view"
+    if cpp_type in PRIMITIVE_TYPES or enum:
+        return cpp_type
+    return "{}::View".format(cpp_type)
+
+
+# A read only view of an object over its JSON text.  The text is indexed once
+# when the view is constructed, recording where the value of each member is,
+# and members are only decoded when they are accessed.  Strings are views into
+# the text, and nested objects and arrays are views themselves, so nothing is
+# copied unless a string contains escape sequences.
+def build_view(name, resolved, options):
+    lines = []
+    lines.append("  class View {")
+    lines.append("   public:")
+    lines.append("    View() = default;")
+    lines.append("")
+    lines.append("    explicit View(std::string_view text) : json_(text) {")
+    lines.append("      asyncapi_gencpp::JsonReader reader(text);")
+    lines.append("      if (!reader.beginObject()) {")
+    lines.append("        return;")
+    lines.append("      }")
+    lines.append("      std::string_view key;")
+    lines.append("      while (reader.nextKey(key)) {")
+    for i, prop in enumerate(resolved):
+        lines.append('        {}if (key == "{}") {{'.format("" if i == 0 else "else ", prop.name))
+        lines.append("          if (!reader.readRaw({}_)) {{".format(prop.member))
+        lines.append("            return;")
+        lines.append("          }")
+        lines.append("        }")
+    lines.append("        {}if (!reader.skipValue()) {{".format("" if len(resolved) == 0 else "else "))
+    lines.append("          return;")
+    lines.append("        }")
+    lines.append("      }")
+    lines.append("      valid_ = reader.finish();")
+    lines.append("    }")
+    lines.append("")
+    lines.append("    bool valid() const {")
+    lines.append("      return valid_;")
+    lines.append("    }")
+    lines.append("")
+    lines.append("    std::string_view raw() const {")
+    lines.append("      return json_;")
+    lines.append("    }")
+    lines.append("")
+    lines.append("    bool decode({}& out) const {{".format(name))
+    if options.streaming:
+        lines.append("      asyncapi_gencpp::JsonReader reader(json_);")
+        lines.append("      return {}::read(reader, out) && reader.finish();".format(name))
+    else:
+        lines.append("      json j = json::parse(json_.begin(), json_.end(), nullptr, false);")
+        lines.append("      return !j.is_discarded() && {}::fromJson(j, out);".format(name))
+    lines.append("    }")
+
+    buffers = []
+    for prop in resolved:
+        lines.append("")
+        if prop.item_type is not None:
+            cpp_type = "asyncapi_gencpp::ArrayView<{}>".format(view_type(prop.item_type, prop.item_enum))
+        else:
+            cpp_type = view_type(prop.type, prop.enum)
+        lines.append("    std::optional<{}> {}() const {{".format(cpp_type, prop.member))
+        if cpp_type == "std::string_view":
+            buffers.append(prop.member)
+            lines.append("      std::string_view _value;")
+            lines.append("      if (!asyncapi_gencpp::viewString({}_, _value, {}_buffer_)) {{".format(
+                prop.member, prop.member))
+        elif cpp_type in PRIMITIVE_TYPES or prop.enum:
+            lines.append("      {} _value;".format(cpp_type))
+            lines.append("      if (!asyncapi_gencpp::viewValue({}_, _value)) {{".format(prop.member))
+        else:
+            lines.append("      {} _value({}_);".format(cpp_type, prop.member))
+            lines.append("      if (!_value.valid()) {")
         lines.append("        return {};")
         lines.append("      }")
-
+        lines.append("      return _value;")
         lines.append("    }")
 
+    lines.append("")
+    lines.append("   private:")
+    lines.append("    std::string_view json_;")
+    lines.append("    bool valid_ = false;")
+    for prop in resolved:
+        lines.append("    std::string_view {}_;".format(prop.member))
+    for member in buffers:
+        lines.append("    mutable std::string {}_buffer_;".format(member))
+    lines.append("  };")
+    return lines
+
+
+# Encode and decode a binary format through the write() and read() methods,
+# e.g. toCbor() with an asyncapi_gencpp::CborWriter.
+def build_binary(name, binary_format):
+    lines = []
+    lines.append("  void to{}(std::vector<uint8_t>& out) const {{".format(binary_format))
+    lines.append("    asyncapi_gencpp::{}Writer writer(out);".format(binary_format))
+    lines.append("    write(writer);")
+    lines.append("  }")
+    lines.append("")
+    lines.append("  std::vector<uint8_t> to{}() const {{".format(binary_format))
+    lines.append("    std::vector<uint8_t> out;")
+    lines.append("    to{}(out);".format(binary_format))
+    lines.append("    return out;")
+    lines.append("  }")
+    lines.append("")
+    lines.append("  static bool from{}(const std::vector<uint8_t>& data, {}& out) {{".format(binary_format, name))
+    lines.append("    asyncapi_gencpp::{}Reader reader(data.data(), data.size());".format(binary_format))
+    lines.append("    return read(reader, out) && reader.finish();")
+    lines.append("  }")
+    lines.append("")
+    lines.append("  static std::optional<{}> from{}(const std::vector<uint8_t>& data) {{".format(name, binary_format))
+    lines.append("    {} _out;".format(name))
+    lines.append("    if (!from{}(data, _out)) {{".format(binary_format))
+    lines.append("      return {};")
+    lines.append("    }")
     lines.append("    return _out;")
     lines.append("  }")
+    return lines
 
-    lines.append("")
-    lines.append("  static std::optional<{}> fromJson(const std::string& s) {{".format(name))
-    lines.append("    return fromJson(json::parse(s));")
+
+def build_write_value(writer, source, cpp_type, indent, optional=False, enum=False):
+    if cpp_type in PRIMITIVE_TYPES or enum:
+        if optional:
+            source = "*" + source
+        if enum:
+            source = "toString({})".format(source)
+        return ["{}{}.value({});".format(indent, writer, source)]
+    if optional:
+        return ["{}{}->write({});".format(indent, source, writer)]
+    return ["{}{}.write({});".format(indent, source, writer)]
+
+
+# Encode an object straight into a writer, without an intermediate json
+# document.  Members are written in the sorted key order of nlohmann::json.
+def build_write(resolved):
+    lines = []
+    size = 0
+    optional = []
+    for prop in resolved:
+        if prop.required or prop.item_type is not None:
+            size = size + 1
+        else:
+            optional.append("({} ? 1 : 0)".format(prop.member))
+
+    lines.append("  template <typename Writer>")
+    lines.append("  void write(Writer& writer) const {")
+    lines.append("    writer.beginObject({});".format(" + ".join([str(size)] + optional)))
+    for prop in sorted(resolved, key=lambda x: x.name.encode("utf-8")):
+        if prop.item_type is not None:
+            lines.append('    writer.key("{}");'.format(prop.name))
+            lines.append("    writer.beginArray({}.size());".format(prop.member))
+            lines.append("    for (const auto& item: {}) {{".format(prop.member))
+            lines.extend(build_write_value("writer", "item", prop.item_type, "      ", enum=prop.item_enum))
+            lines.append("    }")
+            lines.append("    writer.endArray();")
+        elif prop.required:
+            lines.append('    writer.key("{}");'.format(prop.name))
+            lines.extend(build_write_value("writer", prop.member, prop.type, "    ", enum=prop.enum))
+        else:
+            lines.append("    if ({}) {{".format(prop.member))
+            lines.append('      writer.key("{}");'.format(prop.name))
+            lines.extend(build_write_value("writer", prop.member, prop.type, "      ", optional=True,
+                                           enum=prop.enum))
+            lines.append("    }")
+    lines.append("    writer.endObject();")
     lines.append("  }")
+    return lines
 
-    lines.append("};\n")
-    return lines, list(set(headers))
 
+def read_failure(validate, message=None, key=None, index=None):
+    if not validate:
+        return "return false;"
+    location = []
+    if key is not None:
+        location.append(cpp_string(key))
+    if index is not None:
+        location.append(index)
+    if message is None:
+        return "return error.at({});".format(", ".join(location))
+    return "return error.fail({});".format(", ".join([cpp_string(message)] + location))
 
-def build_header(name, definition, prefix):
+
+def build_read_value(reader, target, cpp_type, indent, enum=False, validate=False, key=None, index=None):
+    lines = []
+    message = None
+    if enum:
+        lines.append("{}std::string_view _name;".format(indent))
+        lines.append("{}if (!{}.readStringView(_name) || !fromString(_name, {})) {{".format(indent, reader, target))
+        message = "not one of the enum values"
+    elif cpp_type == "std::string":
+        lines.append("{}if (!{}.readString({})) {{".format(indent, reader, target))
+        message = "expected a string"
+    elif cpp_type == "bool":
+        lines.append("{}if (!{}.readBool({})) {{".format(indent, reader, target))
+        message = "expected a boolean"
+    elif cpp_type in PRIMITIVE_TYPES:
+        lines.append("{}if (!{}.readNumber({})) {{".format(indent, reader, target))
+        message = "expected a number"
+    elif validate:
+        lines.append("{}if (!{}::readValidated({}, {}, error)) {{".format(indent, cpp_type, reader, target))
+    else:
+        lines.append("{}if (!{}::read({}, {})) {{".format(indent, cpp_type, reader, target))
+    lines.append("{}  {}".format(indent, read_failure(validate, message, key, index)))
+    lines.append("{}}}".format(indent))
+    return lines
+
+
+# The isValid() constraints of a single value, checked right after it has been
+# decoded.
+def build_read_checks(value, cpp_type, definition, indent, key, index=None, enum=False):
+    checks = []
+    if cpp_type == "std::string" and not enum:
+        if "maxLength" in definition:
+            checks.append(("{}.length() > {}".format(value, definition["maxLength"]),
+                           "longer than maxLength {}".format(definition["maxLength"])))
+        if "minLength" in definition:
+            checks.append(("{}.length() < {}".format(value, definition["minLength"]),
+                           "shorter than minLength {}".format(definition["minLength"])))
+        if "enum" in definition and len(definition["enum"]) > 0:
+            condition = " &&\n{}    ".format(indent).join(
+                "{} != {}".format(value, cpp_string(enum_value)) for enum_value in definition["enum"])
+            checks.append((condition, "not one of the enum values"))
+    elif cpp_type in NUMERIC_TYPES:
+        if "maximum" in definition:
+            checks.append(("{} > {}".format(value, definition["maximum"]),
+                           "greater than maximum {}".format(definition["maximum"])))
+        if "minimum" in definition:
+            checks.append(("{} < {}".format(value, definition["minimum"]),
+                           "less than minimum {}".format(definition["minimum"])))
+
+    lines = []
+    for condition, message in checks:
+        lines.append("{}if ({}) {{".format(indent, condition))
+        lines.append("{}  {}".format(indent, read_failure(True, message, key, index)))
+        lines.append("{}}}".format(indent))
+    return lines
+
+
+# Decode an object straight from a streaming reader, without an intermediate
+# json document.  Existing strings, optionals and array items are decoded into
+# in place to reuse their storage.  The validating variant also checks the
+# isValid() constraints of each member as soon as it is decoded and reports
+# the location of the first violation.
+def build_read(name, resolved, validate=False):
+    lines = []
+    lines.append("  template <typename Reader>")
+    if validate:
+        lines.append("  static bool readValidated(Reader& reader, {}& out, asyncapi_gencpp::DecodeError& error) {{".format(
+            name))
+    else:
+        lines.append("  static bool read(Reader& reader, {}& out) {{".format(name))
+    for prop in resolved:
+        lines.append("    bool _has_{} = false;".format(prop.member))
+    lines.append("    if (!reader.beginObject()) {")
+    lines.append("      {}".format(read_failure(validate, "expected an object")))
+    lines.append("    }")
+    lines.append("    std::string_view key;")
+    lines.append("    while (reader.nextKey(key)) {")
+    for i, prop in enumerate(resolved):
+        condition = 'key == "{}"'.format(prop.name)
+        if i == 0:
+            lines.append("      if ({}) {{".format(condition))
+        else:
+            lines.append("      else if ({}) {{".format(condition))
+        if prop.std_array and not prop.item_enum and prop.item_type in NUMERIC_TYPES:
+            # bulk decode of fixed size numeric arrays
+            lines.append("        if (!reader.readNumberArray(out.{}.data(), {})) {{".format(prop.member, prop.fixed_size))
+            lines.append("          {}".format(read_failure(
+                validate, "expected an array of {} numbers".format(prop.fixed_size), prop.name)))
+            lines.append("        }")
+            checks = build_read_checks("out.{}[_count]".format(prop.member), prop.item_type, prop.item_definition,
+                                       "          ", prop.name, "_count")
+            if validate and len(checks) > 0:
+                lines.append("        for (size_t _count = 0; _count < {}; _count++) {{".format(prop.fixed_size))
+                lines.extend(checks)
+                lines.append("        }")
+        elif prop.item_type is not None:
+            item = "out.{}[_count]".format(prop.member)
+            lines.append("        if (!reader.beginArray()) {")
+            lines.append("          {}".format(read_failure(validate, "expected an array", prop.name)))
+            lines.append("        }")
+            lines.append("        size_t _count = 0;")
+            lines.append("        while (reader.nextItem()) {")
+            if prop.fixed_size is not None:
+                lines.append("          if (_count == {}) {{".format(prop.fixed_size))
+                lines.append("            {}".format(read_failure(
+                    validate, "expected {} items".format(prop.fixed_size), prop.name)))
+                lines.append("          }")
+            if not prop.std_array:
+                lines.append("          if (_count == out.{}.size()) {{".format(prop.member))
+                lines.append("            out.{}.emplace_back();".format(prop.member))
+                lines.append("          }")
+            if prop.item_enum:
+                lines.extend(build_read_value("reader", item, prop.item_type, "          ", enum=True,
+                                              validate=validate, key=prop.name, index="_count"))
+            elif prop.item_type in PRIMITIVE_TYPES and prop.item_type != "std::string":
+                lines.append("          {} _item;".format(prop.item_type))
+                lines.extend(build_read_value("reader", "_item", prop.item_type, "          ",
+                                              validate=validate, key=prop.name, index="_count"))
+                if validate:
+                    lines.extend(build_read_checks("_item", prop.item_type, prop.item_definition, "          ",
+                                                   prop.name, "_count"))
+                lines.append("          {} = _item;".format(item))
+            else:
+                lines.extend(build_read_value("reader", item, prop.item_type, "          ",
+                                              validate=validate, key=prop.name, index="_count"))
+                if validate:
+                    lines.extend(build_read_checks(item, prop.item_type, prop.item_definition, "          ",
+                                                   prop.name, "_count"))
+            lines.append("          _count++;")
+            lines.append("        }")
+            lines.append("        if (reader.failed()) {")
+            lines.append("          {}".format(read_failure(validate, "invalid array", prop.name)))
+            lines.append("        }")
+            if prop.fixed_size is not None:
+                lines.append("        if (_count != {}) {{".format(prop.fixed_size))
+                lines.append("          {}".format(read_failure(
+                    validate, "expected {} items".format(prop.fixed_size), prop.name)))
+                lines.append("        }")
+            if not prop.std_array:
+                lines.append("        out.{}.resize(_count);".format(prop.member))
+        elif prop.required:
+            value = "out.{}".format(prop.member)
+            lines.extend(build_read_value("reader", value, prop.type, "        ", enum=prop.enum,
+                                          validate=validate, key=prop.name))
+            if validate:
+                lines.extend(build_read_checks(value, prop.type, prop.definition, "        ", prop.name,
+                                               enum=prop.enum))
+        else:
+            value = "*out.{}".format(prop.member)
+            lines.append("        if (reader.isNull()) {")
+            lines.append("          reader.readNull();")
+            lines.append("          out.{}.reset();".format(prop.member))
+            lines.append("          continue;")
+            lines.append("        }")
+            lines.append("        if (!out.{}) {{".format(prop.member))
+            lines.append("          out.{}.emplace({});".format(prop.member, emplace_arguments(prop)))
+            lines.append("        }")
+            lines.extend(build_read_value("reader", value, prop.type, "        ", enum=prop.enum,
+                                          validate=validate, key=prop.name))
+            if validate:
+                lines.extend(build_read_checks("out.{}.value()".format(prop.member), prop.type, prop.definition,
+                                               "        ", prop.name, enum=prop.enum))
+        lines.append("        _has_{} = true;".format(prop.member))
+        lines.append("      }")
+    if len(resolved) > 0:
+        lines.append("      else if (!reader.skipValue()) {")
+    else:
+        lines.append("      if (!reader.skipValue()) {")
+    lines.append("        {}".format(read_failure(validate, "invalid JSON")))
+    lines.append("      }")
+    lines.append("    }")
+    lines.append("    if (reader.failed()) {")
+    lines.append("      {}".format(read_failure(validate, "invalid JSON")))
+    lines.append("    }")
+    for prop in resolved:
+        lines.append("    if (!_has_{}) {{".format(prop.member))
+        if prop.required:
+            lines.append("      {}".format(read_failure(validate, "missing required property", prop.name)))
+        elif prop.item_type is None:
+            lines.append("      out.{}.reset();".format(prop.member))
+        else:
+            lines.append("      out.{}.clear();".format(prop.member))
+        lines.append("    }")
+    lines.append("    return true;")
+    lines.append("  }")
+    return lines
+
+
+def build_header(name, definition, prefix, symbols, options, source=None):
 
     description = ""
     if "summary" in definition:
@@ -527,36 +1713,45 @@ def build_header(name, definition, prefix):
     if typedef is None and base_type is None and "type" in definition:
         base_type = definition
     if base_type is not None:
-        if base_type["type"] == "string":
-            typedef = "std::string"
+        typedef = primitive_type(base_type)
+        if typedef == "std::string":
             headers.append("#include  <string>")
-        elif base_type["type"] == "integer":
-            typedef = "int"
-        elif base_type["type"] == "number":
-            typedef = "double"
-        elif base_type["type"] == "boolean":
-            typedef = "bool"
-        elif base_type["type"] == "array":
-            # TODO
-            pass
-    if typedef is not None:
-        lines.append("typedef {} {};".format(typedef, class_name))
-        typedefs[class_name] = typedef
+        elif typedef in INTEGER_FORMATS.values():
+            headers.append("#include <cstdint>")
+    if symbols.is_enum(class_name):
+        lines = lines + build_enum(class_name, symbols.enums[class_name])
+        headers.append("#include <cstdint>")
+        headers.append("#include <string_view>")
+    elif typedef is not None:
+        lines.append("typedef {} {};".format(declared_type(typedef, options), class_name))
     elif base_type is not None and base_type["type"] == "object":
-        class_def, class_headers = build_object(class_name, base_type, prefix)
+        class_def, class_headers = build_object(class_name, base_type, prefix, symbols, options, source=source)
         lines = lines + class_def
         headers = headers + class_headers
+        if options.views:
+            lines.append("using {}View = {}::View;\n".format(class_name, class_name))
     else:
         base_type = {'properties': definition}
-        class_def, class_headers = build_object(class_name, base_type, prefix, all_required=True)
+        class_def, class_headers = build_object(class_name, base_type, prefix, symbols, options, all_required=True,
+                                                source=source)
         lines = lines + class_def
         headers = headers + class_headers
+        if options.views:
+            lines.append("using {}View = {}::View;\n".format(class_name, class_name))
+
+    hashed = options.delta and typedef is None and not symbols.is_enum(class_name)
+    if hashed:
+        headers.append("#include <functional>")
 
     headers = list(set(headers))
     headers.sort()
 
     lines.append('}}  // namespace {}'.format(namespace))
 
+    if hashed:
+        lines.append("")
+        lines.extend(build_std_hash("::{}::{}".format(namespace, class_name)))
+
     if len(headers) > 0:
         headers.append('')
         lines = headers + lines
@@ -564,11 +1759,1106 @@ def build_header(name, definition, prefix):
     return top_matter + lines
 
 
+# Hash generated structs with their hash() function in unordered containers.
+def build_std_hash(qualified_name):
+    lines = []
+    lines.append("namespace std {")
+    lines.append("")
+    lines.append("template <>")
+    lines.append("struct hash<{}> {{".format(qualified_name))
+    lines.append("  size_t operator()(const {}& value) const {{".format(qualified_name))
+    lines.append("    return value.hash();")
+    lines.append("  }")
+    lines.append("};")
+    lines.append("")
+    lines.append("}  // namespace std")
+    return lines
+
+
+# The translation unit with the out-of-line member function definitions of a
+# header built with a source list.
+def build_source(name, prefix, source):
+    lines = []
+    lines.append("/* This file was auto-generated. */\n")
+    lines.append("#include <{}/{}.h>\n".format(prefix, upper_camel(name)))
+    if len(source) > 0:
+        namespace = prefix.replace('/', '::')
+        lines.append('namespace {} {{'.format(namespace))
+        lines = lines + source
+        lines.append("")
+        lines.append('}}  // namespace {}'.format(namespace))
+    return lines
+
+
+# Forward declarations of every generated type, for code that only needs to
+# refer to the types rather than use them.  Imported structs and enums are
+# declared in their own namespace and aliased.
+def build_forward_declarations(schemas, prefix, symbols, options, imports=None):
+    headers = set()
+    declarations = []
+    typedefs = []
+    imported = {}
+    for name in schemas.keys():
+        class_name = upper_camel(name)
+        common_prefix = (imports or {}).get(name)
+        if common_prefix is not None and class_name not in symbols.typedefs:
+            if symbols.is_enum(class_name):
+                headers.add("#include <cstdint>")
+                declaration = "enum class {} : {};".format(class_name, enum_underlying_type(symbols.enums[class_name]))
+            else:
+                declaration = "struct {};".format(class_name)
+            imported.setdefault(common_prefix, []).append(declaration)
+            typedefs.append("using {} = ::{}::{};".format(class_name, common_prefix.replace('/', '::'), class_name))
+        elif symbols.is_enum(class_name):
+            headers.add("#include <cstdint>")
+            declarations.append("enum class {} : {};".format(
+                class_name, enum_underlying_type(symbols.enums[class_name])))
+        elif class_name in symbols.typedefs:
+            typedef = symbols.resolve_type(class_name)
+            if typedef == "std::string":
+                headers.add("#include <string>")
+            elif typedef in INTEGER_FORMATS.values():
+                headers.add("#include <cstdint>")
+            typedefs.append("typedef {} {};".format(declared_type(typedef, options), class_name))
+        else:
+            declarations.append("struct {};".format(class_name))
+
+    namespace = prefix.replace('/', '::')
+    lines = []
+    lines.append("#pragma once")
+    lines.append("\n/* This file was auto-generated. */\n")
+    if len(headers) > 0:
+        lines = lines + sorted(headers) + [""]
+    for common_prefix, common_declarations in sorted(imported.items()):
+        common_namespace = common_prefix.replace('/', '::')
+        lines.append('namespace {} {{\n'.format(common_namespace))
+        lines = lines + common_declarations
+        lines.append("")
+        lines.append('}}  // namespace {}\n'.format(common_namespace))
+    lines.append('namespace {} {{\n'.format(namespace))
+    lines = lines + declarations + typedefs
+    lines.append("")
+    lines.append('}}  // namespace {}'.format(namespace))
+    return lines
+
+
+# The generated types used by each channel of the spec, keyed by the name of
+# the umbrella header of the channel.
+def channel_headers(channels, schemas):
+    class_names = set(upper_camel(name) for name in schemas.keys())
+    headers = {}
+    for channel_name, channel in (channels or {}).items():
+        header_name = snake_case(sub(r"[^0-9a-zA-Z]+", "_", str(channel_name)).strip("_"))
+        types = sorted(find_refs(channel) & class_names)
+        if len(header_name) > 0 and len(types) > 0:
+            headers[header_name] = sorted(set(headers.get(header_name, []) + types))
+    return headers
+
+
+# An umbrella header including the types used by a channel.
+def build_channel_header(prefix, types):
+    lines = []
+    lines.append("#pragma once")
+    lines.append("\n/* This file was auto-generated. */\n")
+    for class_name in types:
+        lines.append("#include <{}/{}.h>".format(prefix, class_name))
+    return lines
+
+
+# A message type that can be received on a channel, along with the name of its
+# schema in the spec and the members holding its handler and decoded message.
+class Route:
+    def __init__(self, enumerator, class_name, message_name):
+        self.class_name = class_name
+        self.message_name = message_name
+        self.member = snake_case(enumerator) + "_" + snake_case(class_name)
+
+
+# The generated structs of the messages of each channel of the spec, keyed by
+# the address of the channel.  Typedefs of primitive types and enums have no
+# fromJson() to decode them with, so they are left out.
+def channel_routes(channels, schemas, symbols):
+    message_names = {}
+    for name in schemas.keys():
+        message_names.setdefault(upper_camel(name), name)
+    routes = {}
+    for channel_name, channel in (channels or {}).items():
+        address = channel.get("address") if isinstance(channel, dict) else None
+        if not isinstance(address, str):
+            address = str(channel_name)
+        for class_name in sorted(find_refs(channel) & message_names.keys()):
+            resolved = symbols.resolve_type(class_name)
+            if resolved in PRIMITIVE_TYPES or symbols.is_enum(resolved) or class_name in routes.get(address, []):
+                continue
+            routes.setdefault(address, []).append(class_name)
+    enumerators = enumerator_names(list(routes.keys()))
+    return [(address, enumerator, [Route(enumerator, class_name, message_names[class_name])
+                                   for class_name in routes[address]])
+            for address, enumerator in zip(routes.keys(), enumerators)]
+
+
+def cpp_char(byte):
+    if 0x20 <= byte < 0x7f and chr(byte) not in "'\\":
+        return "'{}'".format(chr(byte))
+    return "'\\x{:02x}'".format(byte)
+
+
+# Match a string_view against a set of strings without comparing it to each of
+# them: switch on its length, and where several strings have the same length,
+# on the character that tells most of them apart, and so on for the strings
+# that share that character, which leaves a single comparison.  Each case is a
+# string and the lines to run when it matches, which need to return.
+def build_string_switch(variable, cases, indent):
+    by_length = {}
+    for value, body in cases:
+        encoded = value.encode("utf-8")
+        by_length.setdefault(len(encoded), []).append((encoded, value, body))
+
+    def build_bucket(bucket, length, bucket_indent):
+        if len(bucket) == 1:
+            _, value, body = bucket[0]
+            lines = ["{}if ({} == {}) {{".format(bucket_indent, variable, cpp_string(value))]
+            lines.extend(bucket_indent + "  " + line for line in body)
+            lines.append("{}}}".format(bucket_indent))
+            return lines
+        position = max(range(length), key=lambda i: len(set(encoded[i] for encoded, _, _ in bucket)))
+        by_char = {}
+        for entry in bucket:
+            by_char.setdefault(entry[0][position], []).append(entry)
+        lines = ["{}switch ({}[{}]) {{".format(bucket_indent, variable, position)]
+        for char, group in by_char.items():
+            lines.append("{}  case {}:".format(bucket_indent, cpp_char(char)))
+            lines.extend(build_bucket(group, length, bucket_indent + "    "))
+            lines.append("{}    break;".format(bucket_indent))
+        lines.append("{}}}".format(bucket_indent))
+        return lines
+
+    lines = ["{}switch ({}.size()) {{".format(indent, variable)]
+    for length in sorted(by_length.keys()):
+        lines.append("{}  case {}:".format(indent, length))
+        lines.extend(build_bucket(by_length[length], length, indent + "    "))
+        lines.append("{}    break;".format(indent))
+    lines.append("{}}}".format(indent))
+    return lines
+
+
+# A dispatcher that decodes the payloads received on the channels of the spec
+# and passes them to the handlers registered for their message types.  Channel
+# and message names are looked up with a string switch, and payloads of
+# messages without a handler are dropped before they are parsed.
+def build_dispatcher(prefix, routes):
+    namespace = prefix.replace('/', '::')
+    class_names = sorted(set(route.class_name for _, _, channel_messages in routes for route in channel_messages))
+
+    lines = []
+    lines.append("#pragma once")
+    lines.append("\n/* This file was auto-generated. */\n")
+    lines.append("#include <cstdint>")
+    lines.append("#include <functional>")
+    lines.append("#include <string>")
+    lines.append("#include <string_view>")
+    lines.append("#include <utility>")
+    lines.append("")
+    for class_name in class_names:
+        lines.append("#include <{}/{}.h>".format(prefix, class_name))
+    lines.append("")
+    lines.append('namespace {} {{\n'.format(namespace))
+    lines.append("class Dispatcher {")
+    lines.append(" public:")
+    lines.append("  enum class Channel : {} {{".format(enum_underlying_type(routes)))
+    for _, enumerator, _ in routes:
+        lines.append("    {},".format(enumerator))
+    lines.append("  };")
+
+    lines.append("")
+    lines.append("  static bool channelFromName(std::string_view name, Channel& channel) {")
+    lines.extend(build_string_switch("name", [
+        (address, ["channel = Channel::{};".format(enumerator), "return true;"])
+        for address, enumerator, _ in routes], "    "))
+    lines.append("    return false;")
+    lines.append("  }")
+
+    for address, enumerator, channel_messages in routes:
+        for route in channel_messages:
+            handler = "on" + enumerator
+            if len(channel_messages) > 1:
+                handler = handler + route.class_name
+            lines.append("")
+            lines.append("  void {}(std::function<void(const {}&)> handler) {{".format(handler, route.class_name))
+            lines.append("    {}_handler_ = std::move(handler);".format(route.member))
+            lines.append("  }")
+
+    lines.append("")
+    lines.append("  bool hasSubscriber(Channel channel) const {")
+    lines.append("    switch (channel) {")
+    for _, enumerator, channel_messages in routes:
+        lines.append("      case Channel::{}:".format(enumerator))
+        lines.append("        return {};".format(" || ".join(
+            "static_cast<bool>({}_handler_)".format(route.member) for route in channel_messages)))
+    lines.append("    }")
+    lines.append("    return false;")
+    lines.append("  }")
+
+    lines.append("")
+    lines.append("  bool hasSubscriber(std::string_view channel) const {")
+    lines.append("    Channel _channel;")
+    lines.append("    return channelFromName(channel, _channel) && hasSubscriber(_channel);")
+    lines.append("  }")
+
+    lines.append("")
+    lines.append("  bool dispatch(Channel channel, const std::string& payload) {")
+    lines.append("    switch (channel) {")
+    for _, enumerator, channel_messages in routes:
+        lines.append("      case Channel::{}:".format(enumerator))
+        lines.append("        return {};".format(" ||\n               ".join(
+            "decode({}_handler_, {}_message_, payload)".format(route.member, route.member)
+            for route in channel_messages)))
+    lines.append("    }")
+    lines.append("    return false;")
+    lines.append("  }")
+
+    lines.append("")
+    lines.append("  bool dispatch(std::string_view channel, const std::string& payload) {")
+    lines.append("    Channel _channel;")
+    lines.append("    return channelFromName(channel, _channel) && dispatch(_channel, payload);")
+    lines.append("  }")
+
+    lines.append("")
+    lines.append("  bool dispatch(Channel channel, std::string_view message, const std::string& payload) {")
+    lines.append("    switch (channel) {")
+    for _, enumerator, channel_messages in routes:
+        lines.append("      case Channel::{}:".format(enumerator))
+        lines.extend(build_string_switch("message", [
+            (route.message_name, ["return decode({}_handler_, {}_message_, payload);".format(
+                route.member, route.member)])
+            for route in channel_messages], "        "))
+        lines.append("        break;")
+    lines.append("    }")
+    lines.append("    return false;")
+    lines.append("  }")
+
+    lines.append("")
+    lines.append("  bool dispatch(std::string_view channel, std::string_view message, const std::string& payload) {")
+    lines.append("    Channel _channel;")
+    lines.append("    return channelFromName(channel, _channel) && dispatch(_channel, message, payload);")
+    lines.append("  }")
+
+    lines.append("")
+    lines.append(" private:")
+    lines.append("  template <typename T>")
+    lines.append("  static bool decode(const std::function<void(const T&)>& handler, T& message, "
+                 "const std::string& payload) {")
+    lines.append("    if (!handler || !T::fromJson(payload, message)) {")
+    lines.append("      return false;")
+    lines.append("    }")
+    lines.append("    handler(message);")
+    lines.append("    return true;")
+    lines.append("  }")
+    lines.append("")
+    for _, _, channel_messages in routes:
+        for route in channel_messages:
+            lines.append("  std::function<void(const {}&)> {}_handler_;".format(route.class_name, route.member))
+            lines.append("  {} {}_message_;".format(route.class_name, route.member))
+    lines.append("};")
+    lines.append("")
+    lines.append('}}  // namespace {}'.format(namespace))
+    return lines
+
+
+# A number within the bounds of a schema, or close to them if it only has one.
+# Numbers are rounded to ten binary digits where that keeps them within the
+# bounds, so that they round-trip through float members without loss.
+def sample_number(definition):
+    low = definition.get("minimum")
+    high = definition.get("maximum")
+    if low is not None and high is not None:
+        value = (low + high) / 2
+    elif low is not None:
+        value = low + 1
+    elif high is not None:
+        value = high - 1
+    else:
+        value = 1.5
+    exact = round(value * 1024) / 1024
+    if (low is None or exact >= low) and (high is None or exact <= high):
+        return float(exact)
+    return float(value)
+
+
+def sample_integer(definition):
+    low, high = INTEGER_RANGES[primitive_type(definition)]
+    if "minimum" in definition:
+        low = max(low, math.ceil(definition["minimum"]))
+    if "maximum" in definition:
+        high = min(high, math.floor(definition["maximum"]))
+    if "minimum" in definition and "maximum" in definition:
+        return (low + high) // 2
+    return min(max(42, low), high)
+
+
+def sample_string(definition):
+    if "enum" in definition and len(definition["enum"]) > 0:
+        return str(definition["enum"][0])
+    length = max(8, definition.get("minLength", 0))
+    if "maxLength" in definition:
+        length = min(length, definition["maxLength"])
+    return "".join("abcdefghijklmnopqrstuvwxyz"[i % 26] for i in range(length))
+
+
+# A sample JSON value of a schema that satisfies its length, range, enum and
+# array size constraints, or None for the properties the generator skips.
+# Optional members are present down to SAMPLE_DEPTH nested objects, which keeps
+# the samples of long chains of optional references small.
+def sample_value(definition, symbols, depth=0):
+    if not isinstance(definition, dict):
+        return None
+    if "$ref" in definition:
+        resolved = symbols.components.get(upper_camel(definition["$ref"].split("/")[-1]))
+        if resolved is None:
+            return None
+        if "schema" in resolved:
+            resolved = resolved["schema"]
+        if "type" not in resolved and "$ref" not in resolved:
+            return sample_object({"properties": resolved}, symbols, depth, all_required=True)
+        return sample_value(resolved, symbols, depth)
+    schema_type = definition.get("type")
+    if schema_type == "string":
+        return sample_string(definition)
+    if schema_type == "integer":
+        return sample_integer(definition)
+    if schema_type == "number":
+        return sample_number(definition)
+    if schema_type == "boolean":
+        return True
+    if schema_type == "array":
+        item = sample_value(definition.get("items"), symbols, depth)
+        if item is None:
+            return None
+        size = max(3, definition.get("minItems", 0))
+        if "maxItems" in definition:
+            size = min(size, definition["maxItems"])
+        return [item] * size
+    if schema_type == "object":
+        return sample_object(definition, symbols, depth)
+    return None
+
+
+# The schema that a property is or refers to, or None, as sample_value()
+# resolves it.
+def sample_schema(definition, symbols):
+    while isinstance(definition, dict) and "$ref" in definition:
+        resolved = symbols.components.get(upper_camel(definition["$ref"].split("/")[-1]))
+        if resolved is None:
+            return None
+        if "schema" in resolved:
+            resolved = resolved["schema"]
+        if "type" not in resolved and "$ref" not in resolved:
+            return {"type": "object", "properties": resolved}
+        definition = resolved
+    return definition if isinstance(definition, dict) else None
+
+
+# Past SAMPLE_DEPTH optional arrays are sampled empty rather than left out, as
+# toJson() writes them even when they are empty.
+def sample_object(definition, symbols, depth=0, all_required=False):
+    required = definition.get("required") or []
+    sample = {}
+    for prop_name, prop_def in (definition.get("properties") or {}).items():
+        if depth >= SAMPLE_DEPTH and not all_required and prop_name not in required:
+            array = sample_schema(prop_def, symbols)
+            if array is None or array.get("type") != "array":
+                continue
+            if array.get("minItems", 0) == 0:
+                items = sample_schema(array.get("items"), symbols)
+                if items is not None and items.get("type") in ("string", "integer", "number", "boolean", "array",
+                                                                "object"):
+                    sample[prop_name] = []
+                continue
+        value = sample_value(prop_def, symbols, depth + 1)
+        if value is not None:
+            sample[prop_name] = value
+    return sample
+
+
+# A program timing the decoding, encoding and validation of each struct of a
+# spec on a sample message, which reports the results as JSON.  The shared
+# structs of --dedupe and the schemas imported from the common prefix are left
+# to the benchmarks of the specs they come from.
+def build_benchmark(prefix, schemas, symbols, imports=None):
+    namespace = prefix.replace('/', '::')
+    lines = []
+    lines.append("/* This file was auto-generated. */")
+    lines.append("")
+    lines.append("#include <asyncapi_gencpp/benchmark.h>")
+    lines.append("#include <{}/messages.h>".format(prefix))
+    lines.append("")
+    lines.append("int main(int argc, char** argv) {")
+    lines.append("  asyncapi_gencpp::BenchmarkRunner runner(argc, argv);")
+    for name, definition in schemas.items():
+        class_name = upper_camel(name)
+        if class_name in symbols.shared or name in (imports or {}):
+            continue
+        base_type, all_required = schema_object(definition, symbols, class_name)
+        if base_type is None:
+            continue
+        sample = json.dumps(sample_object(base_type, symbols, all_required=all_required), ensure_ascii=False)
+        lines.append('  runner.run<::{}::{}>("{}", {});'.format(namespace, class_name, class_name, cpp_string(sample)))
+    lines.append("  return runner.finish();")
+    lines.append("}")
+    lines.append("")
+    return lines
+
+
+def list_outputs(schemas, prefix, outdir, options, channels=None):
+    symbols = SymbolTable(schemas, options)
+    schemas = dict(schemas, **symbols.shared)
+    prefix_dir = os.path.join(outdir, prefix)
+    outputs = [os.path.join(prefix_dir, upper_camel(name) + ".h") for name in schemas.keys()]
+    outputs.append(os.path.join(prefix_dir, "messages.h"))
+    outputs.append(os.path.join(prefix_dir, "fwd.h"))
+    for header_name in sorted(channel_headers(channels, schemas).keys()):
+        outputs.append(os.path.join(prefix_dir, "channels", header_name + ".h"))
+    if len(channel_routes(channels, schemas, symbols)) > 0:
+        outputs.append(os.path.join(prefix_dir, "dispatcher.h"))
+    if options.out_of_line:
+        outputs = outputs + [os.path.join(prefix_dir, upper_camel(name) + ".cpp") for name in schemas.keys()]
+    if options.benchmark:
+        outputs.append(os.path.join(prefix_dir, "benchmark.cpp"))
+    return outputs
+
+
+def ref_strings(definition):
+    refs = []
+    pending = [definition]
+    while len(pending) > 0:
+        value = pending.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key == "$ref" and isinstance(item, str):
+                    refs.append(item)
+                elif isinstance(item, (dict, list)):
+                    pending.append(item)
+        elif isinstance(value, list):
+            pending.extend(item for item in value if isinstance(item, (dict, list)))
+    return refs
+
+
+def find_refs(definition):
+    return set(upper_camel(ref.split("/")[-1]) for ref in ref_strings(definition))
+
+
+def generator_hash():
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# The strongly connected components of a dependency graph, each listed after
+# the components it depends on.
+def dependency_components(deps):
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for root in deps.keys():
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(sorted(deps[root])))]
+        while len(work) > 0:
+            node, children = work[-1]
+            child = next(children, None)
+            if child is not None:
+                if child not in deps:
+                    continue
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(deps[child]))))
+                elif child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+                continue
+            work.pop()
+            if len(work) > 0:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.remove(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+    return components
+
+
+# Hash each schema together with everything it transitively references, so that
+# a change to a referenced schema also invalidates the headers that use it.  The
+# shared inline object shapes are hashed with every schema, since any schema
+# may use them, as are the prefixes of the imported schemas.  Schemas that
+# reference each other are hashed together, and every other dependency
+# contributes its own combined hash, so each schema is only hashed once however
+# long the chains of references are.
+def schema_hashes(schemas, prefix, options, shapes=None, imports=None, cache=None):
+    generator = [generator_hash(), vars(options), shapes or {}, imports or {}]
+    own_hashes = {}
+    deps = {}
+    cached = {}
+    if cache is not None:
+        if prefix in cache.hashes and cache.hashes[prefix][0] == generator:
+            cached = cache.hashes[prefix][1]
+        cache.hashes[prefix] = (generator, {})
+    for name, definition in schemas.items():
+        class_name = upper_camel(name)
+        entry = cached.get(name)
+        if entry is not None and (entry[0] is definition or entry[0] == definition):
+            own_hashes[class_name], deps[class_name] = entry[1], entry[2]
+        else:
+            content = json.dumps([generator, prefix, name, definition], sort_keys=True, default=str)
+            own_hashes[class_name] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            deps[class_name] = find_refs(definition)
+        if cache is not None:
+            cache.hashes[prefix][1][name] = (definition, own_hashes[class_name], deps[class_name])
+
+    hashes = {}
+    for component in dependency_components(deps):
+        members = set(component)
+        external = set()
+        for class_name in component:
+            external.update(dep for dep in deps[class_name] if dep in own_hashes and dep not in members)
+        content = ("".join(class_name + own_hashes[class_name] for class_name in component) +
+                   "".join(dep + hashes[dep]["hash"] for dep in sorted(external)))
+        component_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        for class_name in component:
+            hashes[class_name] = {
+                "hash": component_hash,
+                "deps": sorted(dep for dep in deps[class_name] if dep in own_hashes),
+            }
+    return hashes
+
+
+def load_manifest(prefix_dir):
+    manifest_path = os.path.join(prefix_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("schemas", {})
+
+
+# The manifest is written without indentation, since the pure Python encoder
+# used for indented JSON is slow on large specs.
+def save_manifest(prefix_dir, entries):
+    manifest_path = os.path.join(prefix_dir, MANIFEST_NAME)
+    with open(manifest_path, "w") as f:
+        f.write(json.dumps({"version": MANIFEST_VERSION, "schemas": entries}, sort_keys=True))
+        f.write("\n")
+
+
+# Worker processes receive the read-only symbol table once, when they start,
+# rather than with every header they generate.
+worker_symbols = None
+
+
+def init_worker(symbols):
+    global worker_symbols
+    worker_symbols = symbols
+
+
+def generate_header(job, symbols):
+    name, definition, prefix, options, header_path, only_if_changed, common_prefix = job
+    source = [] if options.out_of_line else None
+    if common_prefix is not None:
+        header = build_import_header(name, prefix, common_prefix)
+    else:
+        header = build_header(name, definition, prefix, symbols, options, source)
+    files = [(header_path, '\n'.join(header))]
+    if source is not None:
+        files.append((source_path(header_path), '\n'.join(build_source(name, prefix, source))))
+    length = 0
+    written = False
+    for path, src in files:
+        length = length + len(src.splitlines())
+        if only_if_changed:
+            written = write_if_changed(path, src) or written
+        else:
+            with open(path, 'w') as f:
+                f.write(src)
+            written = True
+    return length, written
+
+
+def source_path(header_path):
+    return os.path.splitext(header_path)[0] + ".cpp"
+
+
+def generate_header_worker(job):
+    return generate_header(job, worker_symbols)
+
+
+# State kept in memory between the runs of watch mode: the symbol table, the
+# schema hashes and the manifest of each prefix, and the inputs of its umbrella
+# headers, which are only rebuilt when those change.
+class GenerationCache:
+    def __init__(self):
+        self.symbols = {}
+        self.hashes = {}
+        self.manifests = {}
+        self.umbrella = {}
+
+
+# Schemas named in imports are generated in the prefix they are mapped to, and
+# only aliased in this one.
+def generate(schemas, prefix, outdir, options=None, incremental=False, jobs=1, channels=None, imports=None,
+             cache=None):
+    if options is None:
+        options = GeneratorOptions()
+    prefix_dir = os.path.join(outdir, prefix)
+    os.makedirs(prefix_dir, exist_ok=True)
+
+    symbols = None
+    if cache is not None and prefix in cache.symbols:
+        cached_schemas, cached_options, cached_symbols = cache.symbols[prefix]
+        if cached_options == vars(options) and cached_schemas == schemas:
+            symbols = cached_symbols
+    if symbols is None:
+        symbols = SymbolTable(schemas, options)
+        if cache is not None:
+            cache.symbols[prefix] = (dict(schemas), dict(vars(options)), symbols)
+    schemas = dict(schemas, **symbols.shared)
+
+    previous = {}
+    hashes = {}
+    if incremental:
+        if cache is not None and prefix_dir in cache.manifests:
+            previous = cache.manifests[prefix_dir]
+        else:
+            previous = load_manifest(prefix_dir)
+        hashes = schema_hashes(schemas, prefix, options, symbols.shapes, imports, cache)
+
+    # generate headers
+    stats = {"lines": 0, "written": 0, "unchanged": 0, "removed": 0}
+    header_jobs = []
+    messages_header = []
+    messages_header.append("#pragma once")
+    messages_header.append("\n/* This file was auto-generated. */\n")
+    for name, definition in schemas.items():
+        class_name = upper_camel(name)
+        header_path = os.path.join(prefix_dir, class_name + ".h")
+        messages_header.append("#include <" + prefix + "/" + class_name + ".h>")
+        if incremental:
+            entry = previous.get(class_name, {})
+            if (entry.get("hash") == hashes[class_name]["hash"] and os.path.exists(header_path) and
+                    (not options.out_of_line or os.path.exists(source_path(header_path)))):
+                stats["unchanged"] = stats["unchanged"] + 1
+                continue
+        header_jobs.append((name, definition, prefix, options, header_path, incremental,
+                            (imports or {}).get(name)))
+
+    if jobs > 1 and len(header_jobs) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(symbols,)) as executor:
+            chunksize = max(1, len(header_jobs) // (4 * jobs))
+            results = list(executor.map(generate_header_worker, header_jobs, chunksize=chunksize))
+    else:
+        results = [generate_header(job, symbols) for job in header_jobs]
+
+    for length, header_written in results:
+        stats["lines"] = stats["lines"] + length
+        if header_written:
+            stats["written"] = stats["written"] + 1
+        else:
+            stats["unchanged"] = stats["unchanged"] + 1
+    stats["lines"] = stats["lines"] + len(messages_header)
+
+    messages_header_path = os.path.join(prefix_dir, "messages.h")
+    if incremental:
+        write_if_changed(messages_header_path, '\n'.join(messages_header))
+
+        # remove headers and sources for schemas that no longer exist
+        for class_name in sorted(set(previous.keys()) - set(hashes.keys())):
+            header_path = os.path.join(prefix_dir, class_name + ".h")
+            if os.path.exists(header_path):
+                os.remove(header_path)
+                stats["removed"] = stats["removed"] + 1
+            if os.path.exists(source_path(header_path)):
+                os.remove(source_path(header_path))
+        save_manifest(prefix_dir, hashes)
+        if cache is not None:
+            cache.manifests[prefix_dir] = hashes
+    else:
+        with open(messages_header_path, 'w') as f:
+            f.write('\n'.join(messages_header))
+
+    # forward declarations and per channel umbrella headers, unless they were
+    # already generated from the same inputs
+    umbrella_inputs = [channels, list(schemas.keys()), imports, symbols.types, symbols.enums, dict(vars(options)),
+                       schemas if options.benchmark else None]
+    if cache is not None and prefix_dir in cache.umbrella:
+        cached_inputs, cached_lines, cached_paths = cache.umbrella[prefix_dir]
+        if cached_inputs == umbrella_inputs and all(os.path.exists(path) for path in cached_paths):
+            stats["lines"] = stats["lines"] + cached_lines
+            return stats
+
+    umbrella_headers = {
+        os.path.join(prefix_dir, "fwd.h"): build_forward_declarations(schemas, prefix, symbols, options, imports)
+    }
+    channels_dir = os.path.join(prefix_dir, "channels")
+    for header_name, types in channel_headers(channels, schemas).items():
+        umbrella_headers[os.path.join(channels_dir, header_name + ".h")] = build_channel_header(prefix, types)
+    if len(umbrella_headers) > 1:
+        os.makedirs(channels_dir, exist_ok=True)
+    if incremental and os.path.isdir(channels_dir):
+        for file_name in sorted(os.listdir(channels_dir)):
+            if os.path.join(channels_dir, file_name) not in umbrella_headers:
+                os.remove(os.path.join(channels_dir, file_name))
+
+    # dispatcher of the messages received on the channels
+    dispatcher_path = os.path.join(prefix_dir, "dispatcher.h")
+    routes = channel_routes(channels, schemas, symbols)
+    if len(routes) > 0:
+        umbrella_headers[dispatcher_path] = build_dispatcher(prefix, routes)
+    elif incremental and os.path.exists(dispatcher_path):
+        os.remove(dispatcher_path)
+
+    # benchmark of the generated code on sample messages
+    benchmark_path = os.path.join(prefix_dir, "benchmark.cpp")
+    if options.benchmark:
+        umbrella_headers[benchmark_path] = build_benchmark(prefix, schemas, symbols, imports)
+    elif incremental and os.path.exists(benchmark_path):
+        os.remove(benchmark_path)
+    umbrella_lines = 0
+    for header_path, lines in umbrella_headers.items():
+        umbrella_lines = umbrella_lines + len(lines)
+        if incremental:
+            write_if_changed(header_path, '\n'.join(lines))
+        else:
+            with open(header_path, 'w') as f:
+                f.write('\n'.join(lines))
+    stats["lines"] = stats["lines"] + umbrella_lines
+    if cache is not None:
+        cache.umbrella[prefix_dir] = (umbrella_inputs, umbrella_lines, list(umbrella_headers.keys()))
+
+    return stats
+
+
+def depfile_escape(path):
+    return path.replace("\\", "/").replace("$", "$$").replace("#", "\\#").replace(" ", "\\ ")
+
+
+def write_depfile(path, target, inputs):
+    lines = ["{}:".format(depfile_escape(target))]
+    for input_path in inputs:
+        lines.append("  {}".format(depfile_escape(input_path)))
+    with open(path, "w") as f:
+        f.write(" \\\n".join(lines) + "\n")
+
+
+# Parse a JSON or YAML spec.  YAML is parsed with the libyaml based loader when
+# PyYAML was built with it, which is many times faster than the pure Python one.
+def parse_spec(content, path):
+    if path.lower().endswith(".json"):
+        return json.loads(content)
+    return yaml.load(content, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+# Load a spec file, reusing the spec parsed by a previous run if the cache
+# directory holds one for the same file contents.  Entries are named after
+# hashes of the absolute path of the file and of its contents, so that specs
+# with the same file name in different directories don't replace each other's
+# entries.  The cache stores JSON, so specs with values that JSON can't
+# represent as they are, such as YAML timestamps, are not cached.
+def load_spec(path, cache_dir=None):
+    with open(path, "rb") as f:
+        content = f.read()
+    if cache_dir is None:
+        return parse_spec(content, path)
+
+    path_hash = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, "{}-{}.json".format(path_hash, hashlib.sha256(content).hexdigest()))
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        if cached.get("version") == SPEC_CACHE_VERSION:
+            return cached["spec"]
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    spec = parse_spec(content, path)
+    try:
+        cached = json.dumps({"version": SPEC_CACHE_VERSION, "spec": spec})
+    except (TypeError, ValueError):
+        return spec
+    if json.loads(cached)["spec"] != spec:
+        return spec
+
+    # replace the entries of previous versions of the file
+    os.makedirs(cache_dir, exist_ok=True)
+    for file_name in os.listdir(cache_dir):
+        if match(r"^{}-[0-9a-f]{{64}}\.json$".format(path_hash), file_name):
+            os.remove(os.path.join(cache_dir, file_name))
+    with open(cache_path + ".tmp", "w") as f:
+        f.write(cached)
+    os.replace(cache_path + ".tmp", cache_path)
+    return spec
+
+
+# Documents referenced by the specs of a batch, each loaded once however many
+# specs reference it.  The modification time of each document is recorded when
+# it is loaded, or None if it couldn't be read, so that watch mode can tell
+# which documents to load again.
+class DocumentLoader:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.documents = {}
+        self.mtimes = {}
+        self.refs = {}
+
+    def load(self, path):
+        path = os.path.abspath(path)
+        if path not in self.documents:
+            try:
+                self.mtimes[path] = os.stat(path).st_mtime_ns
+                self.documents[path] = load_spec(path, self.cache_dir)
+            except OSError as exc:
+                self.mtimes[path] = None
+                raise RefError("Failed to load {}: {}".format(path, exc.strerror))
+        return self.documents[path]
+
+    # The current modification times of the documents that changed since they
+    # were loaded.
+    def changed(self):
+        changed = {}
+        for path, mtime in self.mtimes.items():
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                changed[path] = current
+        return changed
+
+    def forget(self, paths):
+        for path in paths:
+            self.documents.pop(path, None)
+            self.mtimes.pop(path, None)
+            self.refs.pop(path, None)
+
+    # The `$ref`s of a loaded document.
+    def ref_strings(self, path):
+        path = os.path.abspath(path)
+        if path not in self.refs:
+            self.refs[path] = ref_strings(self.load(path))
+        return self.refs[path]
+
+
+# The document and JSON pointer of a `$ref`, relative to the document holding
+# it.
+def split_ref(ref, base_path):
+    file_part, _, pointer = ref.partition("#")
+    if len(file_part) == 0:
+        return os.path.abspath(base_path), pointer
+    return os.path.abspath(os.path.join(os.path.dirname(base_path), file_part)), pointer
+
+
+def resolve_pointer(document, pointer, ref):
+    value = document
+    for token in pointer.split("/")[1:]:
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(value, dict) and token in value:
+            value = value[token]
+        elif isinstance(value, list) and token.isdigit() and int(token) < len(value):
+            value = value[int(token)]
+        else:
+            raise RefError("Unresolved reference: {}".format(ref))
+    if not isinstance(value, dict):
+        raise RefError("Reference to a non-schema value: {}".format(ref))
+    return value
+
+
+def spec_schemas(spec):
+    schemas = dict(spec["components"].get("schemas") or {})
+    schemas.update(spec["components"].get("messages") or {})
+    return schemas
+
+
+# The schemas of other documents that a spec references, along with the
+# schemas that they reference in turn, keyed by name.  References are matched
+# to schemas by the last part of their pointer, so a name may only refer to a
+# single schema.
+def external_schemas(spec, spec_path, loader):
+    spec_path = os.path.abspath(spec_path)
+    local = set(upper_camel(name) for name in spec_schemas(spec).keys())
+    imports = {}
+    origins = {}
+    pending = [(spec_path, ref) for ref in loader.ref_strings(spec_path)]
+    while len(pending) > 0:
+        base_path, ref = pending.pop()
+        path, pointer = split_ref(ref, base_path)
+        if path == spec_path:
+            continue
+        name = pointer.split("/")[-1]
+        class_name = upper_camel(name)
+        if class_name in local:
+            raise RefError("{} refers to {}, which has the same name as a schema of {}".format(
+                ref, class_name, spec_path))
+        if class_name in origins:
+            if origins[class_name] != (path, pointer):
+                raise RefError("{} refers to both {}#{} and {}#{}".format(
+                    class_name, origins[class_name][0], origins[class_name][1], path, pointer))
+            continue
+        definition = resolve_pointer(loader.load(path), pointer, ref)
+        origins[class_name] = (path, pointer)
+        imports[name] = definition
+        pending.extend((path, nested) for nested in ref_strings(definition))
+    return imports, origins
+
+
+# The schemas, prefix, channels and imports to generate for each of a list of
+# (spec, prefix) pairs.  With a common prefix, the schemas that the specs
+# reference in other files are generated once with that prefix, ahead of the
+# specs.
+def plan_batch(specs, loader, common_prefix=None):
+    batch = []
+    common_schemas = {}
+    common_origins = {}
+    for spec_path, prefix in specs:
+        spec = loader.load(spec_path)
+        if "components" not in spec.keys():
+            print("No components to generate." if len(specs) == 1 else
+                  "No components to generate in {}.".format(spec_path))
+            continue
+
+        schemas = spec_schemas(spec)
+        imports, origins = external_schemas(spec, spec_path, loader)
+        schemas.update(imports)
+        if common_prefix is not None:
+            for class_name, origin in origins.items():
+                if common_origins.setdefault(class_name, origin) != origin:
+                    raise RefError("{} refers to both {}#{} and {}#{}".format(
+                        class_name, common_origins[class_name][0], common_origins[class_name][1],
+                        origin[0], origin[1]))
+            common_schemas.update(imports)
+            imports = {name: common_prefix for name in imports.keys()}
+        else:
+            imports = None
+        batch.append((schemas, prefix, spec.get("channels"), imports))
+
+    if len(common_schemas) > 0:
+        batch.insert(0, (common_schemas, common_prefix, None, None))
+    return batch
+
+
+def generate_batch(batch, outdir, options, incremental=False, jobs=1, cache=None):
+    stats = {"lines": 0, "written": 0, "unchanged": 0, "removed": 0}
+    for schemas, prefix, channels, imports in batch:
+        spec_stats = generate(schemas, prefix, outdir, options=options, incremental=incremental, jobs=jobs,
+                              channels=channels, imports=imports, cache=cache)
+        for key, value in spec_stats.items():
+            stats[key] = stats[key] + value
+    return stats
+
+
+# Regenerate the specs whenever one of the documents they were generated from
+# changes, until interrupted.  Only the documents that changed are parsed
+# again, and the symbol tables, schema hashes and umbrella headers of the last
+# run are reused where their inputs are the same, so each change only costs
+# building the headers of the schemas it affects.
+def watch(specs, outdir, options, loader, common_prefix=None, jobs=1, interval=0.5):
+    cache = GenerationCache()
+    changed = True
+    while True:
+        if changed:
+            start = time.monotonic()
+            try:
+                stats = generate_batch(plan_batch(specs, loader, common_prefix), outdir, options,
+                                       incremental=True, jobs=jobs, cache=cache)
+                print("Headers written: {}, unchanged: {}, removed: {} in {:.3f}s".format(
+                    stats["written"], stats["unchanged"], stats["removed"], time.monotonic() - start), flush=True)
+            except (RefError, TypeCycleError) as exc:
+                print(str(exc), file=sys.stderr, flush=True)
+            except (yaml.YAMLError, ValueError) as exc:
+                print('Failed to parse AsyncAPI specification file:\n{}'.format(exc), file=sys.stderr, flush=True)
+        time.sleep(interval)
+        changed = loader.changed()
+        # wait for the files to be completely written before loading them
+        while len(changed) > 0:
+            time.sleep(interval)
+            settled = loader.changed()
+            if settled == changed:
+                break
+            changed = settled
+        loader.forget(changed.keys())
+
+
+# Leave files that already hold the generated text untouched to preserve their
+# modification time.
+def write_if_changed(path, src):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            if f.read() == src:
+                return False
+    with open(path, "w") as f:
+        f.write(src)
+    return True
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("spec", help="AsyncAPI specification file")
     parser.add_argument("prefix", help="Include file prefix")
     parser.add_argument("outdir", help="Output directory")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only regenerate headers whose schemas changed since the last run")
+    parser.add_argument("--list-outputs", action="store_true",
+                        help="Print the ';' separated list of headers that would be generated and exit")
+    parser.add_argument("--depfile", metavar="FILE",
+                        help="Write a Makefile style depfile listing the input files that were read")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="Number of processes used to generate headers")
+    parser.add_argument("--spec", nargs=2, action="append", default=[], metavar=("SPEC", "PREFIX"),
+                        dest="specs", help="Generate another spec with its own include file prefix in the same run")
+    parser.add_argument("--common-prefix", metavar="PREFIX",
+                        help="Generate the schemas that specs reference in other files once, with this prefix")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and regenerate the headers affected by each change to the specs")
+    parser.add_argument("--watch-interval", type=float, default=0.5, metavar="SECONDS",
+                        help="How often watch mode checks the specs for changes")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="Cache the parsed spec in DIR so that later runs on the same spec skip parsing it")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Parse JSON strings in a single pass without building a json document")
+    parser.add_argument("--serializer", action="store_true",
+                        help="Generate serialize() methods that write JSON text without building a json document")
+    parser.add_argument("--enum-classes", action="store_true",
+                        help="Generate enum classes for string enums instead of validating std::string values")
+    parser.add_argument("--validate", action="store_true",
+                        help="Generate fromJsonValidated() methods that check constraints while parsing")
+    parser.add_argument("--binary", action="store_true",
+                        help="Generate CBOR and MessagePack encoders and decoders")
+    parser.add_argument("--out-of-line", action="store_true",
+                        help="Generate a .cpp file per header with the definitions of its member functions")
+    parser.add_argument("--views", action="store_true",
+                        help="Generate View classes that decode members from the JSON text on demand")
+    parser.add_argument("--pmr", action="store_true",
+                        help="Generate std::pmr strings and vectors and constructors that take an allocator")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Generate a single struct for inline objects with the same shape")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Report the calls of fromJson(), toJson(), dump() and isValid() to compile time hooks")
+    parser.add_argument("--delta", action="store_true",
+                        help="Generate operator==, std::hash and JSON merge patch diff() and applyPatch() methods")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Generate a benchmark.cpp that times decoding, encoding and validating sample messages")
 
     args = parser.parse_args()
     specfile = args.spec
@@ -580,53 +2870,63 @@ if __name__ == "__main__":
     if not os.path.isdir(outdir):
         sys.exit('Output directory: [{}] does not exist'.format(outdir))
 
-    spec = None
-    with open(specfile, "r") as f:
-        try:
-            spec = yaml.safe_load(f)
-        except yaml.YAMLError as exc:
-            sys.exit('Failed to parse AsyncAPI specification file:\n{}'.format(exc))
-
-    if "components" not in spec.keys():
-        print("No components to generate.")
-        sys.exit(0)
+    if args.jobs < 1:
+        sys.exit('Number of jobs must be at least 1')
 
-    schemas = {}
-    if "schemas" in spec["components"]:
-        schemas = spec["components"]["schemas"]
+    if args.watch and args.list_outputs:
+        sys.exit('--watch and --list-outputs can not be used together')
 
-    if "messages" in spec["components"]:
-        schemas.update(spec["components"]["messages"])
+    options = GeneratorOptions(streaming=args.streaming, serializer=args.serializer,
+                               enum_classes=args.enum_classes, validate=args.validate,
+                               binary=args.binary, out_of_line=args.out_of_line, views=args.views,
+                               pmr=args.pmr, dedupe=args.dedupe, instrument=args.instrument,
+                               delta=args.delta, benchmark=args.benchmark)
 
-    prefix_dir = os.path.join(outdir, args.prefix)
-    os.makedirs(prefix_dir, exist_ok=True)
+    specs = [(specfile, args.prefix)] + [tuple(entry) for entry in args.specs]
+    prefixes = [prefix for _, prefix in specs] + ([args.common_prefix] if args.common_prefix else [])
+    if len(set(prefixes)) != len(prefixes):
+        sys.exit('Each spec and the common schemas must be generated with a different prefix')
 
-    total_lines = 0
+    loader = DocumentLoader(args.cache_dir)
+    if args.watch:
+        try:
+            watch(specs, outdir, options, loader, args.common_prefix, args.jobs, args.watch_interval)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
 
-    # pre-initialize typedefs
-    for name, definition in schemas.items():
-        init_typedefs(name, definition)
-        class_name = upper_camel(name)
-        components[class_name] = definition
+    try:
+        batch = plan_batch(specs, loader, args.common_prefix)
+    except RefError as exc:
+        sys.exit(str(exc))
+    except (yaml.YAMLError, ValueError) as exc:
+        sys.exit('Failed to parse AsyncAPI specification file:\n{}'.format(exc))
 
-    # generate headers
-    messages_header = []
-    messages_header.append("#pragma once")
-    messages_header.append("\n/* This file was auto-generated. */\n")
-    for name, definition in schemas.items():
-        header_src = build_header(name, definition, args.prefix)
-        class_name = upper_camel(name)
-        header_path = os.path.join(prefix_dir, class_name + ".h")
-        messages_header.append("#include <" + args.prefix + "/" + class_name + ".h>")
-        with open(header_path, 'w') as f:
-            src = '\n'.join(header_src)
-            f.write(src)
-            length = len(src.splitlines())
-            total_lines = total_lines + length
-    total_lines = total_lines + len(messages_header)
+    if len(batch) == 0:
+        sys.exit(0)
 
-    messages_header_path = os.path.join(prefix_dir, "messages.h")
-    with open(messages_header_path, 'w') as f:
-        f.write('\n'.join(messages_header))
+    prefix_dir = os.path.join(outdir, args.prefix)
+    try:
+        if args.list_outputs:
+            outputs = []
+            for schemas, prefix, channels, imports in batch:
+                outputs = outputs + list_outputs(schemas, prefix, outdir, options, channels)
+            print(";".join(os.path.abspath(output) for output in outputs))
+            sys.exit(0)
+
+        stats = generate_batch(batch, outdir, options, incremental=args.incremental, jobs=args.jobs)
+    except TypeCycleError as exc:
+        sys.exit(str(exc))
+
+    if args.incremental:
+        print("\n\n Headers written: {}, unchanged: {}, removed: {}".format(
+            stats["written"], stats["unchanged"], stats["removed"]))
+
+    if args.depfile:
+        if args.incremental:
+            target = os.path.join(prefix_dir, MANIFEST_NAME)
+        else:
+            target = os.path.join(prefix_dir, "messages.h")
+        write_depfile(args.depfile, os.path.abspath(target), sorted(loader.documents.keys()))
 
-    print("\n\n Total lines generated: {}".format(total_lines))
+    print("\n\n Total lines generated: {}".format(stats["lines"]))
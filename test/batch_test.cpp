@@ -0,0 +1,76 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// The robot and arm specs generated in one run share the schemas the arm spec
+// references in robot.yaml, which are generated once under the common prefix
+// and aliased in the namespace of the arm spec.
+
+#include <type_traits>
+
+#include <check.h>
+#include <test/arm/messages.h>
+#include <test/msg/messages.h>
+
+static_assert(std::is_same<test::arm::Vector3, test::common::Vector3>::value, "shared with the common prefix");
+static_assert(std::is_same<test::arm::Header, test::common::Header>::value, "shared with the common prefix");
+
+const char* JOINT_STATE = R"({
+  "header": {"stamp": 2.5, "frameId": "base", "seq": 3},
+  "joints": [
+    {"name": "shoulder", "position": 0.5, "axis": {"x": 0, "y": 0, "z": 1}},
+    {"name": "elbow", "position": -1}
+  ],
+  "tool": {"x": 1, "y": 2, "z": 3}
+})";
+
+int main() {
+  test::arm::JointState state;
+  CHECK(test::arm::JointState::fromJson(std::string(JOINT_STATE), state));
+  CHECK(state.isValid());
+  CHECK(json::parse(state.dump()) == json::parse(JOINT_STATE));
+  CHECK(state.header.frame_id == "base");
+  CHECK(state.joints.size() == 2 && state.joints[0].axis->z == 1 && !state.joints[1].axis);
+
+  // the common types are used as is
+  test::common::Vector3 tool;
+  CHECK(test::common::Vector3::fromJson(std::string(R"({"x": 4, "y": 5, "z": 6})"), tool));
+  state.tool = tool;
+  state.joints[1].axis = tool;
+  CHECK(state.toJson()["joints"][1]["axis"] == tool.toJson());
+
+  // with the constraints of the referenced schema
+  state.header.frame_id = std::string(33, 'b');
+  CHECK(!state.isValid());
+  CHECK(!test::arm::JointState::fromJson(std::string(R"({"header": {}, "joints": [], "tool": {}})"), state));
+
+  // the robot spec still decodes its own messages
+  test::msg::PoseStamped pose;
+  CHECK(!test::msg::PoseStamped::fromJson(std::string(JOINT_STATE), pose));
+  return test::failures();
+}
@@ -0,0 +1,75 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// toCbor() and toMsgPack() write the same bytes as nlohmann's encoders of
+// toJson(), which fromCbor() and fromMsgPack() read back, including objects
+// without members.
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+template <typename T>
+void checkRoundTrip(const T& value) {
+  json document = value.toJson();
+
+  std::vector<uint8_t> cbor = value.toCbor();
+  CHECK(cbor == json::to_cbor(document));
+  T from_cbor;
+  CHECK(T::fromCbor(cbor, from_cbor));
+  CHECK(from_cbor.toJson() == document);
+
+  std::vector<uint8_t> msgpack = value.toMsgPack();
+  CHECK(msgpack == json::to_msgpack(document));
+  T from_msgpack;
+  CHECK(T::fromMsgPack(msgpack, from_msgpack));
+  CHECK(from_msgpack.toJson() == document);
+}
+
+int main() {
+  checkRoundTrip(Empty());
+  checkRoundTrip(Status());
+  CHECK(Empty().toCbor() == std::vector<uint8_t>{0xA0});
+  CHECK(Empty().toMsgPack() == std::vector<uint8_t>{0x80});
+
+  Sparse sparse;
+  checkRoundTrip(sparse);
+  sparse.inner.emplace();
+  sparse.blank.emplace();
+  sparse.points.resize(2);
+  checkRoundTrip(sparse);
+  sparse.name = "name";
+  sparse.count = -300;
+  sparse.inner->flag = false;
+  sparse.points[0].value = 0.1;
+  sparse.points[1].value = 1.5;
+  checkRoundTrip(sparse);
+  return test::failures();
+}
@@ -0,0 +1,107 @@
+# Copyright (c) 2022, Hatchbed
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Helpers for the tests, which generate code from the specs in test/specs and
+# compile it along with a test program from test/ that exits with an error if
+# a check fails.  The tests are skipped without a C++17 compiler and the
+# nlohmann json headers, which are looked up on the default include path of
+# the compiler and in NLOHMANN_JSON_INCLUDE_DIR.
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TEST_DIR)
+GENERATOR = os.path.join(ROOT_DIR, "src", "asyncapi_gencpp.py")
+INCLUDE_DIR = os.path.join(ROOT_DIR, "include")
+PREFIX = "test/msg"
+
+
+class Compiler:
+    def __init__(self, command, flags):
+        self.command = command
+        self.flags = flags
+
+    def compile(self, args):
+        return subprocess.run([self.command] + self.flags + args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              universal_newlines=True)
+
+    # Build the test program source against the code generated in outdir,
+    # including the member function definitions of --out-of-line for each of
+    # the prefixes.
+    def build(self, source, outdir, output, prefixes=(PREFIX,)):
+        sources = [os.path.join(TEST_DIR, source)]
+        for prefix in prefixes:
+            prefix_dir = os.path.join(outdir, prefix)
+            for file_name in sorted(os.listdir(prefix_dir)):
+                if file_name.endswith(".cpp") and file_name != "benchmark.cpp":
+                    sources.append(os.path.join(prefix_dir, file_name))
+        return self.link(sources, outdir, output)
+
+    def link(self, sources, outdir, output):
+        result = self.compile(["-I", str(outdir), "-I", TEST_DIR] + sources + ["-o", str(output)])
+        assert result.returncode == 0, result.stdout
+        return str(output)
+
+
+@pytest.fixture(scope="session")
+def compiler(tmp_path_factory):
+    command = os.environ.get("CXX") or shutil.which("c++") or shutil.which("g++") or shutil.which("clang++")
+    if command is None:
+        pytest.skip("no C++ compiler found")
+    flags = ["-std=c++17", "-O1", "-Wall", "-I", INCLUDE_DIR]
+    if os.environ.get("NLOHMANN_JSON_INCLUDE_DIR"):
+        flags = flags + ["-isystem", os.environ["NLOHMANN_JSON_INCLUDE_DIR"]]
+    probe = tmp_path_factory.mktemp("probe") / "probe.cpp"
+    probe.write_text("#include <nlohmann/json.hpp>\nint main() {}\n")
+    result = Compiler(command, flags).compile(["-fsyntax-only", str(probe)])
+    if result.returncode != 0:
+        pytest.skip("nlohmann json not found, set NLOHMANN_JSON_INCLUDE_DIR")
+    return Compiler(command, flags)
+
+
+def spec_path(name):
+    return os.path.join(TEST_DIR, "specs", name)
+
+
+# Run the generator on a spec from test/specs, returning the output directory.
+def generate(spec, outdir, options=()):
+    subprocess.run([sys.executable, GENERATOR, spec_path(spec), PREFIX, str(outdir)] + list(options),
+                   check=True, stdout=subprocess.DEVNULL)
+    return str(outdir)
+
+
+def run(program, args=()):
+    result = subprocess.run([program] + list(args), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            universal_newlines=True)
+    assert result.returncode == 0, result.stdout
+    return result.stdout
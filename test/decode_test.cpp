@@ -0,0 +1,106 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// fromJson() returns false rather than throwing for values of the wrong type,
+// from a parsed document as well as from the JSON text.
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+const json POSE_STAMPED = json::parse(R"({
+  "header": {"stamp": 1.5, "frameId": "map", "seq": 7},
+  "pose": {
+    "position": {"x": 1, "y": 2, "z": 3},
+    "orientation": {"w": 1, "x": 0, "y": 0, "z": 0},
+    "covariance": [1, 0, 0, 1],
+    "corners": [{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 1, "z": 1}]
+  }
+})");
+
+const json STATUS = json::parse(R"({
+  "name": "r2", "mode": "driving", "battery": 0.5,
+  "tags": ["left", "front"], "errors": [{"code": 3, "text": "stuck"}]
+})");
+
+const json SCAN = json::parse(R"({
+  "id": 4000000000, "seq": -9000000000, "ranges": [0.5, 1.25], "gain": -2,
+  "bytes": [1, 2, 3, 255], "origin": {"x": 1, "y": 2}
+})");
+
+template <typename T>
+bool decodes(const json& document) {
+  T from_document;
+  T from_text;
+  bool decoded = T::fromJson(document, from_document);
+  CHECK(T::fromJson(document.dump(), from_text) == decoded);
+  return decoded;
+}
+
+// The document with the value at pointer replaced.
+json with(json document, const char* pointer, const json& value) {
+  document[json::json_pointer(pointer)] = value;
+  return document;
+}
+
+int main() {
+  CHECK(decodes<PoseStamped>(POSE_STAMPED));
+  CHECK(decodes<Status>(STATUS));
+  CHECK(decodes<Scan>(SCAN));
+
+  CHECK(!decodes<Status>(with(STATUS, "/name", 5)));
+  CHECK(!decodes<Status>(with(STATUS, "/mode", 5)));
+  CHECK(!decodes<Status>(with(STATUS, "/battery", "full")));
+  CHECK(!decodes<Status>(with(STATUS, "/tags", "left")));
+  CHECK(!decodes<Status>(with(STATUS, "/tags/1", 1)));
+  CHECK(!decodes<Status>(with(STATUS, "/errors/0/code", "3")));
+  CHECK(!decodes<Status>(with(STATUS, "/errors/0/text", false)));
+  CHECK(!decodes<Status>(with(STATUS, "/errors/0", 3)));
+
+  CHECK(!decodes<PoseStamped>(with(POSE_STAMPED, "/header/stamp", "now")));
+  CHECK(!decodes<PoseStamped>(with(POSE_STAMPED, "/header/seq", "7")));
+  CHECK(!decodes<PoseStamped>(with(POSE_STAMPED, "/pose/position/x", nullptr)));
+  CHECK(!decodes<PoseStamped>(with(POSE_STAMPED, "/pose/orientation", json::array())));
+  CHECK(!decodes<PoseStamped>(with(POSE_STAMPED, "/pose/covariance/2", "0")));
+  CHECK(!decodes<PoseStamped>(with(POSE_STAMPED, "/pose/corners/1/z", json::object())));
+
+  CHECK(!decodes<Scan>(with(SCAN, "/id", "4")));
+  CHECK(!decodes<Scan>(with(SCAN, "/id", -1)));
+  CHECK(!decodes<Scan>(with(SCAN, "/seq", true)));
+  CHECK(!decodes<Scan>(with(SCAN, "/ranges/0", "far")));
+  CHECK(!decodes<Scan>(with(SCAN, "/gain", "low")));
+  CHECK(!decodes<Scan>(with(SCAN, "/bytes/3", 256)));
+  CHECK(!decodes<Scan>(with(SCAN, "/bytes/0", "1")));
+  CHECK(!decodes<Scan>(with(SCAN, "/origin/y", "2")));
+
+  CHECK(!decodes<Status>(json::array()));
+  CHECK(!decodes<Scan>(json(5)));
+  return test::failures();
+}
@@ -0,0 +1,78 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// With --dedupe, inline objects of the same shape share one struct, as do
+// inline objects with the shape of a component schema and that schema, and
+// the shared structs decode and encode like the nested structs they replace.
+
+#include <type_traits>
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+static_assert(std::is_same<Scan::Origin, ScanOrigin>::value, "repeated shape");
+static_assert(std::is_same<Scan::Target, ScanOrigin>::value, "repeated shape");
+static_assert(std::is_same<Pose::Velocity, Vector3>::value, "shape of a component schema");
+static_assert(!std::is_same<Pose::Orientation, Vector3>::value, "different shape");
+
+const char* SCAN = R"({
+  "id": 1, "seq": 2, "bytes": [1, 2, 3, 4], "ranges": [],
+  "origin": {"x": 1}, "target": {"x": 2, "y": -2}
+})";
+
+const char* POSE = R"({
+  "position": {"x": 1, "y": 2, "z": 3},
+  "orientation": {"w": 1, "x": 0, "y": 0, "z": 0},
+  "covariance": [1, 0, 0, 1],
+  "corners": [{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 1, "z": 1}],
+  "velocity": {"x": 0.5, "y": 0, "z": -0.5}
+})";
+
+int main() {
+  Scan scan;
+  CHECK(Scan::fromJson(std::string(SCAN), scan));
+  CHECK(json::parse(scan.dump()) == json::parse(SCAN));
+  CHECK(scan.origin->x == 1.0 && !scan.origin->y);
+  CHECK(scan.target->x == 2.0 && scan.target->y == -2.0);
+  scan.origin = scan.target;
+  CHECK(scan.toJson()["origin"] == scan.toJson()["target"]);
+  CHECK(!Scan::fromJson(std::string(R"({"id": 1, "seq": 2, "bytes": [1, 2, 3, 4], "target": {"x": "2"}})"), scan));
+
+  Pose pose;
+  CHECK(Pose::fromJson(std::string(POSE), pose));
+  CHECK(json::parse(pose.dump()) == json::parse(POSE));
+  pose.velocity = pose.position;
+  CHECK(pose.toJson()["velocity"] == pose.toJson()["position"]);
+  json no_z = json::parse(POSE);
+  no_z["velocity"].erase("z");
+  CHECK(!Pose::fromJson(no_z, pose));
+  return test::failures();
+}
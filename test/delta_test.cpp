@@ -0,0 +1,87 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// Structs without members present compare, hash, diff and patch like any
+// other, and encode as an empty object in every format.
+
+#include <unordered_set>
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+template <typename T>
+void checkEncoding(const T& value, const std::string& expected) {
+  CHECK(value.dump() == expected);
+  std::string text;
+  value.serialize(text);
+  CHECK(text == expected);
+  CHECK(value.toCbor() == json::to_cbor(json::parse(expected)));
+  CHECK(value.toMsgPack() == json::to_msgpack(json::parse(expected)));
+  T decoded;
+  CHECK(T::fromJson(text, decoded));
+  CHECK(decoded == value);
+  CHECK(decoded.hash() == value.hash());
+}
+
+int main() {
+  checkEncoding(Empty(), "{}");
+  checkEncoding(Status(), R"({"payload":{}})");
+  checkEncoding(Sparse(), R"({"points":[]})");
+
+  Sparse empty;
+  Sparse nested;
+  nested.inner.emplace();
+  nested.blank.emplace();
+  checkEncoding(nested, R"({"blank":{},"inner":{},"points":[]})");
+  CHECK(!(nested == empty));
+
+  std::unordered_set<Sparse> set{empty, nested, Sparse()};
+  CHECK(set.size() == 2);
+
+  CHECK(empty.diff(Sparse()) == json::object());
+  CHECK(Status().diff(Status()) == json::object());
+
+  json added = nested.diff(empty);
+  CHECK(added == json::parse(R"({"blank":{},"inner":{}})"));
+  Sparse patched;
+  CHECK(patched.applyPatch(added));
+  CHECK(patched == nested);
+
+  json removed = empty.diff(nested);
+  CHECK(removed == json::parse(R"({"blank":null,"inner":null})"));
+  CHECK(patched.applyPatch(removed));
+  CHECK(patched == empty);
+
+  Status status;
+  CHECK(status.applyPatch(json::parse(R"({"payload":{}})")));
+  CHECK(status == Status());
+  return test::failures();
+}
@@ -0,0 +1,118 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// The dispatcher passes the payloads of a channel to the handler of their
+// message type, and returns false rather than throwing for payloads that fail
+// to decode.
+
+#include <check.h>
+#include <test/msg/dispatcher.h>
+
+using namespace test::msg;
+
+const std::string STATUS = R"({
+  "name": "r2", "mode": "driving", "battery": 0.5, "tags": ["left"], "errors": []
+})";
+
+const std::string POSE_STAMPED = R"({
+  "header": {"stamp": 1.5},
+  "pose": {
+    "position": {"x": 1, "y": 2, "z": 3},
+    "orientation": {"w": 1, "x": 0, "y": 0, "z": 0},
+    "covariance": [1, 0, 0, 1],
+    "corners": [{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 1, "z": 1}]
+  }
+})";
+
+const std::string SCAN = R"({"id": 4, "seq": -9, "bytes": [1, 2, 3, 4]})";
+
+int main() {
+  Dispatcher dispatcher;
+  int statuses = 0;
+  int poses = 0;
+  int event_statuses = 0;
+  int event_poses = 0;
+  std::string name;
+  dispatcher.onRobotStatus([&](const Status& status) {
+    name = status.name;
+    statuses++;
+  });
+  dispatcher.onRobotPose([&](const PoseStamped& pose) {
+    CHECK(pose.pose.position.z == 3);
+    poses++;
+  });
+  dispatcher.onRobotEventsStatus([&](const Status&) { event_statuses++; });
+  dispatcher.onRobotEventsPoseStamped([&](const PoseStamped&) { event_poses++; });
+
+  Dispatcher::Channel channel;
+  CHECK(Dispatcher::channelFromName("robot/scan", channel) && channel == Dispatcher::Channel::RobotScan);
+  CHECK(Dispatcher::channelFromName("robot/pose", channel) && channel == Dispatcher::Channel::RobotPose);
+  CHECK(!Dispatcher::channelFromName("robot/posx", channel));
+  CHECK(!Dispatcher::channelFromName("robot/", channel));
+  CHECK(dispatcher.hasSubscriber("robot/status"));
+  CHECK(!dispatcher.hasSubscriber("robot/scan"));
+  CHECK(!dispatcher.hasSubscriber("robot/unknown"));
+
+  CHECK(dispatcher.dispatch("robot/status", STATUS));
+  CHECK(statuses == 1 && name == "r2");
+  CHECK(dispatcher.dispatch("robot/pose", "poseStamped", POSE_STAMPED));
+  CHECK(poses == 1);
+  CHECK(!dispatcher.dispatch("robot/pose", "status", POSE_STAMPED));
+  CHECK(!dispatcher.dispatch("robot/unknown", STATUS));
+  CHECK(!dispatcher.dispatch("robot/scan", SCAN));
+
+  // payloads that fail to decode
+  CHECK(!dispatcher.dispatch("robot/status", R"({"name": 5})"));
+  CHECK(!dispatcher.dispatch("robot/status", R"({"name": "r2", "mode": "idle", "battery": "full",
+                                                  "tags": [], "errors": []})"));
+  CHECK(!dispatcher.dispatch("robot/status", "{"));
+  CHECK(!dispatcher.dispatch("robot/status", ""));
+  CHECK(!dispatcher.dispatch("robot/pose", POSE_STAMPED.substr(0, POSE_STAMPED.size() - 2)));
+  CHECK(!dispatcher.dispatch(Dispatcher::Channel::RobotPose, R"({"header": {"stamp": "now"}})"));
+  CHECK(statuses == 1 && poses == 1);
+
+  // without a message name the message types of a channel are tried in turn
+  CHECK(dispatcher.dispatch("robot/events", STATUS));
+  CHECK(dispatcher.dispatch("robot/events", POSE_STAMPED));
+  CHECK(dispatcher.dispatch("robot/events", "status", STATUS));
+  CHECK(!dispatcher.dispatch("robot/events", "status", POSE_STAMPED));
+  CHECK(!dispatcher.dispatch("robot/events", R"({"name": 5, "header": {"stamp": "now"}})"));
+  CHECK(event_statuses == 2 && event_poses == 1);
+
+  int scans = 0;
+  dispatcher.onRobotScan([&](const Scan& scan) {
+    CHECK(scan.bytes[3] == 4);
+    scans++;
+  });
+  CHECK(dispatcher.dispatch("robot/scan", SCAN));
+  CHECK(!dispatcher.dispatch("robot/scan", R"({"id": "4", "seq": -9, "bytes": [1, 2, 3, 4]})"));
+  CHECK(!dispatcher.dispatch("robot/scan", R"({"id": 4, "seq": -9, "bytes": [1, 2, 3, 256]})"));
+  CHECK(scans == 1);
+  return test::failures();
+}
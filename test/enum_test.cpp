@@ -0,0 +1,99 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// With --enum-classes string enums decode with fromString() to the enumerator
+// of each value and to nothing else, and values in all caps don't collide with
+// macros of the same name.
+
+#include <cstdio>
+
+#define ERROR -1
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+template <typename T>
+void checkValues(size_t count) {
+  for (size_t i = 0; i < count; i++) {
+    T value = static_cast<T>(i);
+    T decoded;
+    CHECK(fromString(toString(value), decoded));
+    CHECK(decoded == value);
+  }
+}
+
+template <typename T>
+bool decodes(std::string_view name) {
+  T value;
+  return fromString(name, value);
+}
+
+int main() {
+  checkValues<State>(12);
+  checkValues<Mode>(4);
+  checkValues<Status::TagsItem>(4);
+
+  State state;
+  CHECK(fromString("NULL", state) && state == State::VNULL);
+  CHECK(fromString("EOF", state) && state == State::VEOF);
+  CHECK(fromString("ERROR", state) && state == State::VERROR);
+  CHECK(fromString("3d", state) && state == State::V3d);
+  CHECK(fromString("in-progress", state) && state == State::InProgress);
+  CHECK(fromString("a b", state) && state == State::AB);
+  CHECK(fromString("bc", state) && state == State::Bc);
+  CHECK(toString(State::Done) == "done");
+  CHECK(toString(State::VNULL) == "NULL");
+
+  Mode mode;
+  CHECK(fromString("error", mode) && mode == Mode::Error);
+
+  for (const char* name : {"", "a", "ad", "ba", "cb", "3D", "Null", "NULL ", "EO", "EOFF", "don", "DONE",
+                           "in_progress", "a  b", "ERRO", "ERRORS"}) {
+    CHECK(!decodes<State>(name));
+  }
+  CHECK(!decodes<Mode>("Idle"));
+  CHECK(!decodes<Status::TagsItem>("lef"));
+
+  Scan scan;
+  CHECK(Scan::fromJson(std::string(R"({"id": 4, "seq": -9, "bytes": [1, 2, 3, 4], "state": "EOF"})"), scan));
+  CHECK(scan.state == State::VEOF);
+  CHECK(scan.dump() == R"({"bytes":[1,2,3,4],"id":4,"ranges":[],"seq":-9,"state":"EOF"})");
+  CHECK(!Scan::fromJson(std::string(R"({"id": 4, "seq": -9, "bytes": [1, 2, 3, 4], "state": "eof"})"), scan));
+
+  Status status;
+  CHECK(Status::fromJson(std::string(R"({"name": "r2", "mode": "docked", "battery": 1,
+                                         "tags": ["back", "left"], "errors": []})"), status));
+  CHECK(status.mode == Mode::Docked);
+  CHECK(status.tags == std::vector<Status::TagsItem>({Status::TagsItem::Back, Status::TagsItem::Left}));
+  CHECK(!Status::fromJson(std::string(R"({"name": "r2", "mode": "docked", "battery": 1,
+                                          "tags": ["up"], "errors": []})"), status));
+  return test::failures();
+}
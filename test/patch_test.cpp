@@ -0,0 +1,130 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// diff() and applyPatch() carry changes between messages as JSON merge
+// patches, and a patch that fails leaves the message unchanged.
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+template <typename T>
+T decode(const char* text) {
+  T out;
+  CHECK(T::fromJson(std::string(text), out));
+  return out;
+}
+
+// Patching prev with the diff to next gives next, also after a round trip
+// through the JSON text of the patch.
+template <typename T>
+void checkDiff(const T& prev, const T& next) {
+  json patch = next.diff(prev);
+  CHECK((patch == json::object()) == (prev == next));
+  T patched = prev;
+  CHECK(patched.applyPatch(json::parse(patch.dump())));
+  CHECK(patched == next);
+  CHECK(patched.hash() == next.hash());
+}
+
+// A patch that fails leaves the message unchanged, whichever member it fails
+// on.
+template <typename T>
+void checkRejected(const T& value, const char* patch) {
+  T patched = value;
+  CHECK(!patched.applyPatch(json::parse(patch)));
+  CHECK(patched == value);
+}
+
+int main() {
+  Status status = decode<Status>(R"({
+    "name": "r2", "mode": "driving", "battery": 0.5,
+    "tags": ["left", "front"], "errors": [{"code": 3, "text": "stuck"}]
+  })");
+  Status charged = status;
+  charged.battery = 1.0;
+  checkDiff(status, status);
+  checkDiff(status, charged);
+  CHECK(charged.diff(status) == json::parse(R"({"battery": 1.0})"));
+  Status cleared = charged;
+  cleared.errors.clear();
+  cleared.tags.push_back("back");
+  checkDiff(status, cleared);
+  checkDiff(cleared, status);
+
+  checkRejected(status, R"({"name": 5})");
+  checkRejected(status, R"({"battery": 0.25, "name": null})");
+  checkRejected(status, R"({"battery": 0.25, "errors": [{"code": "3"}]})");
+  checkRejected(status, R"({"battery": 0.25, "tags": "left"})");
+  checkRejected(status, "[]");
+
+  PoseStamped pose = decode<PoseStamped>(R"({
+    "header": {"stamp": 1.5, "frameId": "map", "seq": 7},
+    "pose": {
+      "position": {"x": 1, "y": 2, "z": 3},
+      "orientation": {"w": 1, "x": 0, "y": 0, "z": 0},
+      "covariance": [1, 0, 0, 1],
+      "corners": [{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 1, "z": 1}]
+    }
+  })");
+  PoseStamped moved = pose;
+  moved.pose.position.y = -2;
+  moved.pose.corners[1].x = 4;
+  moved.header.frame_id.reset();
+  moved.header.seq = 8;
+  checkDiff(pose, moved);
+  checkDiff(moved, pose);
+  CHECK(moved.diff(pose)["pose"] ==
+        json::parse(R"({"position": {"y": -2.0}, "corners": [{"x": 0.0, "y": 0.0, "z": 0.0},
+                                                             {"x": 4.0, "y": 1.0, "z": 1.0}]})"));
+  CHECK(moved.diff(pose)["header"] == json::parse(R"({"frameId": null, "seq": 8})"));
+
+  checkRejected(pose, R"({"header": {"seq": 8}, "pose": {"position": {"x": 0, "y": "2"}}})");
+  checkRejected(pose, R"({"header": {"seq": 8}, "pose": {"position": {"x": 0, "z": null}}})");
+  checkRejected(pose, R"({"header": {"stamp": 2}, "pose": {"covariance": [1, 0, 0]}})");
+  checkRejected(pose, R"({"header": {"stamp": 2}, "pose": {"orientation": 1}})");
+
+  Scan scan = decode<Scan>(R"({"id": 4, "seq": -9, "bytes": [1, 2, 3, 4], "origin": {"x": 1}})");
+  Scan aimed = scan;
+  aimed.origin.reset();
+  aimed.target.emplace();
+  aimed.target->y = 2;
+  aimed.gain = -2;
+  aimed.ranges = {0.5f, 1.25f};
+  checkDiff(scan, aimed);
+  checkDiff(aimed, scan);
+  CHECK(aimed.diff(scan) ==
+        json::parse(R"({"origin": null, "target": {"y": 2.0}, "gain": -2, "ranges": [0.5, 1.25]})"));
+
+  checkRejected(scan, R"({"gain": 1, "id": -1})");
+  checkRejected(scan, R"({"gain": 1, "bytes": [1, 2, 3, 256]})");
+  checkRejected(scan, R"({"gain": 1, "origin": {"y": "2"}})");
+  return test::failures();
+}
@@ -0,0 +1,146 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// With --pmr, messages decoded with a memory resource allocate their strings,
+// vectors and nested structs from it, copies take the default resource unless
+// given an allocator, and required fixed size arrays of structs still need
+// their exact size.
+
+#include <memory_resource>
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+const char* POSE_STAMPED = R"({
+  "header": {"stamp": 1.5, "frameId": "a frame id longer than sso"},
+  "pose": {
+    "position": {"x": 1, "y": 2, "z": 3},
+    "orientation": {"w": 1, "x": 0, "y": 0, "z": 0},
+    "covariance": [1, 0, 0, 1],
+    "corners": [{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 1, "z": 1}]
+  }
+})";
+
+const char* STATUS = R"({
+  "name": "sixteen chars!!!", "mode": "idle", "battery": 0.5, "tags": ["left"],
+  "errors": [{"code": 1, "text": "an error text longer than sso"}, {"code": 2}]
+})";
+
+// A memory resource that counts the bytes allocated from it.
+class CountingResource : public std::pmr::memory_resource {
+ public:
+  size_t allocated = 0;
+
+ private:
+  void* do_allocate(size_t bytes, size_t alignment) override {
+    allocated += bytes;
+    return std::pmr::new_delete_resource()->allocate(bytes, alignment);
+  }
+
+  void do_deallocate(void* p, size_t bytes, size_t alignment) override {
+    std::pmr::new_delete_resource()->deallocate(p, bytes, alignment);
+  }
+
+  bool do_is_equal(const std::pmr::memory_resource& other) const noexcept override {
+    return this == &other;
+  }
+};
+
+// Replace the value at pointer in the JSON text.
+std::string with(const char* text, const char* pointer, const json& value) {
+  json document = json::parse(text);
+  document[json::json_pointer(pointer)] = value;
+  return document.dump();
+}
+
+void checkResource(const Status& status, std::pmr::memory_resource* resource) {
+  CHECK(status.get_allocator().resource() == resource);
+  CHECK(status.name.get_allocator().resource() == resource);
+  CHECK(status.errors.get_allocator().resource() == resource);
+  CHECK(status.errors[0].get_allocator().resource() == resource);
+  CHECK(status.errors[0].text->get_allocator().resource() == resource);
+}
+
+int main() {
+  CountingResource arena;
+  // anything allocated outside of the arena while decoding throws
+  std::pmr::set_default_resource(std::pmr::null_memory_resource());
+
+  auto status = Status::fromJson(std::string(STATUS), &arena);
+  CHECK(status);
+  checkResource(*status, &arena);
+  CHECK(json::parse(status->dump()) == json::parse(STATUS));
+
+  auto pose = PoseStamped::fromJson(std::string(POSE_STAMPED), &arena);
+  CHECK(pose);
+  CHECK(pose->header.frame_id->get_allocator().resource() == &arena);
+  CHECK(pose->pose.corners.get_allocator().resource() == &arena);
+  CHECK(pose->pose.corners[1].get_allocator().resource() == &arena);
+  CHECK(json::parse(pose->dump()) == json::parse(POSE_STAMPED));
+
+  // decoding in place keeps the resource of the struct
+  Status reused{Status::allocator_type(&arena)};
+  CHECK(Status::fromJson(std::string(STATUS), reused));
+  CHECK(Status::fromJson(with(STATUS, "/errors/0/text", "another text longer than sso"), reused));
+  checkResource(reused, &arena);
+  CHECK(*reused.errors[0].text == "another text longer than sso");
+
+  // required fixed size arrays of structs
+  CHECK(!PoseStamped::fromJson(with(POSE_STAMPED, "/pose/corners", json::array()), &arena));
+  CHECK(!PoseStamped::fromJson(with(POSE_STAMPED, "/pose/corners/2", {{"x", 2}, {"y", 2}, {"z", 2}}), &arena));
+  PoseStamped decoded{PoseStamped::allocator_type(&arena)};
+  CHECK(PoseStamped::fromJson(std::string(POSE_STAMPED), decoded));
+  CHECK(!PoseStamped::fromJson(with(POSE_STAMPED, "/pose/corners/1", json::object()), decoded));
+  CHECK(PoseStamped::fromJson(std::string(POSE_STAMPED), decoded));
+  CHECK(decoded.pose.corners.size() == 2);
+
+  size_t allocated = arena.allocated;
+  CHECK(allocated > 0);
+  std::pmr::set_default_resource(std::pmr::new_delete_resource());
+
+  // copies
+  Status copy(*status);
+  checkResource(copy, std::pmr::new_delete_resource());
+  CountingResource other;
+  Status other_copy(*status, Status::allocator_type(&other));
+  checkResource(other_copy, &other);
+  CHECK(other_copy.dump() == status->dump());
+  other_copy = copy;
+  checkResource(other_copy, &other);
+  CHECK(arena.allocated == allocated);
+
+  auto created = Status::create(Status::allocator_type(&arena));
+  CHECK(created->get_allocator().resource() == &arena);
+  *created = copy;
+  checkResource(*created, &arena);
+  CHECK(created->dump() == status->dump());
+  return test::failures();
+}
@@ -0,0 +1,166 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// Messages of the robot spec round-trip through JSON text, serialize(), CBOR
+// and MessagePack, numbers with a format are range checked, fixed size arrays
+// need their exact size, and isValid() checks the schema constraints.
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+const char* POSE_STAMPED = R"({
+  "header": {"stamp": 1.5, "frameId": "map", "seq": -9223372036854775807},
+  "pose": {
+    "position": {"x": 1, "y": -2.25, "z": 3e-3},
+    "orientation": {"w": 1, "x": 0, "y": 0, "z": 0},
+    "covariance": [1, 0.5, 0.5, 1],
+    "corners": [{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 1, "z": 1}]
+  }
+})";
+
+const char* STATUS = R"({
+  "name": "r2\"d2\"", "mode": "docked", "battery": 1,
+  "tags": ["left", "back"], "errors": [{"code": -3, "text": "stuck"}, {"code": 4}]
+})";
+
+const char* SCAN = R"({
+  "id": 4294967295, "seq": 9223372036854775807, "ranges": [0.5, 1.25, -3.75], "gain": -5,
+  "bytes": [0, 128, 255, 7], "origin": {"x": 1}, "target": {"x": 2, "y": -2}, "state": "a b"
+})";
+
+// Replace the value at pointer in the JSON text.
+std::string with(const char* text, const char* pointer, const json& value) {
+  json document = json::parse(text);
+  document[json::json_pointer(pointer)] = value;
+  return document.dump();
+}
+
+template <typename T>
+T decode(const std::string& text) {
+  T out;
+  CHECK(T::fromJson(text, out));
+  CHECK(json::parse(out.dump()) == json::parse(text));
+  return out;
+}
+
+template <typename T>
+void checkRoundTrip(const char* text) {
+  T value = decode<T>(text);
+  CHECK(value.isValid());
+  std::string dumped = value.dump();
+
+  std::string serialized;
+  value.serialize(serialized);
+  CHECK(serialized == dumped);
+
+  T from_json;
+  CHECK(T::fromJson(serialized, from_json));
+  CHECK(from_json.dump() == dumped);
+
+  CHECK(value.toCbor() == json::to_cbor(value.toJson()));
+  T from_cbor;
+  CHECK(T::fromCbor(value.toCbor(), from_cbor));
+  CHECK(from_cbor.dump() == dumped);
+
+  CHECK(value.toMsgPack() == json::to_msgpack(value.toJson()));
+  T from_msgpack;
+  CHECK(T::fromMsgPack(value.toMsgPack(), from_msgpack));
+  CHECK(from_msgpack.dump() == dumped);
+}
+
+// Whether the text decodes, also from CBOR and MessagePack.
+template <typename T>
+bool decodes(const std::string& text) {
+  T out;
+  bool decoded = T::fromJson(text, out);
+  CHECK(T::fromCbor(json::to_cbor(json::parse(text)), out) == decoded);
+  CHECK(T::fromMsgPack(json::to_msgpack(json::parse(text)), out) == decoded);
+  return decoded;
+}
+
+template <typename T>
+bool valid(const std::string& text) {
+  T out;
+  return T::fromJson(text, out) && out.isValid();
+}
+
+int main() {
+  checkRoundTrip<PoseStamped>(POSE_STAMPED);
+  checkRoundTrip<Status>(STATUS);
+  checkRoundTrip<Scan>(SCAN);
+
+  Scan scan = decode<Scan>(SCAN);
+  CHECK(scan.id == 4294967295u);
+  CHECK(scan.seq == INT64_MAX);
+  CHECK(scan.gain == -5);
+  CHECK(scan.bytes[1] == 128 && scan.bytes[2] == 255);
+  CHECK(scan.ranges.size() == 3 && scan.ranges[2] == -3.75f);
+  PoseStamped pose = decode<PoseStamped>(POSE_STAMPED);
+  CHECK(pose.header.seq == -INT64_MAX);
+  CHECK(pose.pose.covariance[1] == 0.5 && pose.pose.corners[1].z == 1);
+
+  // numbers out of the range of their format
+  CHECK(!decodes<Scan>(with(SCAN, "/id", 4294967296)));
+  CHECK(!decodes<Scan>(with(SCAN, "/id", -1)));
+  CHECK(!decodes<Scan>(with(SCAN, "/seq", 9223372036854775808u)));
+  CHECK(!decodes<Scan>(with(SCAN, "/gain", 128)));
+  CHECK(!decodes<Scan>(with(SCAN, "/gain", -129)));
+  CHECK(!decodes<Scan>(with(SCAN, "/bytes/0", 256)));
+  CHECK(!decodes<Scan>(with(SCAN, "/bytes/0", -1)));
+  CHECK(!decodes<Scan>(with(SCAN, "/ranges/0", 1e39)));
+  CHECK(decodes<Scan>(with(SCAN, "/gain", 127)));
+  CHECK(decodes<Scan>(with(SCAN, "/bytes/0", 0)));
+
+  // fixed size arrays
+  CHECK(!decodes<Scan>(with(SCAN, "/bytes", {1, 2, 3})));
+  CHECK(!decodes<Scan>(with(SCAN, "/bytes", {1, 2, 3, 4, 5})));
+  CHECK(!decodes<PoseStamped>(with(POSE_STAMPED, "/pose/covariance", {1, 0, 0})));
+  CHECK(!decodes<PoseStamped>(with(POSE_STAMPED, "/pose/corners", json::array())));
+
+  // required members
+  CHECK(!decodes<Scan>(R"({"id": 1, "bytes": [1, 2, 3, 4]})"));
+  CHECK(!decodes<Status>(with(STATUS, "/errors/1", json::object())));
+  CHECK(decodes<Scan>(R"({"id": 1, "seq": 2, "bytes": [1, 2, 3, 4]})"));
+
+  // constraints
+  CHECK(!valid<Status>(with(STATUS, "/name", "")));
+  CHECK(!valid<Status>(with(STATUS, "/name", "seventeen chars!!")));
+  CHECK(valid<Status>(with(STATUS, "/name", "sixteen chars!!!")));
+  CHECK(!valid<Status>(with(STATUS, "/battery", 1.5)));
+  CHECK(!valid<Status>(with(STATUS, "/battery", -0.25)));
+  CHECK(!valid<Status>(with(STATUS, "/mode", "flying")));
+  CHECK(!valid<Status>(with(STATUS, "/tags/1", "up")));
+  CHECK(!valid<Scan>(with(SCAN, "/gain", -6)));
+  CHECK(!valid<Scan>(with(SCAN, "/state", "a  b")));
+  CHECK(!valid<PoseStamped>(with(POSE_STAMPED, "/header/frameId", std::string(33, 'm'))));
+  CHECK(valid<PoseStamped>(with(POSE_STAMPED, "/header/frameId", std::string(32, 'm'))));
+  return test::failures();
+}
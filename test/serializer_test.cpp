@@ -0,0 +1,68 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// serialize() writes the same text as dump(), which fromJson() reads back,
+// including objects without members.
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+template <typename T>
+void checkRoundTrip(const T& value) {
+  std::string text;
+  value.serialize(text);
+  CHECK(text == value.dump());
+  T decoded;
+  CHECK(T::fromJson(text, decoded));
+  CHECK(decoded.dump() == text);
+}
+
+int main() {
+  checkRoundTrip(Empty());
+  checkRoundTrip(Status());
+
+  Sparse sparse;
+  checkRoundTrip(sparse);
+  sparse.inner.emplace();
+  sparse.blank.emplace();
+  sparse.points.resize(2);
+  checkRoundTrip(sparse);
+  sparse.name = "name";
+  sparse.count = 3;
+  sparse.inner->flag = true;
+  sparse.points[1].value = 1.5;
+  checkRoundTrip(sparse);
+
+  std::string text;
+  Status().serialize(text);
+  CHECK(text == R"({"payload":{}})");
+  return test::failures();
+}
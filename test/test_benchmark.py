@@ -0,0 +1,78 @@
+# Copyright (c) 2022, Hatchbed
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import yaml
+
+from conftest import GENERATOR, PREFIX, ROOT_DIR, generate, run
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmark"))
+import benchmark_generator  # noqa: E402
+
+
+# Build and run the benchmark generated in outdir, returning its report.  The
+# benchmark exits with an error if a sample doesn't decode, validate or
+# survive a round trip.
+def run_benchmark(compiler, outdir, tmp_path):
+    prefix_dir = os.path.join(outdir, PREFIX)
+    sources = [os.path.join(prefix_dir, file_name) for file_name in sorted(os.listdir(prefix_dir))
+               if file_name.endswith(".cpp")]
+    program = compiler.link(sources, outdir, tmp_path / "benchmark")
+    report = tmp_path / "report.json"
+    run(program, ["--min-time", "0.001", "--output", str(report)])
+    with open(str(report)) as f:
+        return json.load(f)
+
+
+def check_report(report, types):
+    assert report["passed"]
+    results = {result["type"]: result for result in report["results"]}
+    for type_name in types:
+        assert results[type_name]["decoded"]
+        assert results[type_name]["valid"]
+        assert results[type_name]["lossless"]
+
+
+@pytest.mark.parametrize("options", [[], ["--serializer", "--binary", "--out-of-line"]])
+def test_benchmark_empty_objects(compiler, tmp_path, options):
+    outdir = generate("empty_objects.yaml", tmp_path, ["--benchmark"] + options)
+    check_report(run_benchmark(compiler, outdir, tmp_path), ["Empty", "Sparse", "Status"])
+
+
+def test_benchmark_synthetic_spec(compiler, tmp_path):
+    spec = tmp_path / "spec.yaml"
+    with open(str(spec), "w") as f:
+        yaml.safe_dump(benchmark_generator.synthesize_spec(12, depth=3), f, sort_keys=False)
+    subprocess.run([sys.executable, GENERATOR, str(spec), PREFIX, str(tmp_path), "--benchmark"],
+                   check=True, stdout=subprocess.DEVNULL)
+    check_report(run_benchmark(compiler, str(tmp_path), tmp_path), ["Record{}".format(i) for i in range(12)])
@@ -0,0 +1,65 @@
+# Copyright (c) 2022, Hatchbed
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import sys
+
+from conftest import ROOT_DIR
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+import asyncapi_gencpp  # noqa: E402
+
+SPEC = """asyncapi: 2.0.0
+info: {{title: {}, version: 1.0.0}}
+channels: {{}}
+"""
+
+
+def write_spec(path, title):
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(SPEC.format(title))
+    return str(path)
+
+
+# Specs with the same file name in different directories have cache entries
+# of their own, and a changed spec only replaces the entry of its own path.
+def test_cache_entries_per_path(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = write_spec(tmp_path / "a" / "spec.yaml", "first")
+    second = write_spec(tmp_path / "b" / "spec.yaml", "second")
+    assert asyncapi_gencpp.load_spec(first, cache_dir)["info"]["title"] == "first"
+    assert asyncapi_gencpp.load_spec(second, cache_dir)["info"]["title"] == "second"
+    entries = set(os.listdir(cache_dir))
+    assert len(entries) == 2
+
+    write_spec(tmp_path / "a" / "spec.yaml", "changed")
+    assert asyncapi_gencpp.load_spec(first, cache_dir)["info"]["title"] == "changed"
+    assert asyncapi_gencpp.load_spec(second, cache_dir)["info"]["title"] == "second"
+    changed = set(os.listdir(cache_dir))
+    assert len(changed) == 2
+    assert len(changed & entries) == 1
@@ -0,0 +1,154 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// fromJsonValidated() decodes valid messages like fromJson(), and reports the
+// JSON pointer, reason and text offset of the first value that doesn't match
+// the schema or violates one of its constraints.
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+const json POSE_STAMPED = json::parse(R"({
+  "header": {"stamp": 1.5, "frameId": "map", "seq": 7},
+  "pose": {
+    "position": {"x": 1, "y": 2, "z": 3},
+    "orientation": {"w": 1, "x": 0, "y": 0, "z": 0},
+    "covariance": [1, 0, 0, 1],
+    "corners": [{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 1, "z": 1}]
+  }
+})");
+
+const json STATUS = json::parse(R"({
+  "name": "r2", "mode": "driving", "battery": 0.5,
+  "tags": ["left", "front"], "errors": [{"code": 3, "text": "stuck"}, {"code": 4}]
+})");
+
+const json SCAN = json::parse(R"({
+  "id": 4000000000, "seq": -9000000000, "ranges": [0.5, 1.25], "gain": -2,
+  "bytes": [1, 2, 3, 255], "origin": {"x": 1, "y": 2}, "state": "in-progress"
+})");
+
+// The document with the value at pointer replaced.
+json with(json document, const char* pointer, const json& value) {
+  document[json::json_pointer(pointer)] = value;
+  return document;
+}
+
+template <typename T>
+bool decodes(const json& document) {
+  std::string text = document.dump();
+  T validated;
+  T decoded;
+  asyncapi_gencpp::DecodeError error;
+  if (!T::fromJsonValidated(text, validated, error)) {
+    return false;
+  }
+  CHECK(T::fromJsonValidated(text, error));
+  CHECK(T::fromJson(text, decoded) && decoded.isValid());
+  CHECK(validated.dump() == decoded.dump());
+  return true;
+}
+
+// Whether the text fails to decode with the error at path, and an offset
+// within the text.
+template <typename T>
+bool failsAt(const std::string& text, const char* path, const char* message) {
+  T out;
+  asyncapi_gencpp::DecodeError error;
+  if (T::fromJsonValidated(text, out, error)) {
+    std::cerr << text << ": decoded\n";
+    return false;
+  }
+  CHECK(!T::fromJsonValidated(text, error));
+  if (error.path != path || error.message != message || error.offset > text.size()) {
+    std::cerr << text << ": " << error.path << ": " << error.message << " at " << error.offset << "\n";
+    return false;
+  }
+  return true;
+}
+
+template <typename T>
+bool failsAt(const json& document, const char* path, const char* message) {
+  return failsAt<T>(document.dump(), path, message);
+}
+
+int main() {
+  CHECK(decodes<PoseStamped>(POSE_STAMPED));
+  CHECK(decodes<Status>(STATUS));
+  CHECK(decodes<Scan>(SCAN));
+  CHECK(decodes<Scan>(with(SCAN, "/gain", -5)));
+  CHECK(decodes<Status>(with(STATUS, "/battery", 1)));
+
+  // wrong types and missing members
+  CHECK(failsAt<Status>(json::array(), "", "expected an object"));
+  CHECK(failsAt<Status>(with(STATUS, "/name", 5), "/name", "expected a string"));
+  CHECK(failsAt<Status>(with(STATUS, "/tags", "left"), "/tags", "expected an array"));
+  CHECK(failsAt<Status>(with(STATUS, "/errors/0/code", "3"), "/errors/0/code", "expected a number"));
+  CHECK(failsAt<Status>(with(STATUS, "/errors/1", json::object()), "/errors/1/code", "missing required property"));
+  CHECK(failsAt<PoseStamped>(with(POSE_STAMPED, "/header/stamp", "now"), "/header/stamp", "expected a number"));
+  CHECK(failsAt<PoseStamped>(with(POSE_STAMPED, "/pose/corners/1/z", nullptr), "/pose/corners/1/z",
+                             "expected a number"));
+  json no_seq = SCAN;
+  no_seq.erase("seq");
+  CHECK(failsAt<Scan>(no_seq, "/seq", "missing required property"));
+
+  // number formats and fixed size arrays
+  CHECK(failsAt<Scan>(with(SCAN, "/id", -1), "/id", "expected a number"));
+  CHECK(failsAt<Scan>(with(SCAN, "/gain", 128), "/gain", "expected a number"));
+  CHECK(failsAt<Scan>(with(SCAN, "/bytes", {1, 2, 3}), "/bytes", "expected an array of 4 numbers"));
+  CHECK(failsAt<Scan>(with(SCAN, "/bytes/2", 256), "/bytes", "expected an array of 4 numbers"));
+  CHECK(failsAt<PoseStamped>(with(POSE_STAMPED, "/pose/corners/2", POSE_STAMPED["pose"]["position"]),
+                             "/pose/corners", "expected 2 items"));
+
+  // constraints
+  CHECK(failsAt<Status>(with(STATUS, "/name", ""), "/name", "shorter than minLength 1"));
+  CHECK(failsAt<Status>(with(STATUS, "/name", "seventeen chars!!"), "/name", "longer than maxLength 16"));
+  CHECK(failsAt<Status>(with(STATUS, "/mode", "flying"), "/mode", "not one of the enum values"));
+  CHECK(failsAt<Status>(with(STATUS, "/battery", 1.5), "/battery", "greater than maximum 1"));
+  CHECK(failsAt<Status>(with(STATUS, "/battery", -1), "/battery", "less than minimum 0"));
+  CHECK(failsAt<Status>(with(STATUS, "/tags/1", "up"), "/tags/1", "not one of the enum values"));
+  CHECK(failsAt<Scan>(with(SCAN, "/gain", -6), "/gain", "less than minimum -5"));
+  CHECK(failsAt<Scan>(with(SCAN, "/state", "Done!"), "/state", "not one of the enum values"));
+  CHECK(failsAt<PoseStamped>(with(POSE_STAMPED, "/header/frameId", std::string(33, 'm')), "/header/frameId",
+                             "longer than maxLength 32"));
+
+  // the offset is that of the reader at the failure
+  std::string text = R"({"name": "r2", "mode": "flying", "battery": 0.5, "tags": [], "errors": []})";
+  CHECK(failsAt<Status>(text, "/mode", "not one of the enum values"));
+  asyncapi_gencpp::DecodeError error;
+  CHECK(!Status::fromJsonValidated(text, error));
+  CHECK(error.offset > text.find("flying") && error.offset <= text.find("flying") + 7);
+  std::string trailing = STATUS.dump() + " {}";
+  CHECK(failsAt<Status>(trailing, "", "unexpected trailing characters"));
+  CHECK(!Status::fromJsonValidated(trailing, error));
+  CHECK(error.offset == STATUS.dump().size() + 1);
+  return test::failures();
+}
@@ -0,0 +1,145 @@
+// Copyright (c) 2022, Hatchbed
+// All rights reserved.
+//
+// Redistribution and use in source and binary forms, with or without
+// modification, are permitted provided that the following conditions are met:
+//
+// 1. Redistributions of source code must retain the above copyright notice, this
+//    list of conditions and the following disclaimer.
+//
+// 2. Redistributions in binary form must reproduce the above copyright notice,
+//    this list of conditions and the following disclaimer in the documentation
+//    and/or other materials provided with the distribution.
+//
+// 3. Neither the name of the copyright holder nor the names of its
+//    contributors may be used to endorse or promote products derived from
+//    this software without specific prior written permission.
+//
+// THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+// AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+// IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+// DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+// FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+// DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+// SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+// CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+// OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+// OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+// With --views, the view of a message decodes its members from the JSON text
+// on access, returns nothing for members that are missing or of the wrong
+// type, and decodes nested objects and arrays lazily as views.
+
+#include <iterator>
+#include <string>
+#include <vector>
+
+#include <check.h>
+#include <test/msg/messages.h>
+
+using namespace test::msg;
+
+const std::string POSE_STAMPED = R"({
+  "header": {"stamp": 1.5, "frameId": "map", "seq": -7},
+  "pose": {
+    "position": {"x": 1, "y": 2, "z": 3},
+    "orientation": {"w": 1, "x": 0, "y": 0, "z": 0},
+    "covariance": [1, 0.5, 0.25, 1],
+    "corners": [{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 1, "z": 1}]
+  }
+})";
+
+const std::string STATUS = R"({
+  "name": "r2\"d2\"", "mode": "docked", "battery": 0.5, "unknown": {"tags": [1, {}]},
+  "tags": ["left", "back"], "errors": [{"code": -3, "text": "stuck"}, {"code": 4}]
+})";
+
+const std::string SCAN = R"({
+  "id": 4294967295, "seq": 1, "ranges": [0.5, 1.25], "gain": 128,
+  "bytes": [0, 128, 255, 7], "origin": {"x": 1, "y": "2"}, "state": "a b"
+})";
+
+int main() {
+  PoseStampedView pose(POSE_STAMPED);
+  CHECK(pose.valid());
+  CHECK(pose.raw() == POSE_STAMPED);
+  auto frame_id = pose.header()->frame_id();
+  CHECK(frame_id == "map");
+  // strings without escapes point into the text
+  CHECK(frame_id->data() > POSE_STAMPED.data() && frame_id->data() < POSE_STAMPED.data() + POSE_STAMPED.size());
+  CHECK(pose.header()->seq() == -7);
+  CHECK(pose.pose()->orientation()->w() == 1.0);
+  CHECK(pose.pose()->position()->z() == 3.0);
+  auto covariance = pose.pose()->covariance();
+  CHECK((std::vector<double>(covariance->begin(), covariance->end()) == std::vector<double>{1, 0.5, 0.25, 1}));
+  auto corners = pose.pose()->corners();
+  double z = 0;
+  for (const auto& corner: *corners) {
+    z += *corner.z();
+  }
+  CHECK(z == 1.0);
+  CHECK(corners->size() == 2);
+
+  StatusView status(STATUS);
+  CHECK(status.valid());
+  CHECK(status.name() == "r2\"d2\"");
+  CHECK(status.mode() == "docked");
+  CHECK(status.battery() == 0.5);
+  auto tags = status.tags();
+  std::vector<std::string> tag_names;
+  for (auto tag: *tags) {
+    tag_names.emplace_back(tag);
+  }
+  CHECK((tag_names == std::vector<std::string>{"left", "back"}));
+  auto errors = status.errors();
+  std::vector<int> codes;
+  for (const auto& error: *errors) {
+    codes.push_back(*error.code());
+  }
+  CHECK((codes == std::vector<int>{-3, 4}));
+  auto error = errors->begin();
+  CHECK(error->text() == "stuck");
+  CHECK(!(++error)->text());
+
+  Status decoded;
+  CHECK(status.decode(decoded));
+  Status expected;
+  CHECK(Status::fromJson(STATUS, expected));
+  CHECK(decoded.dump() == expected.dump());
+
+  // numbers out of the range of their format, and members of the wrong type
+  ScanView scan(SCAN);
+  CHECK(scan.valid());
+  CHECK(scan.id() == 4294967295u);
+  CHECK(!scan.gain());
+  CHECK(scan.origin()->x() == 1.0);
+  CHECK(!scan.origin()->y());
+  CHECK(!scan.target());
+  CHECK(scan.state() == "a b");
+  auto bytes = scan.bytes();
+  CHECK((std::vector<int>(bytes->begin(), bytes->end()) == std::vector<int>{0, 128, 255, 7}));
+  Scan out;
+  CHECK(!scan.decode(out));
+
+  StatusView wrong(R"({"name": 5, "battery": "full", "tags": {}, "errors": 1})");
+  CHECK(wrong.valid());
+  CHECK(!wrong.name());
+  CHECK(!wrong.mode());
+  CHECK(!wrong.battery());
+  CHECK(!wrong.tags());
+  CHECK(!wrong.errors());
+  CHECK(!wrong.decode(decoded));
+
+  // a list stops at the first item that doesn't decode
+  StatusView partial(R"({"tags": ["left", 3, "back"]})");
+  auto partial_tags = partial.tags();
+  CHECK(partial_tags->size() == 3);
+  CHECK(std::distance(partial_tags->begin(), partial_tags->end()) == 1);
+
+  CHECK(!StatusView(R"({"name": "r2")").valid());
+  CHECK(!StatusView("[]").valid());
+  CHECK(!StatusView(STATUS + "}").valid());
+  CHECK(!StatusView().valid());
+  return test::failures();
+}